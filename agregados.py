@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# Rótulo usado para o agregado de todos os cursos ou de todas as disciplinas.
+TODOS = 'Todos'
+
+# Faixas do histograma de médias finais: [0, 1), [1, 2), ..., [9, 10]
+FAIXAS_HISTOGRAMA = [f'{i}-{i + 1}' for i in range(10)]
+
+COLUNAS_NOTAS = ['AV1', 'AV2', 'MediaFinal']
+
+def _metricas_vazias():
+    return {
+        'alunos': 0,
+        'somas': dict.fromkeys(COLUNAS_NOTAS, 0.0),
+        'medias': dict.fromkeys(COLUNAS_NOTAS, 0.0),
+        'histograma': np.zeros(len(FAIXAS_HISTOGRAMA), dtype=np.int64),
+    }
+
+class CuboAgregado:
+    """Agregados pré-calculados do relatório consolidado, por (curso, disciplina).
+
+    Para cada combinação, e para os totais com TODOS em qualquer das posições,
+    guarda o número de alunos, somas e médias de AV1/AV2/MediaFinal e o histograma
+    de médias finais. Guarda também as posições das linhas de cada combinação,
+    para filtrar o DataFrame sem varrer as colunas. Tudo é calculado uma única vez
+    por versão dos dados. Aprovados e reprovados dependem da nota mínima escolhida
+    no painel e ficam em AnaliseNotas (analise.py).
+    """
+
+    def __init__(self, df):
+        self.total_linhas = len(df)
+        self.metricas = {}
+        self.indices = {}
+        self.disciplinas_por_curso = {}
+
+        if df.empty:
+            self.cursos = []
+            self.disciplinas_por_curso[TODOS] = []
+            self.metricas[(TODOS, TODOS)] = _metricas_vazias()
+            return
+
+        grupos = df.groupby(['Curso', 'Disciplina'], observed=True, sort=True)
+        codigos = grupos.ngroup().to_numpy()
+        pares = [(str(curso), str(disciplina)) for curso, disciplina in grupos.size().index]
+        n_grupos = len(pares)
+
+        # Somas, contagens e histogramas por grupo, em uma passada com bincount
+        contagens = np.bincount(codigos, minlength=n_grupos)
+        somas = {col: np.bincount(codigos, weights=df[col].to_numpy(dtype=np.float64), minlength=n_grupos) for col in COLUNAS_NOTAS}
+        media_final = df['MediaFinal'].to_numpy(dtype=np.float64)
+        faixas = np.clip(np.floor(media_final), 0, len(FAIXAS_HISTOGRAMA) - 1).astype(np.int64)
+        histogramas = np.bincount(codigos * len(FAIXAS_HISTOGRAMA) + faixas,
+                                  minlength=n_grupos * len(FAIXAS_HISTOGRAMA)).reshape(n_grupos, -1)
+
+        # Posições das linhas de cada grupo, ordenadas
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.concatenate([[0], np.cumsum(contagens)])
+
+        acumulado = {}
+        for g, (curso, disciplina) in enumerate(pares):
+            parcial = {
+                'alunos': int(contagens[g]),
+                'somas': {col: float(somas[col][g]) for col in COLUNAS_NOTAS},
+                'histograma': histogramas[g],
+            }
+            posicoes = ordem[limites[g]:limites[g + 1]]
+            for chave in ((curso, disciplina), (curso, TODOS), (TODOS, disciplina), (TODOS, TODOS)):
+                self._acumular(acumulado, chave, parcial)
+                self.indices.setdefault(chave, []).append(posicoes)
+
+        for chave, parcial in acumulado.items():
+            alunos = parcial['alunos']
+            parcial['medias'] = {col: parcial['somas'][col] / alunos for col in COLUNAS_NOTAS}
+            self.metricas[chave] = parcial
+
+        for chave, partes in self.indices.items():
+            self.indices[chave] = partes[0] if len(partes) == 1 else np.sort(np.concatenate(partes))
+        # O total geral não precisa de índice: é o próprio DataFrame
+        del self.indices[(TODOS, TODOS)]
+
+        self.cursos = sorted({curso for curso, _ in pares})
+        self.disciplinas_por_curso[TODOS] = sorted({disciplina for _, disciplina in pares})
+        for curso, disciplina in pares:
+            self.disciplinas_por_curso.setdefault(curso, []).append(disciplina)
+        for curso in self.cursos:
+            self.disciplinas_por_curso[curso].sort()
+
+    @staticmethod
+    def _acumular(acumulado, chave, parcial):
+        if chave not in acumulado:
+            acumulado[chave] = {
+                'alunos': parcial['alunos'],
+                'somas': dict(parcial['somas']),
+                'histograma': parcial['histograma'].copy(),
+            }
+            return
+        destino = acumulado[chave]
+        destino['alunos'] += parcial['alunos']
+        destino['histograma'] += parcial['histograma']
+        for col in COLUNAS_NOTAS:
+            destino['somas'][col] += parcial['somas'][col]
+
+    def disciplinas(self, curso):
+        """Lista ordenada das disciplinas de um curso (ou de todos, com TODOS)."""
+        return self.disciplinas_por_curso.get(curso, [])
+
+    def consultar(self, curso=TODOS, disciplina=TODOS):
+        """Retorna as métricas de uma combinação; combinações sem dados têm métricas zeradas."""
+        return self.metricas.get((curso, disciplina), _metricas_vazias())
+
+    def filtrar(self, df, curso=TODOS, disciplina=TODOS):
+        """Retorna as linhas de df da combinação pedida, usando o índice de posições."""
+        if curso == TODOS and disciplina == TODOS:
+            return df
+        posicoes = self.indices.get((curso, disciplina))
+        if posicoes is None:
+            return df.iloc[0:0]
+        return df.iloc[posicoes]
+
+def histograma_df(metricas):
+    """Monta um DataFrame com o histograma de médias finais, pronto para st.bar_chart."""
+    return pd.DataFrame({'Faixa': FAIXAS_HISTOGRAMA, 'Alunos': metricas['histograma']}).set_index('Faixa')
@@ -0,0 +1,208 @@
+import difflib
+import unicodedata
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+from analise import NOTA_MINIMA, situacao
+
+# Prefixos das chaves de aluno: pelo identificador do Moodle ou, na falta dele, pelo nome normalizado.
+PREFIXO_ID = 'id:'
+PREFIXO_NOME = 'nome:'
+
+COLUNAS_HISTORICO = ['Curso', 'Disciplina', 'AV1', 'AV2', 'MediaFinal']
+
+def normalizar_nome(nome):
+    """Normaliza um nome para comparação: sem acentos, sem diferença de maiúsculas e com espaços simples.
+
+    Ex.: '  JOÃO   da Conceição ' -> 'joao da conceicao'.
+    """
+    nome = str(nome)
+    if nome.isascii():  # sem acentos: basta ajustar maiúsculas e espaços
+        return ' '.join(nome.casefold().split())
+    decomposto = unicodedata.normalize('NFKD', nome)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+def chaves_alunos(df):
+    """Chave de aluno de cada linha do relatório.
+
+    A chave é o identificador do Moodle ou, na falta dele, o nome normalizado; linhas
+    sem identificador recebem o identificador do aluno de mesmo nome quando há um
+    único candidato. Nomes e identificadores são tratados uma vez por valor distinto,
+    então o custo cresce com o número de alunos, não com o de linhas.
+
+    Retorna o código da chave de cada linha (na ordem em que as chaves aparecem), as
+    chaves distintas e o nome normalizado de cada linha.
+    """
+    codigos_nome, nomes_unicos = pd.factorize(df['Aluno'], sort=False)
+    codigos_normalizado, normalizados_unicos = pd.factorize(
+        np.array([normalizar_nome(nome) for nome in np.asarray(nomes_unicos, dtype=object)], dtype=object), sort=False)
+    codigos_normalizado = codigos_normalizado[codigos_nome]
+    normalizados_unicos = np.asarray(normalizados_unicos, dtype=object)
+
+    if 'Identificador' in df:
+        codigos_id, ids_unicos = pd.factorize(df['Identificador'], sort=False)
+    else:
+        codigos_id, ids_unicos = np.full(len(df), -1), []
+    ids_unicos = np.asarray(ids_unicos, dtype=object)
+    n_ids = len(ids_unicos)
+    tem_id = codigos_id >= 0
+
+    # Identificadores distintos vistos com cada nome normalizado
+    pares = pd.unique(codigos_normalizado[tem_id].astype(np.int64) * max(n_ids, 1) + codigos_id[tem_id])
+    nome_do_par, id_do_par = np.divmod(pares, max(n_ids, 1))
+    ids_por_nome = np.bincount(nome_do_par, minlength=len(normalizados_unicos))
+
+    # Tabela de chaves possíveis: os identificadores seguidos dos nomes normalizados.
+    # Um nome com um único identificador aponta para a posição desse identificador.
+    posicao_por_nome = np.arange(len(normalizados_unicos)) + n_ids
+    unicos = ids_por_nome[nome_do_par] == 1
+    posicao_por_nome[nome_do_par[unicos]] = id_do_par[unicos]
+    posicoes = posicao_por_nome[codigos_normalizado]
+    posicoes[tem_id] = codigos_id[tem_id]
+
+    codigos, usadas = pd.factorize(posicoes, sort=False)
+    tabela = np.concatenate([PREFIXO_ID + ids_unicos, PREFIXO_NOME + normalizados_unicos]).astype(object)
+    return codigos, tabela[usadas], normalizados_unicos[codigos_normalizado]
+
+class IndiceAlunos:
+    """Índice invertido dos alunos do relatório consolidado.
+
+    Cada aluno recebe uma chave estável: o identificador do Moodle (e-mail ou número
+    de identificação), quando a planilha o traz, ou o nome normalizado. Linhas sem
+    identificador são associadas ao aluno identificado de mesmo nome quando há um
+    único candidato. Para cada chave são guardadas as posições das linhas no
+    DataFrame, então o histórico de um aluno é lido sem varrer o relatório.
+
+    O histórico de um aluno é montado a partir de cópias das colunas do relatório
+    em arrays, sem indexar o DataFrame.
+
+    A busca por nome aceita prefixos (do nome completo ou de qualquer parte dele,
+    via bisect em uma lista ordenada de termos) e, se nada for encontrado, recorre
+    a uma busca aproximada com difflib.
+    """
+
+    def __init__(self, df):
+        self.total_linhas = len(df)
+        self.posicoes = {}
+        self.nomes = {}
+        self._termos = []
+        self._chaves_termos = []
+        self._nomes_normalizados = {}
+        # Colunas do histórico como arrays, para montar o histórico de um aluno sem passar pelo DataFrame
+        self._colunas = {col: df[col].to_numpy(dtype=object if col in ('Curso', 'Disciplina') else None)
+                         for col in COLUNAS_HISTORICO}
+        if df.empty:
+            return
+
+        codigos, chaves_unicas, normalizados = chaves_alunos(df)
+
+        # Posições das linhas de cada chave, como no CuboAgregado
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.concatenate([[0], np.cumsum(np.bincount(codigos, minlength=len(chaves_unicas)))])
+        alunos = df['Aluno'].astype(str).to_numpy()
+        for g, chave in enumerate(chaves_unicas):
+            posicoes = ordem[limites[g]:limites[g + 1]]
+            self.posicoes[chave] = posicoes
+            self.nomes[chave] = alunos[posicoes[0]]
+            self._nomes_normalizados[chave] = normalizados[posicoes[0]]
+
+        # Termos de busca: o nome completo e cada sufixo a partir de uma palavra,
+        # para que 'souza' encontre 'Ana Souza' e 'maria s' encontre 'Ana Maria Souza'
+        termos = []
+        for chave, nome in self._nomes_normalizados.items():
+            palavras = nome.split()
+            for i in range(len(palavras)):
+                termos.append((' '.join(palavras[i:]), chave))
+        termos.sort()
+        self._termos = [termo for termo, _ in termos]
+        self._chaves_termos = [chave for _, chave in termos]
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    def chave(self, nome=None, identificador=None):
+        """Retorna a chave de um aluno pelo identificador do Moodle ou pelo nome, ou None se não existir."""
+        if identificador is not None:
+            # E-mails são gravados em minúsculas; números de identificação, como vieram
+            for texto in (str(identificador).strip(), str(identificador).strip().lower()):
+                if PREFIXO_ID + texto in self.posicoes:
+                    return PREFIXO_ID + texto
+        if nome is not None:
+            chave = PREFIXO_NOME + normalizar_nome(nome)
+            if chave in self.posicoes:
+                return chave
+            alvo = normalizar_nome(nome)
+            candidatos = [c for c in self.buscar_prefixo(alvo) if self._nomes_normalizados[c] == alvo]
+            if len(candidatos) == 1:
+                return candidatos[0]
+        return None
+
+    def buscar_prefixo(self, texto, limite=20):
+        """Chaves dos alunos cujo nome (ou uma parte final dele) começa com `texto`."""
+        prefixo = normalizar_nome(texto)
+        if not prefixo:
+            return []
+        encontrados = {}
+        inicio = bisect_left(self._termos, prefixo)
+        for i in range(inicio, len(self._termos)):
+            if not self._termos[i].startswith(prefixo):
+                break
+            encontrados.setdefault(self._chaves_termos[i], None)
+            if len(encontrados) >= limite:
+                break
+        return list(encontrados)
+
+    def buscar(self, texto, limite=20, corte=0.75):
+        """Busca alunos pelo nome: por prefixo e, se não houver resultado, por semelhança.
+
+        A busca aproximada compara apenas com os nomes que começam pela mesma letra,
+        para continuar rápida com muitos alunos. Retorna uma lista de chaves.
+        """
+        encontrados = self.buscar_prefixo(texto, limite)
+        if encontrados:
+            return encontrados
+        alvo = normalizar_nome(texto)
+        if not alvo:
+            return []
+        inicio = bisect_left(self._termos, alvo[0])
+        candidatos = {}
+        for i in range(inicio, len(self._termos)):
+            if not self._termos[i].startswith(alvo[0]):
+                break
+            candidatos.setdefault(self._termos[i], []).append(self._chaves_termos[i])
+        parecidos = difflib.get_close_matches(alvo, list(candidatos), n=limite, cutoff=corte)
+        resultado = {}
+        for termo in parecidos:
+            for chave in candidatos[termo]:
+                resultado.setdefault(chave, None)
+        return list(resultado)[:limite]
+
+    def rotulo(self, chave):
+        """Texto para exibir um aluno: o nome e, se houver, o identificador do Moodle."""
+        nome = self.nomes.get(chave, '')
+        if chave.startswith(PREFIXO_ID):
+            return f'{nome} ({chave[len(PREFIXO_ID):]})'
+        return nome
+
+    def historico(self, chave, nota_minima=NOTA_MINIMA):
+        """Notas do aluno em todos os cursos e disciplinas, com a situação em cada uma."""
+        posicoes = self.posicoes.get(chave)
+        if posicoes is None:
+            return pd.DataFrame(columns=COLUNAS_HISTORICO + ['Situacao'])
+        colunas = {col: valores[posicoes] for col, valores in self._colunas.items()}
+        ordem = np.lexsort((colunas['Disciplina'].astype(str), colunas['Curso'].astype(str)))
+        historico = pd.DataFrame({col: valores[ordem] for col, valores in colunas.items()})
+        historico['Situacao'] = situacao(historico['MediaFinal'], nota_minima)
+        return historico
+
+def resumo_historico(historico):
+    """Totais do histórico de um aluno: disciplinas cursadas, aprovações, reprovações e média geral."""
+    disciplinas = len(historico)
+    aprovadas = int((historico['Situacao'] == 'Aprovado').sum()) if disciplinas else 0
+    return {
+        'disciplinas': disciplinas,
+        'aprovadas': aprovadas,
+        'reprovadas': disciplinas - aprovadas,
+        'media_geral': float(historico['MediaFinal'].mean()) if disciplinas else 0.0,
+    }
@@ -0,0 +1,283 @@
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from opcoes import NOTA_MINIMA
+
+# Percentis da média final calculados para cada grupo.
+PERCENTIS = (10, 25, 50, 75, 90)
+
+# Número de disciplinas reprovadas a partir do qual um aluno é considerado em risco.
+MIN_REPROVACOES_RISCO = 2
+
+COLUNAS_NOTAS = ['AV1', 'AV2', 'MediaFinal']
+# Nome das colunas de média e de desvio padrão de cada nota (e da evolução AV1 -> AV2)
+MEDIAS = {'AV1': 'MediaAV1', 'AV2': 'MediaAV2', 'MediaFinal': 'MediaFinal', 'Delta': 'DeltaAV1AV2'}
+DESVIOS = {'AV1': 'DesvioAV1', 'AV2': 'DesvioAV2', 'MediaFinal': 'DesvioMediaFinal', 'Delta': 'DesvioDelta'}
+
+def aprovado(medias, nota_minima=NOTA_MINIMA):
+    """Máscara booleana dos aprovados: média final maior ou igual à nota mínima."""
+    return np.asarray(medias, dtype=np.float64) >= nota_minima
+
+def situacao(medias, nota_minima=NOTA_MINIMA):
+    """Situação ('Aprovado' ou 'Reprovado') de cada média final."""
+    return np.where(aprovado(medias, nota_minima), 'Aprovado', 'Reprovado')
+
+def codigos_grupo(serie):
+    """Código de grupo de cada linha e os valores distintos, na ordem do groupby(sort=True, observed=True).
+
+    Para colunas categóricas usa os próprios códigos da categoria, evitando o custo
+    do groupby; categorias sem linhas são descartadas.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, presentes = compactar(serie.cat.codes.to_numpy().astype(np.int64), len(serie.cat.categories))
+        return codigos, serie.cat.categories[presentes]
+    return pd.factorize(serie, sort=True)
+
+def compactar(codigos, n_grupos):
+    """Renumera códigos em 0..n-1 mantendo apenas os grupos com linhas; retorna também os códigos originais presentes."""
+    presentes = np.bincount(codigos, minlength=n_grupos) > 0
+    return (np.cumsum(presentes) - 1)[codigos], np.flatnonzero(presentes)
+
+def somas_por_grupo(codigos, n_grupos, valores, nota_minima=NOTA_MINIMA):
+    """Contagens, somas e somas de quadrados das notas de cada grupo, com bincount.
+
+    Como são aditivas, as somas de grupos menores (ex.: turmas) podem ser somadas
+    para obter as de grupos maiores (cursos, disciplinas) sem voltar às linhas.
+    """
+    notas = dict(valores, Delta=valores['AV2'] - valores['AV1'])
+    somas = {
+        'alunos': np.bincount(codigos, minlength=n_grupos).astype(np.float64),
+        'aprovados': np.bincount(codigos, weights=aprovado(valores['MediaFinal'], nota_minima), minlength=n_grupos),
+        'melhoraram': np.bincount(codigos, weights=notas['Delta'] > 0, minlength=n_grupos),
+    }
+    for nome, x in notas.items():
+        somas[f'soma_{nome}'] = np.bincount(codigos, weights=x, minlength=n_grupos)
+        somas[f'quadrados_{nome}'] = np.bincount(codigos, weights=x * x, minlength=n_grupos)
+    return somas
+
+def reagrupar(somas, mapa, n_grupos):
+    """Soma as somas de cada grupo no grupo maior indicado por `mapa` (um código por grupo)."""
+    return {nome: np.bincount(mapa, weights=valores, minlength=n_grupos) for nome, valores in somas.items()}
+
+def indicadores(somas, percentis):
+    """Converte as somas de somas_por_grupo em médias, desvios padrão (amostrais, como no pandas) e taxas."""
+    alunos = somas['alunos']
+    resultado = {
+        'Alunos': alunos.astype(np.int64),
+        'Aprovados': somas['aprovados'].astype(np.int64),
+        'Reprovados': (alunos - somas['aprovados']).astype(np.int64),
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado['TaxaAprovacao'] = np.where(alunos > 0, somas['aprovados'] / alunos, np.nan)
+        for nome in MEDIAS:
+            soma, quadrados = somas[f'soma_{nome}'], somas[f'quadrados_{nome}']
+            resultado[MEDIAS[nome]] = np.where(alunos > 0, soma / alunos, np.nan)
+            variancia = np.where(alunos > 1, (quadrados - soma * soma / alunos) / (alunos - 1), np.nan)
+            resultado[DESVIOS[nome]] = np.sqrt(np.clip(variancia, 0, None))
+        resultado['Melhoraram'] = np.where(alunos > 0, somas['melhoraram'] / alunos, np.nan)
+    resultado.update(percentis)
+    return resultado
+
+def percentis_por_grupo(codigos, n_grupos, notas, ordem_notas=None, percentis=PERCENTIS):
+    """Percentis das notas de cada grupo, com interpolação linear (como no pandas).
+
+    As notas são ordenadas dentro de cada grupo uma única vez. `ordem_notas` (o
+    argsort de `notas`) pode ser compartilhado entre vários agrupamentos: com ele,
+    basta uma ordenação estável pelo grupo, que para códigos de até 16 bits o NumPy
+    faz em tempo linear (radix sort). Notas sem NaN (a consolidação grava 0).
+    """
+    if ordem_notas is None:
+        ordem_notas = np.argsort(notas)
+    if n_grupos <= 1:
+        ordenadas = notas[ordem_notas]
+    elif n_grupos <= np.iinfo(np.uint16).max + 1:
+        ordenadas = notas[ordem_notas[np.argsort(codigos[ordem_notas].astype(np.uint16), kind='stable')]]
+    else:
+        # Muitos grupos: uma ordenação por uma chave que combina o grupo e a nota
+        minimo = notas.min()
+        ordenadas = notas[np.argsort(codigos * (notas.max() - minimo + 1) + (notas - minimo))]
+
+    alunos = np.bincount(codigos, minlength=n_grupos)
+    inicios = np.concatenate([[0], np.cumsum(alunos)[:-1]])
+    resultado = {}
+    for p in percentis:
+        posicao = inicios + (p / 100) * np.maximum(alunos - 1, 0)
+        if len(ordenadas):
+            abaixo = np.minimum(np.floor(posicao).astype(np.int64), len(ordenadas) - 1)
+            acima = np.minimum(np.ceil(posicao).astype(np.int64), len(ordenadas) - 1)
+            valor = ordenadas[abaixo] + (ordenadas[acima] - ordenadas[abaixo]) * (posicao - abaixo)
+        else:
+            valor = np.zeros(n_grupos)
+        resultado[f'P{p}'] = np.where(alunos > 0, valor, np.nan)
+    return resultado
+
+class AnaliseNotas:
+    """Indicadores de desempenho do relatório consolidado, por curso, disciplina, turma e aluno.
+
+    Para cada grupo: alunos, aprovados, reprovados e taxa de aprovação sob
+    `nota_minima`, médias e desvios padrão de AV1/AV2/MediaFinal, a evolução de AV1
+    para AV2 (média, desvio e fração dos que melhoraram) e percentis da média final.
+
+    As linhas são percorridas uma vez por turma (curso + disciplina) e uma vez por
+    aluno; cursos, disciplinas e o total geral são obtidos somando as turmas, como
+    no CuboAgregado. Só os percentis exigem ordenar as notas de cada nível. Cada
+    nível é calculado no primeiro acesso e guardado; o painel mantém o objeto por
+    versão dos dados, então os resultados ficam em cache até o relatório mudar.
+    """
+
+    def __init__(self, df, nota_minima=NOTA_MINIMA):
+        self.nota_minima = nota_minima
+        self.total_linhas = len(df)
+        self._df = df
+        self._valores = {col: df[col].to_numpy(dtype=np.float64) for col in COLUNAS_NOTAS}
+
+    @cached_property
+    def _ordem_notas(self):
+        # Uma única ordenação das médias finais, reaproveitada pelos percentis de todos os níveis
+        return np.argsort(self._valores['MediaFinal'])
+
+    def _percentis(self, codigos, n_grupos):
+        return percentis_por_grupo(codigos, n_grupos, self._valores['MediaFinal'], self._ordem_notas)
+
+    @cached_property
+    def _cursos(self):
+        return codigos_grupo(self._df['Curso'])
+
+    @cached_property
+    def _disciplinas(self):
+        return codigos_grupo(self._df['Disciplina'])
+
+    @cached_property
+    def _turmas(self):
+        """Código da turma de cada linha, índice (Curso, Disciplina) e, por turma, o código do curso e da disciplina."""
+        (codigos_curso, cursos), (codigos_disciplina, disciplinas) = self._cursos, self._disciplinas
+        codigos, pares = compactar(codigos_curso * len(disciplinas) + codigos_disciplina,
+                                   len(cursos) * len(disciplinas))
+        curso_da_turma, disciplina_da_turma = np.divmod(pares, max(len(disciplinas), 1))
+        indice = pd.MultiIndex.from_arrays([cursos[curso_da_turma], disciplinas[disciplina_da_turma]],
+                                           names=['Curso', 'Disciplina'])
+        return codigos, indice, curso_da_turma, disciplina_da_turma
+
+    @cached_property
+    def _somas_turmas(self):
+        codigos, indice, _, _ = self._turmas
+        return somas_por_grupo(codigos, len(indice), self._valores, self.nota_minima)
+
+    @cached_property
+    def por_turma(self):
+        """Indicadores por combinação de curso e disciplina (índice: Curso, Disciplina)."""
+        codigos, indice, _, _ = self._turmas
+        return pd.DataFrame(indicadores(self._somas_turmas, self._percentis(codigos, len(indice))), index=indice)
+
+    @cached_property
+    def por_curso(self):
+        """Indicadores por curso (índice: Curso)."""
+        codigos, cursos = self._cursos
+        somas = reagrupar(self._somas_turmas, self._turmas[2], len(cursos))
+        return pd.DataFrame(indicadores(somas, self._percentis(codigos, len(cursos))),
+                            index=pd.Index(cursos, name='Curso'))
+
+    @cached_property
+    def por_disciplina(self):
+        """Indicadores por disciplina, somando todos os cursos (índice: Disciplina)."""
+        codigos, disciplinas = self._disciplinas
+        somas = reagrupar(self._somas_turmas, self._turmas[3], len(disciplinas))
+        return pd.DataFrame(indicadores(somas, self._percentis(codigos, len(disciplinas))),
+                            index=pd.Index(disciplinas, name='Disciplina'))
+
+    @cached_property
+    def geral(self):
+        """Indicadores de todo o relatório (Series)."""
+        n_turmas = len(self._turmas[1])
+        somas = reagrupar(self._somas_turmas, np.zeros(n_turmas, dtype=np.int64), 1)
+        percentis = self._percentis(np.zeros(self.total_linhas, dtype=np.int64), 1)
+        return pd.Series({nome: valores[0] for nome, valores in indicadores(somas, percentis).items()})
+
+    @cached_property
+    def _alunos(self):
+        """Código do aluno de cada linha, as chaves (como no IndiceAlunos) e o nome de cada aluno."""
+        # Importado aqui porque alunos.py usa a regra de aprovação deste módulo
+        from alunos import chaves_alunos
+        codigos, chaves, _ = chaves_alunos(self._df)
+        if not self.total_linhas:
+            return codigos, chaves, np.array([], dtype=object)
+        # As chaves são numeradas na ordem em que aparecem: a primeira linha de cada
+        # aluno é onde o código passa do maior visto até então
+        primeira_linha = np.flatnonzero(np.concatenate([[True], codigos[1:] > np.maximum.accumulate(codigos)[:-1]]))
+        nomes = self._df['Aluno'].iloc[primeira_linha].astype(str).to_numpy(dtype=object)
+        return codigos, chaves, nomes
+
+    @cached_property
+    def por_aluno(self):
+        """Indicadores por aluno (índice: chave do aluno).
+
+        Disciplinas e Reprovacoes contam as disciplinas cursadas e reprovadas; as
+        médias e percentis são calculados sobre as disciplinas do aluno.
+        """
+        codigos, chaves, nomes = self._alunos
+        somas = somas_por_grupo(codigos, len(chaves), self._valores, self.nota_minima)
+        por_aluno = pd.DataFrame(indicadores(somas, self._percentis(codigos, len(chaves))),
+                                 index=pd.Index(chaves, name='Chave'))
+        por_aluno.insert(0, 'Aluno', nomes)
+        por_aluno = por_aluno.rename(columns={'Alunos': 'Disciplinas', 'Reprovados': 'Reprovacoes'})
+        return por_aluno.drop(columns=['Aprovados', 'TaxaAprovacao'])
+
+    def consultar(self, curso=None, disciplina=None):
+        """Indicadores de uma seleção (Series); None em uma posição significa todos. Retorna None se não houver dados."""
+        try:
+            if curso is None and disciplina is None:
+                return self.geral
+            if disciplina is None:
+                return self.por_curso.loc[curso]
+            if curso is None:
+                return self.por_disciplina.loc[disciplina]
+            return self.por_turma.loc[(curso, disciplina)]
+        except KeyError:
+            return None
+
+    def alunos_em_risco(self, min_reprovacoes=MIN_REPROVACOES_RISCO, curso=None):
+        """Alunos reprovados em `min_reprovacoes` disciplinas ou mais, dos mais aos menos reprovados.
+
+        Com `curso`, considera apenas as disciplinas daquele curso (também nas colunas
+        Disciplinas e MediaFinal). 'DisciplinasReprovadas' lista as disciplinas, com o
+        curso quando não há filtro, em que o aluno ficou abaixo da nota mínima.
+        """
+        colunas = ['Aluno', 'Reprovacoes', 'Disciplinas', 'MediaFinal', 'DisciplinasReprovadas']
+        if not self.total_linhas:
+            return pd.DataFrame(columns=colunas, index=pd.Index([], name='Chave'))
+        codigos, chaves, nomes = self._alunos
+        codigos_turma, turmas, _, _ = self._turmas
+
+        cursadas = np.ones(self.total_linhas, dtype=bool)
+        if curso is not None:
+            codigos_curso, cursos = self._cursos
+            posicao = cursos.get_indexer([curso])[0]
+            cursadas = codigos_curso == posicao if posicao >= 0 else np.zeros(self.total_linhas, dtype=bool)
+        reprovado = cursadas & ~aprovado(self._valores['MediaFinal'], self.nota_minima)
+        reprovacoes = np.bincount(codigos[reprovado], minlength=len(chaves))
+        em_risco = reprovacoes >= max(min_reprovacoes, 1)
+        alunos_risco = np.flatnonzero(em_risco)
+
+        # Linhas reprovadas dos alunos em risco, agrupadas por aluno e ordenadas por
+        # curso e disciplina; o texto de cada turma é montado uma única vez
+        linhas = np.flatnonzero(reprovado & em_risco[codigos])
+        linhas = linhas[np.argsort(codigos[linhas] * len(turmas) + codigos_turma[linhas])]
+        if curso is None:
+            rotulos = np.array([f'{disciplina} ({nome_curso})' for nome_curso, disciplina in turmas], dtype=object)
+        else:
+            rotulos = np.array([str(disciplina) for _, disciplina in turmas], dtype=object)
+        textos = rotulos[codigos_turma[linhas]].tolist()
+        limites = np.concatenate([[0], np.cumsum(reprovacoes[alunos_risco])])
+        listas = ['; '.join(textos[limites[i]:limites[i + 1]]) for i in range(len(alunos_risco))]
+
+        disciplinas = np.bincount(codigos[cursadas], minlength=len(chaves))[alunos_risco]
+        soma_medias = np.bincount(codigos[cursadas], weights=self._valores['MediaFinal'][cursadas],
+                                  minlength=len(chaves))[alunos_risco]
+        resultado = pd.DataFrame({
+            'Aluno': nomes[alunos_risco],
+            'Reprovacoes': reprovacoes[alunos_risco],
+            'Disciplinas': disciplinas,
+            'MediaFinal': soma_medias / np.maximum(disciplinas, 1),
+            'DisciplinasReprovadas': listas,
+        }, index=pd.Index(chaves[alunos_risco], name='Chave'))
+        return resultado.sort_values(['Reprovacoes', 'MediaFinal'], ascending=[False, True])
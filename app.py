@@ -1,7 +1,14 @@
 import streamlit as st
 import pandas as pd
 import os
-import subprocess
+import threading
+import perfil
+from relatorio import consolidar
+from dados import carregar_dados, versao_dados
+from agregados import CuboAgregado, TODOS, histograma_df
+from alunos import IndiceAlunos, resumo_historico
+from analise import AnaliseNotas, NOTA_MINIMA, MIN_REPROVACOES_RISCO, PERCENTIS
+from exportacao import FORMATOS, ordem_linhas, total_paginas, pagina, conteudo_exportacao
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -11,89 +18,234 @@ st.set_page_config(
 )
 
 # --- Carregamento dos Dados ---
-@st.cache_data
-def load_data():
-    """Carrega os dados do arquivo CSV consolidado."""
-    csv_path = os.path.join('output', 'relatorio_consolidado.csv')
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        return None
+# Os dados e os agregados ficam em cache_resource (sem cópia a cada rerun) e são
+# indexados pela versão do arquivo, então só são recalculados quando o relatório muda.
+@st.cache_resource(max_entries=2)
+def load_data(versao):
+    """Carrega o relatório consolidado (Parquet, ou o CSV de versões anteriores)."""
+    return carregar_dados()
 
-df = load_data()
+@st.cache_resource(max_entries=2)
+def load_cubo(versao, _df):
+    """Pré-calcula as métricas e os índices de filtro para uma versão dos dados."""
+    return CuboAgregado(_df)
+
+@st.cache_resource(max_entries=2)
+def load_indice_alunos(versao, _df):
+    """Monta o índice de alunos (busca por nome e histórico) para uma versão dos dados."""
+    return IndiceAlunos(_df)
+
+@st.cache_resource(max_entries=2)
+def load_analise(versao, _df, nota_minima):
+    """Indicadores de desempenho (desvios, percentis, evolução, alunos em risco) para uma versão dos dados."""
+    return AnaliseNotas(_df, nota_minima)
+
+versao = versao_dados()
+df = load_data(versao)
+
+# --- Atualização em Segundo Plano ---
+class EstadoAtualizacao:
+    """Estado da atualização dos dados, compartilhado por todas as sessões do painel.
+
+    A trava garante que apenas uma consolidação rode por vez, mesmo com vários
+    usuários clicando em "Atualizar Dados".
+    """
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.em_andamento = False
+        self.concluidos = 0
+        self.total = 0
+        self.arquivo_atual = ''
+        self.resultado = None
+        self.erro = None
+
+    def iniciar(self):
+        """Inicia a consolidação em uma thread; retorna False se já houver uma em andamento."""
+        if not self.trava.acquire(blocking=False):
+            return False
+        self.em_andamento = True
+        self.concluidos = 0
+        self.total = 0
+        self.arquivo_atual = ''
+        self.resultado = None
+        self.erro = None
+        threading.Thread(target=self._executar, daemon=True).start()
+        return True
+
+    def _progresso(self, concluidos, total, file_name):
+        self.concluidos = concluidos
+        self.total = total
+        self.arquivo_atual = file_name
+
+    def _executar(self):
+        try:
+            self.resultado = consolidar(workers=os.cpu_count() or 1, progresso=self._progresso)
+        except Exception as e:
+            self.erro = str(e)
+        finally:
+            self.em_andamento = False
+            self.trava.release()
+
+@st.cache_resource
+def estado_atualizacao():
+    return EstadoAtualizacao()
+
+@st.fragment(run_every=2)
+def verificar_nova_versao():
+    """Recarrega o painel quando um novo relatório é publicado.
+
+    O relatório pode ser regravado pelo botão de atualização, pelo modo
+    `relatorio.py --watch` ou por uma execução manual. Como a troca é atômica,
+    basta comparar a versão: quando ela muda, descarta apenas as entradas de cache
+    da versão exibida e recarrega a página.
+    """
+    if versao_dados() != versao:
+        if versao is not None:
+            load_data.clear(versao)
+            load_cubo.clear(versao, None)
+            load_indice_alunos.clear(versao, None)
+            # Há uma análise por nota mínima já escolhida; descarta todas
+            load_analise.clear()
+            for chave in st.session_state.pop('ordens_usadas', set()):
+                load_ordem.clear(versao, *chave, None)
+        st.rerun(scope="app")
+
+@st.fragment(run_every=1)
+def progresso_atualizacao():
+    """Mostra o andamento e o resultado da atualização iniciada pelo painel."""
+    estado = estado_atualizacao()
+    if estado.em_andamento:
+        if estado.total:
+            st.progress(estado.concluidos / estado.total,
+                        text=f"Processando planilhas: {estado.concluidos}/{estado.total} ({estado.arquivo_atual})")
+        else:
+            st.progress(0.0, text="Verificando planilhas alteradas...")
+        return
+
+    if estado.erro:
+        st.error(f"Erro ao atualizar os dados: {estado.erro}")
+    elif estado.resultado is not None:
+        resultado = estado.resultado
+        st.success(f"Dados atualizados: {resultado['registros']} registros de {resultado['arquivos']} arquivo(s) "
+                   f"({resultado['reaproveitados']} reaproveitado(s) do cache).")
+        if resultado['erros']:
+            st.warning("Arquivos com erro: " + ", ".join(resultado['erros']))
+
+def secao_atualizacao():
+    """Seção da aba Manutenção com o botão de atualização dos dados."""
+    st.subheader("Atualizar Dados")
+    st.info("Clique no botão abaixo para consolidar novamente as planilhas de `inputs_ods`. "
+            "Apenas os arquivos novos ou alterados são lidos, e o painel continua disponível durante a atualização.")
+
+    estado = estado_atualizacao()
+    if st.button("Atualizar Dados", disabled=estado.em_andamento):
+        if not estado.iniciar():
+            st.warning("Já existe uma atualização em andamento. Aguarde a conclusão.")
+    progresso_atualizacao()
+
+    exibir_perfil()
+
+def exibir_perfil():
+    """Mostra o perfil de tempo e memória da última consolidação instrumentada."""
+    ultimo = perfil.carregar_ultimo(os.path.join('output', 'perfil'))
+    with st.expander("Perfil da última consolidação"):
+        if ultimo is None:
+            st.caption("Nenhum perfil gravado. Execute `python relatorio.py --perfil` "
+                       "ou defina RELATORIO_PERFIL=1 antes de iniciar o painel.")
+            return
+        resumo = ultimo['resumo']
+        st.caption(f"Gerado em {ultimo['gerado_em']} · {resumo['arquivos']} arquivo(s) processado(s)")
+        if resumo['pico_rss_kb'] is not None:
+            st.metric("Maior pico de memória de um processo", f"{resumo['pico_rss_kb'] / 1024:.1f} MB")
+        st.subheader("Tempo por etapa")
+        st.dataframe(pd.DataFrame(resumo['etapas']), hide_index=True)
+        if resumo['mais_lentos']:
+            st.subheader("Arquivos mais lentos")
+            st.dataframe(pd.DataFrame(resumo['mais_lentos']), hide_index=True)
 
 # --- Funções de Apoio ---
-@st.cache_data
-def convert_df(df_to_convert):
-    """Converte um DataFrame para CSV em memória, pronto para download."""
-    return df_to_convert.to_csv(index=False).encode('utf-8')
+SEM_ORDEM = '(ordem original)'
+
+@st.cache_resource(max_entries=4)
+def load_ordem(versao, curso, disciplina, coluna, decrescente, _df_filtrado):
+    """Ordem das linhas da seleção por uma coluna, calculada uma vez e reaproveitada ao trocar de página."""
+    return ordem_linhas(_df_filtrado, coluna, decrescente)
 
 # --- Título Principal ---
 st.title("📊 Painel de Análise de Notas")
+verificar_nova_versao()
 
 # --- Lógica da Aplicação ---
 if df is not None:
     # --- Barra Lateral com Filtros ---
     st.sidebar.header("Filtros")
     
+    cubo = load_cubo(versao, df)
+
     # Filtro por curso
-    cursos = ['Todos'] + sorted(df['Curso'].unique().tolist())
+    cursos = [TODOS] + cubo.cursos
     curso_selecionado = st.sidebar.selectbox("Selecione o Curso:", cursos)
 
     # Filtro por disciplina (condicionado ao curso)
-    if curso_selecionado == 'Todos':
-        disciplinas = ['Todos'] + sorted(df['Disciplina'].unique().tolist())
-    else:
-        disciplinas = ['Todos'] + sorted(df[df['Curso'] == curso_selecionado]['Disciplina'].unique().tolist())
-    
+    disciplinas = [TODOS] + cubo.disciplinas(curso_selecionado)
     disciplina_selecionada = st.sidebar.selectbox("Selecione a Disciplina:", disciplinas)
 
-    # Filtra o DataFrame com base na seleção
-    if curso_selecionado == 'Todos':
-        df_filtrado = df
-    else:
-        df_filtrado = df[df['Curso'] == curso_selecionado]
+    # Regra de aprovação usada nas métricas, nos indicadores e na lista de alunos em risco
+    nota_minima = st.sidebar.number_input("Nota mínima para aprovação:", min_value=0.0, max_value=10.0,
+                                          value=NOTA_MINIMA, step=0.5, key="nota_minima")
 
-    if disciplina_selecionada != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['Disciplina'] == disciplina_selecionada]
+    # Métricas pré-calculadas e linhas da seleção, obtidas pelos índices do cubo
+    metricas = cubo.consultar(curso_selecionado, disciplina_selecionada)
+    df_filtrado = cubo.filtrar(df, curso_selecionado, disciplina_selecionada)
+
+    # Indicadores da seleção sob a nota mínima escolhida (TODOS corresponde a None)
+    analise = load_analise(versao, df, nota_minima)
+    curso_analise = None if curso_selecionado == TODOS else curso_selecionado
+    indicadores = analise.consultar(curso_analise, None if disciplina_selecionada == TODOS else disciplina_selecionada)
 
     # --- Abas ---
-    tab1, tab2, tab3 = st.tabs(["Análise Geral", "Dados Detalhados", "Manutenção"])
+    tab1, tab2, tab_aluno, tab_risco, tab3 = st.tabs(
+        ["Análise Geral", "Dados Detalhados", "Consulta por Aluno", "Alunos em Risco", "Manutenção"])
 
     with tab1:
         st.header(f"Exibindo Dados para: {curso_selecionado} - {disciplina_selecionada}")
 
         # Métricas
         col1, col2, col3 = st.columns(3)
-        if not df_filtrado.empty:
-            media_geral = df_filtrado['MediaFinal'].mean()
-            num_alunos = len(df_filtrado)
-            aprovados = len(df_filtrado[df_filtrado['MediaFinal'] >= 6.0]) # Exemplo: Média de aprovação 7.0
-            reprovados = num_alunos - aprovados
-        else:
-            media_geral = 0
-            num_alunos = 0
-            aprovados = 0
-            reprovados = 0
+        media_geral = metricas['medias']['MediaFinal']
+        num_alunos = metricas['alunos']
+        aprovados = int(indicadores['Aprovados']) if indicadores is not None else 0
+        reprovados = int(indicadores['Reprovados']) if indicadores is not None else 0
 
         col1.metric("Média Geral da Turma", f"{media_geral:.2f}")
         col2.metric("Número de Alunos", num_alunos)
-        col3.metric("Alunos Aprovados (Média >= 6)", aprovados)
+        col3.metric(f"Alunos Aprovados (Média >= {nota_minima:g})", aprovados)
+
+        if num_alunos:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Taxa de Aprovação", f"{indicadores['TaxaAprovacao']:.1%}")
+            col2.metric("Desvio Padrão da Média Final", f"{indicadores['DesvioMediaFinal']:.2f}")
+            col3.metric("Evolução Média AV1 → AV2", f"{indicadores['DeltaAV1AV2']:+.2f}")
+            col4.metric("Melhoraram da AV1 para a AV2", f"{indicadores['Melhoraram']:.1%}")
+
+            st.subheader("Percentis da Média Final")
+            st.dataframe(pd.DataFrame([[indicadores[f'P{p}'] for p in PERCENTIS]],
+                                      columns=[f'P{p}' for p in PERCENTIS]).round(2), hide_index=True)
 
         st.markdown("---")
 
         # Gráfico de comparação de médias
-        if not df_filtrado.empty:
+        if num_alunos:
             st.subheader("Comparativo das Médias (AV1, AV2, Média Final)")
-            media_av1 = df_filtrado['AV1'].mean()
-            media_av2 = df_filtrado['AV2'].mean()
-            media_final = df_filtrado['MediaFinal'].mean()
-
             df_medias = pd.DataFrame({
                 'Avaliação': ['AV1', 'AV2', 'Média Final'],
-                'Média': [media_av1, media_av2, media_final]
+                'Média': [metricas['medias']['AV1'], metricas['medias']['AV2'], metricas['medias']['MediaFinal']]
             })
             st.bar_chart(df_medias.set_index('Avaliação'))
+
+            st.subheader("Distribuição das Médias Finais")
+            st.bar_chart(histograma_df(metricas))
         
         st.markdown("---")
         
@@ -105,7 +257,7 @@ if df is not None:
         
         # Resumo de aprovados e reprovados
         st.subheader("Resumo de Aprovação")
-        if not df_filtrado.empty:
+        if num_alunos:
             df_situacao = pd.DataFrame({
                 'Situação': ['Aprovados', 'Reprovados'],
                 'Quantidade': [aprovados, reprovados]
@@ -114,39 +266,88 @@ if df is not None:
 
     with tab2:
         st.header("Dados Detalhados dos Alunos")
-        st.dataframe(df_filtrado)
 
-        # Botão de download
-        @st.cache_data
-        def convert_df(df):
-            return df.to_csv(index=False).encode('utf-8')
+        # Seleção de colunas, ordenação e paginação feitas no servidor: só a página atual é enviada ao navegador
+        todas_colunas = list(df_filtrado.columns)
+        colunas = st.multiselect("Colunas:", todas_colunas, default=todas_colunas)
+        col1, col2, col3 = st.columns(3)
+        coluna_ordem = col1.selectbox("Ordenar por:", [SEM_ORDEM] + todas_colunas)
+        decrescente = col2.checkbox("Ordem decrescente", disabled=coluna_ordem == SEM_ORDEM)
+        linhas_por_pagina = col3.selectbox("Linhas por página:", [50, 100, 500, 1000], index=1)
+
+        ordem = None
+        if coluna_ordem != SEM_ORDEM:
+            chave_ordem = (curso_selecionado, disciplina_selecionada, coluna_ordem, decrescente)
+            ordem = load_ordem(versao, *chave_ordem, df_filtrado)
+            # Guarda as ordenações usadas nesta sessão, para descartar só as da versão antiga (verificar_nova_versao)
+            st.session_state.setdefault('ordens_usadas', set()).add(chave_ordem)
+        paginas = total_paginas(len(df_filtrado), linhas_por_pagina)
+        numero_pagina = st.number_input(f"Página (de {paginas}):", min_value=1, max_value=paginas, value=1, step=1)
+
+        if not colunas:
+            st.info("Selecione ao menos uma coluna.")
+        else:
+            st.dataframe(pagina(df_filtrado, numero_pagina, linhas_por_pagina, colunas, ordem), hide_index=True)
+            inicio = (numero_pagina - 1) * linhas_por_pagina
+            st.caption(f"Linhas {min(inicio + 1, len(df_filtrado))}–{min(inicio + linhas_por_pagina, len(df_filtrado))} "
+                       f"de {len(df_filtrado)}")
+
+            # Exportação da seleção inteira, nas colunas e na ordem escolhidas. O arquivo só é
+            # gerado quando o botão é clicado (em segundo plano), e em blocos
+            col1, col2 = st.columns([1, 3])
+            formato = col1.selectbox("Formato:", list(FORMATOS),
+                                     help="O XLSX é bem mais lento de gerar; para seleções grandes, prefira CSV ou Parquet.")
+            extensao, mime = FORMATOS[formato]
+            col2.download_button(
+                label=f"Baixar dados em {formato}",
+                data=lambda: conteudo_exportacao(df_filtrado, formato, colunas, ordem),
+                file_name='dados_filtrados' + extensao,
+                mime=mime,
+            )
 
-        csv = convert_df(df_filtrado)
+    with tab_aluno:
+        st.header("Histórico do Aluno")
+        st.caption("Notas do aluno em todos os cursos e disciplinas, independentemente dos filtros da barra lateral.")
+        indice_alunos = load_indice_alunos(versao, df)
 
-        st.download_button(
-            label="Baixar dados em CSV",
-            data=csv,
-            file_name='dados_filtrados.csv',
-            mime='text/csv',
-        )
+        busca = st.text_input("Buscar aluno pelo nome:", placeholder="Ex.: maria silva")
+        if busca:
+            chaves_alunos = indice_alunos.buscar(busca)
+            if not chaves_alunos:
+                st.info("Nenhum aluno encontrado.")
+            else:
+                chave_aluno = st.selectbox("Aluno:", chaves_alunos, format_func=indice_alunos.rotulo, key="aluno")
+                historico = indice_alunos.historico(chave_aluno)
+                resumo = resumo_historico(historico)
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Disciplinas", resumo['disciplinas'])
+                col2.metric("Aprovado em", resumo['aprovadas'])
+                col3.metric("Reprovado em", resumo['reprovadas'])
+                col4.metric("Média Geral", f"{resumo['media_geral']:.2f}")
+                st.dataframe(historico, hide_index=True)
+
+    with tab_risco:
+        st.header("Alunos em Risco")
+        st.caption(f"Alunos com média final abaixo de {nota_minima:g} em várias disciplinas. "
+                   "Respeita o filtro de curso da barra lateral.")
+        min_reprovacoes = st.number_input("Reprovado em pelo menos:", min_value=1,
+                                          value=MIN_REPROVACOES_RISCO, step=1)
+        em_risco = analise.alunos_em_risco(min_reprovacoes, curso_analise)
+        st.metric("Alunos em risco", len(em_risco))
+        st.dataframe(em_risco.round({'MediaFinal': 2}), hide_index=True)
+
+        st.subheader("Indicadores por Disciplina")
+        por_turma = analise.por_turma
+        if curso_analise is not None:
+            por_turma = por_turma.xs(curso_analise, level='Curso', drop_level=False)
+        st.dataframe(por_turma.round(2))
 
     with tab3:
         st.header("Manutenção")
-        st.subheader("Atualizar Dados")
-        st.info("Clique no botão abaixo para executar o script `relatorio.py` e atualizar os dados do relatório.")
-        
-        if st.button("Atualizar Dados"):
-            with st.spinner("Executando o script `relatorio.py`..."):
-                try:
-                    subprocess.run(["python", "relatorio.py"], check=True)
-                    st.success("Script executado com sucesso! Os dados foram atualizados.")
-                    # Limpa o cache para recarregar os dados
-                    st.cache_data.clear()
-                except subprocess.CalledProcessError as e:
-                    st.error(f"Erro ao executar o script: {e}")
-                except FileNotFoundError:
-                    st.error("Script `relatorio.py` não encontrado.")
+        secao_atualizacao()
 
 else:
-    st.error("Arquivo 'relatorio_consolidado.csv' não encontrado!")
-    st.info("Por favor, execute o script 'relatorio.py' primeiro para gerar o arquivo de dados.")
\ No newline at end of file
+    st.error("Relatório consolidado não encontrado na pasta 'output'!")
+    st.info("Por favor, execute o script 'relatorio.py' primeiro para gerar o arquivo de dados, ou use o botão abaixo.")
+    secao_atualizacao()
@@ -0,0 +1,72 @@
+"""Mede o tempo dos indicadores de desempenho (analise.AnaliseNotas) em um relatório sintético.
+
+Uso:
+    python benchmarks/bench_analise.py --linhas 1000000 --repeticoes 3
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analise import AnaliseNotas
+
+
+def gerar_relatorio(linhas, cursos=20, disciplinas=40, alunos=50000, seed=42):
+    """Cria um DataFrame sintético no formato do relatório consolidado (colunas de dados.SCHEMA)."""
+    rng = np.random.default_rng(seed)
+    aluno = rng.integers(0, alunos, linhas)
+    nomes = np.array([f'Aluno {i:06d}' for i in range(alunos)], dtype=object)
+    identificadores = pd.array([f'aluno{i:06d}@escola.br' for i in range(alunos)], dtype='string')
+    df = pd.DataFrame({
+        'Curso': pd.Categorical.from_codes(rng.integers(0, cursos, linhas), [f'Curso {i:02d}' for i in range(cursos)]),
+        'Disciplina': pd.Categorical.from_codes(rng.integers(0, disciplinas, linhas),
+                                                [f'Disciplina {i:02d}' for i in range(disciplinas)]),
+        'Aluno': nomes[aluno],
+        'AV1': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+        'AV2': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+        'MediaFinal': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+    })
+    # Um quarto das linhas sem identificador, como nas planilhas sem a coluna de e-mail
+    ids = identificadores[aluno]
+    ids[rng.random(linhas) < 0.25] = pd.NA
+    df['Identificador'] = ids
+    return df
+
+
+def medir(df):
+    """Tempo de cada nível em um objeto novo (sem cache)."""
+    analise = AnaliseNotas(df)
+    tempos = {}
+    for nivel in ('geral', 'por_curso', 'por_disciplina', 'por_turma', 'por_aluno'):
+        inicio = time.perf_counter()
+        getattr(analise, nivel)
+        tempos[nivel] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    em_risco = analise.alunos_em_risco()
+    tempos['alunos_em_risco'] = time.perf_counter() - inicio
+    return tempos, len(em_risco)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos indicadores de desempenho.")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    df = gerar_relatorio(args.linhas)
+    execucoes = [medir(df) for _ in range(args.repeticoes)]
+    melhores = {nivel: min(tempos[nivel] for tempos, _ in execucoes) for nivel in execucoes[0][0]}
+
+    print(f"Linhas: {args.linhas:,}")
+    for nivel, segundos in melhores.items():
+        print(f"{nivel:<16} {segundos * 1000:8.1f} ms")
+    print(f"{'total':<16} {sum(melhores.values()) * 1000:8.1f} ms")
+    print(f"Alunos em risco: {execucoes[0][1]:,}")
+
+
+if __name__ == '__main__':
+    main()
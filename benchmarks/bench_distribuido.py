@@ -0,0 +1,94 @@
+"""Testa e mede a consolidação distribuída (distribuido.py) com vários trabalhadores locais.
+
+Gera planilhas sintéticas em uma pasta temporária, consolida-as da forma normal
+(serial, como referência) e depois pela fila: cria os lotes, simula um trabalhador
+que reivindicou o primeiro lote e morreu (o lote só volta para a fila quando o prazo
+vence), inicia os trabalhadores como processos separados (`relatorio.py work`) e
+junta os parciais (`relatorio.py merge`). Termina com erro se o relatório juntado
+for diferente do de referência.
+
+Uso:
+    python benchmarks/bench_distribuido.py --arquivos 200 --trabalhadores 4 --arquivos-por-lote 20
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gerar_planilhas
+import relatorio
+from distribuido import FilaLotes
+
+
+def executar_relatorio(pasta, *argumentos):
+    """Executa `relatorio.py` em um processo separado, com `pasta` como diretório de trabalho."""
+    return subprocess.Popen([sys.executable, os.path.join(RAIZ, 'relatorio.py'), *argumentos], cwd=pasta,
+                            stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste e benchmark da consolidação distribuída.")
+    parser.add_argument('--arquivos', type=int, default=200)
+    parser.add_argument('--alunos', type=int, default=40, help="Alunos por planilha.")
+    parser.add_argument('--trabalhadores', type=int, default=4, help="Processos trabalhadores (`relatorio.py work`).")
+    parser.add_argument('--arquivos-por-lote', type=int, default=20)
+    parser.add_argument('--prazo', type=float, default=3.0, help="Prazo dos lotes, em segundos.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        shutil.copy(os.path.join(RAIZ, 'projeto.md'), pasta)
+        gerar_planilhas.gerar(os.path.join(pasta, 'inputs_ods'), args.arquivos, args.alunos, 30)
+        cwd = os.getcwd()
+        os.chdir(pasta)
+        try:
+            inicio = time.perf_counter()
+            with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+                relatorio.consolidar(workers=1, usar_cache=False)
+            serial = time.perf_counter() - inicio
+        finally:
+            os.chdir(cwd)
+
+        pasta_fila = os.path.join(pasta, 'fila')
+        inicio = time.perf_counter()
+        executar_relatorio(pasta, 'shard', '--fila', pasta_fila,
+                           '--arquivos-por-lote', str(args.arquivos_por_lote)).wait()
+        # Trabalhador que morreu logo depois de reivindicar o primeiro lote
+        FilaLotes(pasta_fila).reivindicar('trabalhador-morto', prazo=args.prazo)
+        trabalhadores = [executar_relatorio(pasta, 'work', '--fila', pasta_fila, '--workers', '1',
+                                            '--prazo', str(args.prazo))
+                         for _ in range(args.trabalhadores)]
+        codigos = [trabalhador.wait() for trabalhador in trabalhadores]
+        distribuido = time.perf_counter() - inicio
+        saida = os.path.join(pasta, 'output_distribuido')
+        executar_relatorio(pasta, 'merge', '--fila', pasta_fila, '--saida', saida).wait()
+        total = time.perf_counter() - inicio
+
+        lotes = FilaLotes(pasta_fila).lotes()
+        referencia = pd.read_parquet(os.path.join(pasta, 'output', 'relatorio_consolidado.parquet'))
+        juntado = pd.read_parquet(os.path.join(saida, 'relatorio_consolidado.parquet'))
+        iguais = referencia.astype({'Curso': str, 'Disciplina': str}).equals(
+            juntado.astype({'Curso': str, 'Disciplina': str}))
+
+    print(f"Planilhas: {args.arquivos} em {len(lotes)} lote(s) de até {args.arquivos_por_lote}")
+    print(f"Consolidação serial:          {serial:8.2f} s")
+    print(f"{args.trabalhadores} trabalhadores (até o fim):  {distribuido:8.2f} s  (inclui esperar o prazo de {args.prazo:g} s)")
+    print(f"Com a junção:                 {total:8.2f} s")
+    print(f"Lote reivindicado pelo trabalhador morto: tentativas = {lotes[0]['tentativas']}, "
+          f"concluído por {lotes[0]['trabalhador']}")
+    print(f"Lotes por trabalhador: {pd.Series([lote['trabalhador'] for lote in lotes]).value_counts().to_dict()}")
+    print(f"Relatório igual ao da consolidação serial: {'sim' if iguais else 'NÃO'}")
+    if not iguais or any(codigos) or any(lote['estado'] != 'concluido' for lote in lotes):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
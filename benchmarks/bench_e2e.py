@@ -0,0 +1,165 @@
+"""Benchmark ponta a ponta: consolidação, PDFs, gráficos e agregação do painel.
+
+Para cada tamanho pedido, gera planilhas sintéticas (ver gerar_planilhas.py) em
+uma pasta temporária e mede:
+- consolidação completa (sem cache) e repetida (com cache)
+- geração em lote de todos os PDFs
+- geração de uma amostra de gráficos PNG (o tempo é reportado por gráfico)
+- construção do cubo de agregados do painel e tempo médio de uma consulta
+
+Os resultados são gravados em JSON, junto com o commit atual, para comparação
+entre versões com --comparar.
+
+Uso:
+    python benchmarks/bench_e2e.py --tamanhos 10 100 1000 --saida bench_e2e.json
+    python benchmarks/bench_e2e.py --tamanhos 10 100 --comparar bench_e2e_anterior.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gerar_planilhas
+import relatorio
+import relatorio_pdf
+import relatorio_png
+from dados import carregar_dados
+from agregados import CuboAgregado, TODOS
+
+# Métricas comparadas com --comparar (todas em segundos; menor é melhor)
+METRICAS = ['consolidacao_s', 'consolidacao_cache_s', 'pdf_s', 'png_por_grafico_s', 'cubo_s', 'consulta_cubo_s']
+
+
+def cronometrar(funcao, *args, **kwargs):
+    """Executa a função com a saída padrão suprimida e retorna (resultado, segundos)."""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        return resultado, time.perf_counter() - inicio
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_tamanho(arquivos, args):
+    with tempfile.TemporaryDirectory() as pasta:
+        shutil.copy(os.path.join(RAIZ, 'projeto.md'), pasta)
+        gerar_planilhas.gerar(os.path.join(pasta, 'inputs_ods'), arquivos, args.alunos, args.colunas_extras)
+
+        cwd = os.getcwd()
+        os.chdir(pasta)
+        try:
+            resultado, consolidacao = cronometrar(relatorio.consolidar, workers=args.workers, usar_cache=False)
+            _, consolidacao_cache = cronometrar(relatorio.consolidar, workers=args.workers)
+
+            pdfs, pdf = cronometrar(relatorio_pdf.gerar_lote, workers=args.workers, forcar=True)
+
+            df = carregar_dados()
+            # Amostra de gráficos: o PNG a 300 dpi domina o tempo, então não é preciso gerar todos
+            tarefas = [
+                (grupo[['Aluno', 'MediaFinal']].set_axis(['aluno', 'media_final'], axis=1), curso, disciplina)
+                for (curso, disciplina), grupo in df.groupby(['Curso', 'Disciplina'], observed=True)
+            ][:args.graficos]
+            _, png = cronometrar(relatorio_png._gerar_graficos, tarefas)
+
+            cubo, tempo_cubo = cronometrar(CuboAgregado, df)
+            chaves = [(curso, TODOS) for curso in cubo.cursos] + [(TODOS, TODOS)]
+            inicio = time.perf_counter()
+            for curso, disciplina in chaves:
+                cubo.consultar(curso, disciplina)
+                cubo.filtrar(df, curso, disciplina)
+            consulta = (time.perf_counter() - inicio) / len(chaves)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        'arquivos': arquivos,
+        'linhas': resultado['registros'],
+        'consolidacao_s': round(consolidacao, 4),
+        'consolidacao_cache_s': round(consolidacao_cache, 4),
+        'pdfs': len(pdfs),
+        'pdf_s': round(pdf, 4),
+        'graficos': len(tarefas),
+        'png_por_grafico_s': round(png / max(len(tarefas), 1), 4),
+        'cubo_s': round(tempo_cubo, 4),
+        'consulta_cubo_s': round(consulta, 6),
+    }
+
+
+def comparar(atual, anterior_path, tolerancia):
+    """Imprime a variação de cada métrica em relação a um resultado anterior e retorna as regressões."""
+    with open(anterior_path, 'r', encoding='utf-8') as f:
+        anterior = {r['arquivos']: r for r in json.load(f)['resultados']}
+    regressoes = []
+    print(f"\nComparação com {anterior_path}:")
+    for resultado in atual:
+        base = anterior.get(resultado['arquivos'])
+        if base is None:
+            continue
+        for metrica in METRICAS:
+            if not base.get(metrica):
+                continue
+            razao = resultado[metrica] / base[metrica]
+            marca = ' <-- regressão' if razao > 1 + tolerancia else ''
+            print(f"{resultado['arquivos']:>6} arquivos  {metrica:22s} {base[metrica]:>10.4f} -> {resultado[metrica]:>10.4f} ({razao:5.2f}x){marca}")
+            if marca:
+                regressoes.append((resultado['arquivos'], metrica, razao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do gerador de relatórios.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10, 100, 1000],
+                        help="Quantidades de planilhas a testar (ex.: 10 100 1000 10000).")
+    parser.add_argument('--alunos', type=int, default=40)
+    parser.add_argument('--colunas-extras', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--graficos', type=int, default=5, help="Quantidade de gráficos PNG na amostra.")
+    parser.add_argument('--saida', default='bench_e2e.json')
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação.")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Aumento relativo aceito antes de acusar regressão (padrão: 0.2 = 20%%).")
+    args = parser.parse_args()
+
+    resultados = []
+    for arquivos in args.tamanhos:
+        print(f"Medindo com {arquivos} planilha(s)...")
+        resultado = medir_tamanho(arquivos, args)
+        resultados.append(resultado)
+        print(json.dumps(resultado, ensure_ascii=False))
+
+    saida = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'parametros': {'alunos': args.alunos, 'colunas_extras': args.colunas_extras,
+                       'workers': args.workers, 'graficos': args.graficos},
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(saida, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar and comparar(resultados, args.comparar, args.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
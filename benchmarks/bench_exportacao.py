@@ -0,0 +1,80 @@
+"""Mede a tabela paginada e a exportação da aba "Dados Detalhados" em um relatório sintético.
+
+Para a tabela, o tempo de ordenar a seleção (feito uma vez por coluna) e o de montar
+uma página. Para cada formato, o tempo de exportação, o tamanho do arquivo e quanto o
+pico de memória subiu durante a exportação (cada formato roda em um processo
+separado), que não deve crescer com o número de linhas porque a serialização é
+feita em blocos.
+
+Uso:
+    python benchmarks/bench_exportacao.py --linhas 1000000 --formatos CSV Parquet
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analise import gerar_relatorio
+from bench_livro import pico_memoria_mb
+import exportacao
+
+
+def medir_tabela(df, linhas_por_pagina=100):
+    """Tempo de ordenar o relatório por MediaFinal e de montar a última página."""
+    inicio = time.perf_counter()
+    ordem = exportacao.ordem_linhas(df, 'MediaFinal', decrescente=True)
+    ordenar = time.perf_counter() - inicio
+    ultima = exportacao.total_paginas(len(df), linhas_por_pagina)
+    inicio = time.perf_counter()
+    exportacao.pagina(df, ultima, linhas_por_pagina, ['Aluno', 'MediaFinal'], ordem)
+    return ordenar, time.perf_counter() - inicio
+
+
+def medir_exportacao(linhas, formato):
+    """Exporta o relatório sintético e retorna as métricas (executado no processo filho)."""
+    df = gerar_relatorio(linhas)
+    pico_dados_mb = pico_memoria_mb()
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'dados' + exportacao.FORMATOS[formato][0])
+        inicio = time.perf_counter()
+        exportacao.exportar(df, caminho, formato)
+        segundos = time.perf_counter() - inicio
+        tamanho = os.path.getsize(caminho)
+    return {'segundos': segundos, 'tamanho_mb': tamanho / 1e6, 'acrescimo_mb': pico_memoria_mb() - pico_dados_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da tabela paginada e da exportação.")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--formatos', nargs='+', default=['CSV', 'Parquet'], choices=list(exportacao.FORMATOS),
+                        help="XLSX é bem mais lento (openpyxl); use --linhas menor para medi-lo.")
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(medir_exportacao(args.linhas, args.formatos[0])))
+        return
+
+    df = gerar_relatorio(args.linhas)
+    ordenar, pagina = medir_tabela(df)
+    print(f"Linhas: {args.linhas:,}")
+    print(f"Ordenar por MediaFinal: {ordenar * 1000:8.1f} ms (uma vez por coluna)")
+    print(f"Montar uma página:      {pagina * 1000:8.1f} ms")
+    print(f"{'Formato':<8} {'Tempo (s)':>10} {'Linhas/s':>12} {'Arquivo (MB)':>13} {'Pela exportação (MB)':>21}")
+    for formato in args.formatos:
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--interno', '--linhas', str(args.linhas), '--formatos', formato],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(saida.strip().splitlines()[-1])
+        print(f"{formato:<8} {r['segundos']:>10.2f} {args.linhas / r['segundos']:>12,.0f} {r['tamanho_mb']:>13.1f} "
+              f"{r['acrescimo_mb']:>21.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Mede a geração do livro de notas em PDF (páginas por segundo) e o pico de memória.
+
+Cada tamanho roda em um processo separado, para que o pico de memória de um não
+contamine o do outro. A última coluna mostra quanto o pico subiu durante a geração
+do livro (sem contar os dados sintéticos): com as páginas gravadas em disco conforme
+são concluídas, ela não deve crescer com o número de seções.
+
+Uso:
+    python benchmarks/bench_livro.py --secoes 10 100 2000 --linhas 40
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf import gerar_turma
+
+
+def gerar_escola(secoes, linhas, seed=42):
+    """Cria um DataFrame sintético com `secoes` disciplinas de `linhas` alunos cada (formato de preparar_dados)."""
+    turma = gerar_turma(secoes * linhas, seed)
+    indices = np.arange(secoes * linhas) // linhas
+    turma.insert(0, 'curso', pd.Categorical([f'Curso {i // 20:03d}' for i in indices]))
+    turma.insert(1, 'disciplina', pd.Categorical([f'Disciplina {i % 20:02d}' for i in indices]))
+    return turma
+
+
+def pico_memoria_mb():
+    """Pico de memória residente do processo, em MB."""
+    # ru_maxrss em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def medir(secoes, linhas):
+    """Gera um livro e retorna as métricas (executado no processo filho)."""
+    import livro_pdf
+
+    df = gerar_escola(secoes, linhas)
+    pico_dados_mb = pico_memoria_mb()
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'livro.pdf')
+        inicio = time.perf_counter()
+        paginas = livro_pdf.escrever_livro(df, caminho)
+        segundos = time.perf_counter() - inicio
+        tamanho = os.path.getsize(caminho)
+    pico_mb = pico_memoria_mb()
+    return {'secoes': secoes, 'linhas': linhas, 'paginas': paginas, 'segundos': segundos,
+            'paginas_por_segundo': paginas / segundos, 'tamanho_mb': tamanho / 1e6, 'pico_mb': pico_mb,
+            'acrescimo_mb': pico_mb - pico_dados_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do livro de notas em PDF.")
+    parser.add_argument('--secoes', type=int, nargs='+', default=[10, 100, 2000])
+    parser.add_argument('--linhas', type=int, default=40, help="Alunos por seção.")
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(medir(args.secoes[0], args.linhas)))
+        return
+
+    print(f"{'Seções':>7} {'Páginas':>8} {'Tempo (s)':>10} {'Páginas/s':>10} {'PDF (MB)':>9} {'Pico RAM (MB)':>14} {'Pelo livro (MB)':>16}")
+    for secoes in args.secoes:
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--interno', '--secoes', str(secoes), '--linhas', str(args.linhas)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(saida.strip().splitlines()[-1])
+        print(f"{r['secoes']:>7} {r['paginas']:>8} {r['segundos']:>10.2f} {r['paginas_por_segundo']:>10,.0f} "
+              f"{r['tamanho_mb']:>9.1f} {r['pico_mb']:>14.1f} {r['acrescimo_mb']:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Mede a velocidade de geração da tabela de notas em PDF (linhas por segundo).
+
+Uso:
+    python benchmarks/bench_pdf.py --linhas 10000 --repeticoes 3
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import relatorio_pdf
+
+
+def gerar_turma(linhas, seed=42):
+    """Cria um DataFrame sintético no formato esperado por gerar_pdf_simples."""
+    rng = np.random.default_rng(seed)
+    nomes = np.array(['Ana', 'João', 'Maria', 'José', 'Conceição', 'Luís', 'Bárbara'])
+    sobrenomes = np.array(['Silva', 'Souza', 'Araújo', 'Gonçalves', 'Lima'])
+    df = pd.DataFrame({
+        'aluno': np.char.add(np.char.add(rng.choice(nomes, linhas), ' '), rng.choice(sobrenomes, linhas)),
+        'av1': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+        'av2': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+        'media_final': rng.uniform(0, 10, linhas).round(2).astype(np.float32),
+    })
+    df['status'] = np.where(df['media_final'] >= 6, 'Aprovado', 'Reprovado')
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da geração de PDF de notas.")
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    df = gerar_turma(args.linhas)
+    with tempfile.TemporaryDirectory() as pasta:
+        os.makedirs(os.path.join(pasta, 'output'))
+        cwd = os.getcwd()
+        os.chdir(pasta)
+        try:
+            tempos = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                relatorio_pdf.gerar_pdf_simples(df, 'Benchmark', 'Tabela Grande')
+                tempos.append(time.perf_counter() - inicio)
+        finally:
+            os.chdir(cwd)
+
+    melhor = min(tempos)
+    print(f"Linhas: {args.linhas}")
+    print(f"Melhor tempo: {melhor:.3f}s (de {args.repeticoes} execuções)")
+    print(f"Linhas por segundo: {args.linhas / melhor:,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Mede o tempo de inicialização (cold start) da CLI `relatorio.py` com `python -X importtime`.
+
+Para cada subcomando, executa `--help` em um interpretador novo, soma o tempo de
+importação dos módulos e verifica que nenhuma biblioteca pesada foi importada só para
+montar a CLI. Executa também um subcomando de verdade que não precisa delas (`shard`,
+sobre planilhas sintéticas em uma pasta temporária). Termina com código 1 se algum
+limite for ultrapassado, para que uma regressão no tempo de inicialização seja detectada.
+
+Uso:
+    python benchmarks/bench_startup.py --repeticoes 5 --saida startup.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gerar_planilhas
+
+PESADOS = ['pandas', 'pyarrow', 'numpy', 'matplotlib', 'seaborn', 'fpdf']
+
+# (nome, argumentos da CLI, módulos que não podem ser importados, limite padrão em ms)
+CENARIOS = [
+    ('ajuda', ['--help'], PESADOS, 1500),
+    ('consolidate', ['consolidate', '--help'], PESADOS, 1500),
+    ('pdf', ['pdf', '--help'], PESADOS, 1500),
+    ('png', ['png', '--help'], PESADOS, 1500),
+    ('merge', ['merge', '--help'], PESADOS, 1500),
+    # Subcomando executado de fato: cria a fila de lotes a partir das planilhas da pasta temporária
+    ('shard', ['shard', '--fila', 'fila'], PESADOS, 1500),
+]
+
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def medir(argumentos, pasta):
+    """Executa a CLI uma vez em `pasta` e retorna (tempo total em ms, tempo de importação em ms, módulos importados)."""
+    comando = [sys.executable, '-X', 'importtime', os.path.join(RAIZ, 'relatorio.py')] + argumentos
+    inicio = time.perf_counter()
+    processo = subprocess.run(comando, cwd=pasta, capture_output=True, text=True, check=True)
+    total_ms = (time.perf_counter() - inicio) * 1000
+
+    importacao_us = 0
+    modulos = set()
+    for linha in processo.stderr.splitlines():
+        encontrado = LINHA_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        cumulativo, recuo, modulo = int(encontrado.group(2)), encontrado.group(3), encontrado.group(4)
+        modulos.add(modulo)
+        # Apenas os módulos de nível mais alto, para não contar o mesmo tempo duas vezes
+        if len(recuo) == 1:
+            importacao_us += cumulativo
+    return total_ms, importacao_us / 1000, modulos
+
+
+def medir_cenarios(args, pasta):
+    """Mede todos os cenários em `pasta`; retorna (resultados, falhas)."""
+    resultados = []
+    falhas = []
+    for nome, argumentos, proibidos, limite_padrao in CENARIOS:
+        limite = args.limite_ms if args.limite_ms is not None else limite_padrao
+        medicoes = [medir(argumentos, pasta) for _ in range(args.repeticoes)]
+        total_ms = min(m[0] for m in medicoes)
+        importacao_ms = min(m[1] for m in medicoes)
+        modulos = medicoes[0][2]
+        importados = sorted(m for m in proibidos if m in modulos)
+
+        print(f"{nome:12s} total {total_ms:7.1f} ms | importações {importacao_ms:7.1f} ms | limite {limite:.0f} ms")
+        if importados:
+            falhas.append(f"{nome}: importou {', '.join(importados)}")
+        if total_ms > limite:
+            falhas.append(f"{nome}: {total_ms:.1f} ms acima do limite de {limite:.0f} ms")
+        resultados.append({
+            'cenario': nome,
+            'total_ms': round(total_ms, 1),
+            'importacoes_ms': round(importacao_ms, 1),
+            'limite_ms': limite,
+            'modulos_proibidos_importados': importados,
+        })
+    return resultados, falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização da CLI relatorio.py.")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite-ms', type=float, default=None,
+                        help="Limite de tempo total (ms) para todos os cenários; substitui os limites padrão.")
+    parser.add_argument('--saida', help="Arquivo JSON onde gravar os resultados.")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        shutil.copy(os.path.join(RAIZ, 'projeto.md'), pasta)
+        gerar_planilhas.gerar(os.path.join(pasta, 'inputs_ods'), 20, 10, 5)
+        resultados, falhas = medir_cenarios(args, pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    if falhas:
+        print("\nRegressão no tempo de inicialização:")
+        for falha in falhas:
+            print(f"- {falha}")
+        sys.exit(1)
+    print("\nTodos os cenários dentro do limite.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Gera planilhas .ods sintéticas no formato das exportações de notas do Moodle.
+
+Os arquivos seguem o padrão `TURMA-DISC Notas.ods`, usando os códigos do
+REPORT_MAP de projeto.md. Quando são pedidos mais arquivos do que combinações
+existentes, os códigos de turma recebem um sufixo numérico (ex.: TDS2), como
+acontece com turmas ainda não cadastradas no mapa.
+
+Cada planilha tem o cabeçalho típico do Moodle (dados do aluno, colunas de
+questionários e fóruns, colunas "total" e as colunas de AVALIAÇÃO 01/02 e Média
+da Disciplina), parte dos nomes com a codificação quebrada (latin-1 lido como
+UTF-8) e as linhas/colunas vazias repetidas que o LibreOffice grava no final.
+
+Os alunos de cada planilha são sorteados de um grupo fixo para a semente (ver
+sortear_alunos), então o mesmo aluno tem o mesmo nome, e-mail e número de
+identificação em todas as planilhas em que aparece.
+
+Uso:
+    python benchmarks/gerar_planilhas.py --destino /tmp/inputs_ods --arquivos 100 --alunos 40 --colunas-extras 30
+"""
+import os
+import sys
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape, quoteattr
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from relatorio import get_report_map
+
+NOMES = ['Ana', 'João', 'Maria', 'José', 'Conceição', 'Luís', 'Bárbara', 'Antônio', 'Letícia', 'Caio']
+SOBRENOMES = ['Silva', 'Souza', 'Araújo', 'Gonçalves', 'Lima', 'Conceição', 'Pereira', 'Assunção']
+
+MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+CONTENT_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<office:document-content'
+    ' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+    '<office:body><office:spreadsheet><table:table table:name="Notas">'
+)
+CONTENT_FIM = '</table:table></office:spreadsheet></office:body></office:document-content>'
+
+
+def mojibake(texto):
+    """Simula um cabeçalho gravado em UTF-8 e lido como latin-1."""
+    return texto.encode('utf-8').decode('latin-1')
+
+
+def celula_texto(texto):
+    return f'<table:table-cell office:value-type="string"><text:p>{escape(texto)}</text:p></table:table-cell>'
+
+
+def celula_numero(valor):
+    return (f'<table:table-cell office:value-type="float" office:value={quoteattr(repr(valor))}>'
+            f'<text:p>{valor}</text:p></table:table-cell>')
+
+
+def celulas_vazias(quantidade):
+    return f'<table:table-cell table:number-columns-repeated="{quantidade}"/>'
+
+
+def montar_cabecalho(rng, colunas_extras, prob_mojibake):
+    """Retorna a lista de nomes de coluna e, para cada uma, o tipo de valor gerado."""
+    colunas = [('Nome', 'nome'), ('Sobrenome', 'sobrenome'), ('Número de identificação', 'id'),
+               ('Instituição', 'vazio'), ('Departamento', 'vazio'), ('Endereço de email', 'email')]
+    for i in range(colunas_extras):
+        if i % 3 == 2:
+            colunas.append((f'Fórum:Fórum de dúvidas {i + 1} (Real)', 'nota'))
+        else:
+            colunas.append((f'Questionário:Atividade {i + 1} (Real)', 'nota'))
+    colunas += [
+        ('AVALIAÇÃO 01 total (Real)', 'nota'),
+        ('Questionário:AVALIAÇÃO 01 (Real)', 'nota'),
+        ('AVALIAÇÃO 02 total (Real)', 'nota'),
+        ('Questionário:AVALIAÇÃO 02 (Real)', 'nota'),
+        ('Média da Disciplina (Real)', 'nota'),
+        ('Último download a partir deste curso', 'texto'),
+    ]
+    return [(mojibake(nome) if rng.random() < prob_mojibake else nome, tipo) for nome, tipo in colunas]
+
+
+def sortear_alunos(rng, quantidade):
+    """Sorteia `quantidade` alunos como tuplas (nome, sobrenome, e-mail, número de identificação).
+
+    O número de identificação é único no grupo e o e-mail é derivado dele; nomes podem
+    se repetir (homônimos com e-mails diferentes).
+    """
+    numeros = rng.sample(range(10**8), quantidade)
+    return [(rng.choice(NOMES), rng.choice(SOBRENOMES), f'aluno{numero:08d}@escola.edu.br', f'{numero:08d}')
+            for numero in numeros]
+
+
+def gerar_planilha(file_path, rng, alunos, colunas_extras, prob_mojibake=0.5, matriculados=None):
+    """Grava uma planilha com `alunos` linhas sorteadas, sem repetição, de `matriculados`.
+
+    Sem `matriculados`, os alunos são sorteados só para esta planilha.
+    """
+    if matriculados is None:
+        matriculados = sortear_alunos(rng, alunos)
+    cabecalho = montar_cabecalho(rng, colunas_extras, prob_mojibake)
+    linhas = ['<table:table-row>' + ''.join(celula_texto(nome) for nome, _ in cabecalho)
+              + celulas_vazias(1024 - len(cabecalho)) + '</table:table-row>']
+    for nome, sobrenome, email, numero in rng.sample(matriculados, alunos):
+        celulas = []
+        for _, tipo in cabecalho:
+            # Variações de digitação do Moodle: nome em minúsculas e espaço sobrando no sobrenome
+            if tipo == 'nome':
+                celulas.append(celula_texto(nome.lower() if rng.random() < 0.2 else nome))
+            elif tipo == 'sobrenome':
+                celulas.append(celula_texto(sobrenome + (' ' if rng.random() < 0.1 else '')))
+            elif tipo == 'id':
+                celulas.append(celula_texto(numero))
+            elif tipo == 'email':
+                celulas.append(celula_texto(email))
+            elif tipo == 'nota':
+                # Atividades não entregues aparecem como '-' nas exportações
+                if rng.random() < 0.05:
+                    celulas.append(celula_texto('-'))
+                else:
+                    celulas.append(celula_numero(round(rng.uniform(0, 10), 2)))
+            elif tipo == 'texto':
+                celulas.append(celula_texto('18/10/2026 10:00'))
+            else:
+                celulas.append(celulas_vazias(1))
+        linhas.append('<table:table-row>' + ''.join(celulas)
+                      + celulas_vazias(1024 - len(cabecalho)) + '</table:table-row>')
+    # Linhas vazias repetidas até o fim da planilha, como grava o LibreOffice
+    linhas.append('<table:table-row table:number-rows-repeated="1048000">'
+                  + celulas_vazias(1024) + '</table:table-row>')
+
+    with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as ods:
+        ods.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet', compress_type=zipfile.ZIP_STORED)
+        ods.writestr('META-INF/manifest.xml', MANIFEST)
+        ods.writestr('content.xml', CONTENT_INICIO + ''.join(linhas) + CONTENT_FIM)
+
+
+def nomes_arquivos(report_map, quantidade):
+    """Gera `quantidade` nomes únicos no padrão TURMA-DISC Notas.ods."""
+    turmas = list(report_map.get('turma', {})) or ['TDS']
+    disciplinas = list(report_map.get('disciplina', {})) or ['ARC']
+    nomes = []
+    rodada = 1
+    while len(nomes) < quantidade:
+        for turma in turmas:
+            for disciplina in disciplinas:
+                codigo_turma = turma if rodada == 1 else f'{turma}{rodada}'
+                nomes.append(f'{codigo_turma}-{disciplina} Notas.ods')
+        rodada += 1
+    return nomes[:quantidade]
+
+
+def gerar(destino, arquivos, alunos, colunas_extras, seed=42, projeto=os.path.join(RAIZ, 'projeto.md'),
+          total_alunos=None):
+    """Gera as planilhas em `destino` e retorna a lista de caminhos criados.
+
+    Cada planilha tem `alunos` alunos de um mesmo grupo de `total_alunos` (padrão: o
+    dobro de `alunos`), sorteado a partir de `seed`.
+    """
+    os.makedirs(destino, exist_ok=True)
+    report_map = get_report_map(projeto) or {'turma': {}, 'disciplina': {}}
+    rng = random.Random(seed)
+    matriculados = sortear_alunos(rng, total_alunos or 2 * alunos)
+    caminhos = []
+    for nome in nomes_arquivos(report_map, arquivos):
+        file_path = os.path.join(destino, nome)
+        gerar_planilha(file_path, rng, alunos, colunas_extras, matriculados=matriculados)
+        caminhos.append(file_path)
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera planilhas .ods sintéticas de notas do Moodle.")
+    parser.add_argument('--destino', default='inputs_ods')
+    parser.add_argument('--arquivos', type=int, default=10)
+    parser.add_argument('--alunos', type=int, default=40, help="Alunos por planilha.")
+    parser.add_argument('--total-alunos', type=int, default=None,
+                        help="Alunos distintos entre todas as planilhas (padrão: o dobro de --alunos).")
+    parser.add_argument('--colunas-extras', type=int, default=30, help="Colunas de questionários/fóruns por planilha.")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    caminhos = gerar(args.destino, args.arquivos, args.alunos, args.colunas_extras, args.seed,
+                     total_alunos=args.total_alunos)
+    print(f"{len(caminhos)} planilha(s) gerada(s) em {args.destino}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+# Incrementar sempre que o formato dos fragmentos ou do processamento mudar,
+# para que caches antigos sejam descartados automaticamente.
+VERSAO_CACHE = 3
+
+def hash_arquivo(file_path, tamanho_bloco=1024 * 1024):
+    """Calcula o SHA-256 do conteúdo de um arquivo."""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def hash_report_map(report_map):
+    """Gera uma impressão digital do REPORT_MAP, já que ele define os nomes de Curso e Disciplina."""
+    conteudo = json.dumps(report_map, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+class CacheConsolidacao:
+    """Cache persistente do resultado de process_file, com um fragmento Parquet por planilha.
+
+    O manifesto guarda, para cada arquivo de entrada, o mtime, o tamanho, o hash do
+    conteúdo e o nome do fragmento. Um arquivo só é reprocessado se for novo ou se
+    seu conteúdo tiver mudado; entradas de arquivos removidos são descartadas.
+    """
+
+    def __init__(self, cache_dir, report_map):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.report_map_hash = hash_report_map(report_map)
+        self.arquivos = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._carregar_manifesto()
+
+    def _carregar_manifesto(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if manifesto.get('versao') != VERSAO_CACHE or manifesto.get('report_map') != self.report_map_hash:
+            print("Cache de consolidação desatualizado. Todas as planilhas serão reprocessadas.")
+            return
+        self.arquivos = manifesto.get('arquivos', {})
+
+    def salvar_manifesto(self):
+        """Grava o manifesto de forma atômica."""
+        manifesto = {
+            'versao': VERSAO_CACHE,
+            'report_map': self.report_map_hash,
+            'arquivos': self.arquivos,
+        }
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _fragment_path(self, entrada):
+        return os.path.join(self.cache_dir, entrada['fragmento'])
+
+    def valido(self, file_path):
+        """Indica se o fragmento em cache ainda corresponde ao conteúdo atual do arquivo."""
+        entrada = self.arquivos.get(os.path.basename(file_path))
+        if entrada is None or not os.path.exists(self._fragment_path(entrada)):
+            return False
+        stat = os.stat(file_path)
+        if entrada['mtime'] == stat.st_mtime_ns and entrada['size'] == stat.st_size:
+            return True
+        if entrada['size'] != stat.st_size:
+            return False
+        # mtime mudou mas o tamanho não: confirma pelo hash antes de reprocessar.
+        if entrada['sha256'] != hash_arquivo(file_path):
+            return False
+        entrada['mtime'] = stat.st_mtime_ns
+        return True
+
+    def carregar(self, file_path):
+        """Lê o fragmento em cache de um arquivo."""
+        entrada = self.arquivos[os.path.basename(file_path)]
+        return pd.read_parquet(self._fragment_path(entrada))
+
+    def guardar(self, file_path, df):
+        """Grava o fragmento de um arquivo recém-processado e atualiza sua entrada no manifesto."""
+        file_name = os.path.basename(file_path)
+        stat = os.stat(file_path)
+        fragmento = hashlib.sha1(file_name.encode('utf-8')).hexdigest() + '.parquet'
+        df.to_parquet(os.path.join(self.cache_dir, fragmento), index=False)
+        self.arquivos[file_name] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': hash_arquivo(file_path),
+            'fragmento': fragmento,
+        }
+
+    def remover_ausentes(self, file_paths):
+        """Descarta do cache os arquivos que não existem mais na pasta de entrada."""
+        presentes = {os.path.basename(p) for p in file_paths}
+        removidos = [nome for nome in self.arquivos if nome not in presentes]
+        for nome in removidos:
+            entrada = self.arquivos.pop(nome)
+            try:
+                os.remove(self._fragment_path(entrada))
+            except FileNotFoundError:
+                pass
+        return removidos
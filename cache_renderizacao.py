@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+# Incrementar sempre que o formato do manifesto mudar.
+VERSAO_MANIFESTO = 1
+
+def hash_grupo(df, parametros):
+    """Impressão digital dos dados de um grupo e dos parâmetros usados para desenhá-lo.
+
+    `parametros` deve conter tudo que altera o arquivo gerado além dos dados (versão
+    do modelo, curso, disciplina, dpi, larguras de coluna...).
+    """
+    sha = hashlib.sha256()
+    sha.update(json.dumps(parametros, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    sha.update(json.dumps(list(map(str, df.columns))).encode('utf-8'))
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+class CacheRenderizacao:
+    """Cache dos relatórios já desenhados (PDF ou PNG), endereçado pelo conteúdo.
+
+    Um manifesto gravado ao lado das saídas (`.renderizacao_<tipo>.json`) guarda,
+    para cada arquivo gerado, o hash dos dados e dos parâmetros que o produziram e
+    a data do último uso. Um grupo só é desenhado de novo se o hash mudou ou se o
+    arquivo não existe mais.
+    """
+
+    def __init__(self, pasta, tipo):
+        self.pasta = pasta
+        self.manifest_path = os.path.join(pasta, f'.renderizacao_{tipo}.json')
+        self.arquivos = {}
+        # Arquivos usados ou gerados nesta execução: nunca são expirados
+        self._usados = set()
+        self._carregar_manifesto()
+
+    def _carregar_manifesto(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if manifesto.get('versao') == VERSAO_MANIFESTO:
+            self.arquivos = manifesto.get('arquivos', {})
+
+    def salvar_manifesto(self):
+        """Grava o manifesto de forma atômica."""
+        os.makedirs(self.pasta, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_MANIFESTO, 'arquivos': self.arquivos}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def valido(self, caminho, chave):
+        """Indica se `caminho` já foi gerado a partir do mesmo conteúdo; se sim, registra o uso."""
+        entrada = self.arquivos.get(os.path.basename(caminho))
+        if entrada is None or entrada['hash'] != chave or not os.path.exists(caminho):
+            return False
+        entrada['ultimo_uso'] = time.time()
+        self._usados.add(os.path.basename(caminho))
+        return True
+
+    def registrar(self, caminho, chave):
+        """Registra um arquivo recém-gerado."""
+        agora = time.time()
+        self.arquivos[os.path.basename(caminho)] = {'hash': chave, 'gerado_em': agora, 'ultimo_uso': agora}
+        self._usados.add(os.path.basename(caminho))
+
+    def _remover(self, nome):
+        self.arquivos.pop(nome, None)
+        try:
+            os.remove(os.path.join(self.pasta, nome))
+        except FileNotFoundError:
+            pass
+
+    def remover_obsoletos(self, caminhos_atuais):
+        """Apaga os arquivos (e entradas) de grupos que não existem mais nos dados."""
+        atuais = {os.path.basename(c) for c in caminhos_atuais}
+        removidos = [nome for nome in self.arquivos if nome not in atuais]
+        for nome in removidos:
+            self._remover(nome)
+        return removidos
+
+    def expirar(self, dias):
+        """Apaga os arquivos (e entradas) que não foram usados nos últimos `dias` dias nem nesta execução."""
+        limite = time.time() - dias * 86400
+        removidos = [nome for nome, entrada in self.arquivos.items()
+                     if entrada['ultimo_uso'] < limite and nome not in self._usados]
+        for nome in removidos:
+            self._remover(nome)
+        return removidos
@@ -0,0 +1,21 @@
+import os
+import sys
+import shutil
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+import gerar_planilhas
+
+
+@pytest.fixture
+def pasta_trabalho(tmp_path, monkeypatch):
+    """Pasta de trabalho temporária com o projeto.md e algumas planilhas sintéticas em inputs_ods.
+
+    O diretório atual passa a ser essa pasta, como na execução normal dos scripts.
+    """
+    shutil.copy(os.path.join(RAIZ, 'projeto.md'), tmp_path)
+    gerar_planilhas.gerar(str(tmp_path / 'inputs_ods'), arquivos=6, alunos=12, colunas_extras=5)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,199 @@
+import os
+import contextlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from opcoes import OUTPUT_FOLDER
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+PARQUET_PATH = os.path.join(OUTPUT_FOLDER, 'relatorio_consolidado.parquet')
+CSV_PATH = os.path.join(OUTPUT_FOLDER, 'relatorio_consolidado.csv')
+
+# Esquema tipado do relatório consolidado: Curso e Disciplina com dicionário
+# (viram colunas categóricas no pandas), notas em float32 e o identificador do
+# aluno no Moodle (e-mail ou número de identificação), quando a planilha o traz.
+SCHEMA = pa.schema([
+    ('Curso', pa.dictionary(pa.int32(), pa.string())),
+    ('Disciplina', pa.dictionary(pa.int32(), pa.string())),
+    ('Aluno', pa.string()),
+    ('AV1', pa.float32()),
+    ('AV2', pa.float32()),
+    ('MediaFinal', pa.float32()),
+    ('Identificador', pa.string()),
+])
+
+# Colunas usadas nos relatórios em PDF e PNG (o identificador do aluno fica de fora).
+COLUNAS_RELATORIO = ['Curso', 'Disciplina', 'Aluno', 'AV1', 'AV2', 'MediaFinal']
+
+@contextlib.contextmanager
+def trava_relatorio(pasta=OUTPUT_FOLDER):
+    """Garante que apenas uma consolidação por vez grave em `pasta`, mesmo entre processos.
+
+    Evita que o modo --watch e o botão do painel, por exemplo, disputem o cache e
+    os arquivos temporários. Quem chega depois espera a consolidação em andamento.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, '.trava'), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK desiste após ~10s; tenta de novo até conseguir
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Número de linhas acumuladas antes de gravar um bloco no Parquet e no CSV. Limita a
+# memória usada pelo GravadorConsolidado sem gerar um row group minúsculo por planilha.
+LINHAS_POR_BLOCO = 100_000
+
+class GravadorConsolidado:
+    """Grava o relatório consolidado em partes, sem montar o DataFrame completo na memória.
+
+    Cada parte (o resultado de uma planilha) é projetada nas colunas de SCHEMA e
+    acumulada até somar LINHAS_POR_BLOCO linhas; então o bloco é acrescentado ao CSV,
+    na ordem de chegada, e ao Parquet, com um row group por curso para que os filtros
+    de carregar_dados continuem pulando os demais cursos. A memória fica limitada
+    pelo tamanho do bloco (ou pela maior parte recebida).
+
+    Tudo é gravado em arquivos temporários, renomeados apenas em concluir(); se a
+    gravação for interrompida, os temporários são descartados e o relatório anterior
+    é mantido.
+
+    Uso:
+        with GravadorConsolidado(parquet_path, csv_path) as gravador:
+            gravador.escrever(df)
+            gravador.concluir()
+    """
+
+    def __init__(self, parquet_path=PARQUET_PATH, csv_path=CSV_PATH, linhas_por_bloco=LINHAS_POR_BLOCO):
+        self.parquet_path = parquet_path
+        self.csv_path = csv_path
+        self.linhas_por_bloco = linhas_por_bloco
+        self.linhas = 0
+        self._partes = []
+        self._linhas_pendentes = 0
+        self._csv_iniciado = False
+        self._writer = pq.ParquetWriter(parquet_path + '.tmp', SCHEMA)
+        # newline='' evita que o pandas e o sistema traduzam as quebras de linha duas vezes
+        self._csv = open(csv_path + '.tmp', 'w', encoding='utf-8-sig', newline='')
+        self._concluido = False
+
+    def escrever(self, df):
+        """Acrescenta as linhas de df ao relatório."""
+        if df.empty:
+            return
+        if list(df.columns) != SCHEMA.names:
+            df = df[SCHEMA.names]
+        self._partes.append(df)
+        self._linhas_pendentes += len(df)
+        self.linhas += len(df)
+        if self._linhas_pendentes >= self.linhas_por_bloco:
+            self._descarregar()
+
+    def _descarregar(self):
+        """Grava o bloco acumulado no CSV e no Parquet."""
+        if not self._partes:
+            return
+        bloco = pd.concat(self._partes, ignore_index=True)
+        self._partes = []
+        self._linhas_pendentes = 0
+
+        bloco.to_csv(self._csv, index=False, header=not self._csv_iniciado)
+        self._csv_iniciado = True
+
+        for _, bloco_curso in bloco.groupby('Curso', sort=True, observed=True):
+            self._writer.write_table(pa.Table.from_pandas(bloco_curso, schema=SCHEMA, preserve_index=False))
+
+    def _fechar(self):
+        self._writer.close()
+        self._csv.close()
+
+    def concluir(self):
+        """Grava o último bloco, fecha os arquivos e publica o Parquet e o CSV.
+
+        Sem nenhuma linha, publica um relatório vazio (só o esquema e o cabeçalho).
+        """
+        self._descarregar()
+        if not self._csv_iniciado:
+            pd.DataFrame(columns=SCHEMA.names).to_csv(self._csv, index=False)
+        self._fechar()
+        os.replace(self.parquet_path + '.tmp', self.parquet_path)
+        os.replace(self.csv_path + '.tmp', self.csv_path)
+        self._concluido = True
+
+    def descartar(self):
+        """Fecha e apaga os arquivos temporários, mantendo o relatório anterior."""
+        self._partes = []
+        self._fechar()
+        for tmp_path in (self.parquet_path + '.tmp', self.csv_path + '.tmp'):
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if not self._concluido:
+            self.descartar()
+        return False
+
+def versao_dados():
+    """Identifica a versão atual do relatório consolidado (mtime e tamanho do arquivo).
+
+    Muda sempre que o relatório é regravado; serve de chave para caches derivados dos dados.
+    """
+    for path in (PARQUET_PATH, CSV_PATH):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return f'{path}:{stat.st_mtime_ns}:{stat.st_size}'
+    return None
+
+def carregar_dados(colunas=None, curso=None, disciplina=None):
+    """Carrega o relatório consolidado, lendo apenas as colunas e linhas pedidas.
+
+    Os filtros de curso e disciplina são aplicados na leitura do Parquet, usando as
+    estatísticas de cada row group para pular os cursos que não interessam. Se só
+    existir o CSV de uma versão anterior, ele é usado como alternativa.
+    Retorna None se nenhum dos dois arquivos existir.
+    """
+    if os.path.exists(PARQUET_PATH):
+        filtros = []
+        if curso is not None:
+            filtros.append(('Curso', '==', curso))
+        if disciplina is not None:
+            filtros.append(('Disciplina', '==', disciplina))
+        tabela = pq.read_table(PARQUET_PATH, columns=colunas, filters=filtros or None)
+        return tabela.to_pandas()
+
+    if os.path.exists(CSV_PATH):
+        df = pd.read_csv(CSV_PATH)
+        if curso is not None:
+            df = df[df['Curso'] == curso]
+        if disciplina is not None:
+            df = df[df['Disciplina'] == disciplina]
+        if colunas is not None:
+            df = df[colunas]
+        return df.reset_index(drop=True)
+
+    return None
@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import contextlib
+from opcoes import OUTPUT_FOLDER, ARQUIVOS_POR_LOTE, PRAZO_PADRAO
+
+# Consolidação distribuída: o coordenador divide as planilhas de inputs_ods em lotes
+# e os registra em uma fila SQLite (fila.sqlite) em uma pasta compartilhada. Cada
+# trabalhador, em qualquer máquina com acesso à pasta, reivindica um lote por vez,
+# processa as planilhas com process_file e grava um Parquet parcial em parciais/. Por
+# fim, a junção acrescenta os parciais, na ordem dos lotes, ao relatório consolidado.
+#
+# A reivindicação tem prazo (lease): o trabalhador o renova a cada planilha, e o lote
+# de um trabalhador que travou ou morreu volta a ficar disponível quando o prazo vence.
+# Um lote que esgota MAX_TENTATIVAS é marcado como falho em vez de ser tentado de novo.
+#
+# A fila depende de travas de arquivo funcionando na pasta compartilhada (NFS com
+# lockd, SMB) e de relógios sincronizados entre as máquinas, já que os prazos são
+# horários absolutos.
+#
+# pyarrow e o pandas só são importados por quem grava ou lê os parciais, para que o
+# coordenador (subcomando shard) inicie sem eles.
+
+PENDENTE = 'pendente'
+EM_ANDAMENTO = 'em_andamento'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+
+MAX_TENTATIVAS = 3
+# Intervalo máximo entre consultas enquanto os lotes restantes estão com outros trabalhadores
+# (para sair logo quando eles terminam, sem esperar o prazo).
+INTERVALO_ESPERA = 1.0
+
+def identificador_trabalhador():
+    """Identifica o trabalhador na fila: máquina e processo."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+class FilaLotes:
+    """Fila de lotes de planilhas em uma pasta compartilhada, guardada em SQLite.
+
+    Cada operação abre sua própria conexão e transação (BEGIN IMMEDIATE), então
+    vários processos, em uma ou várias máquinas, podem usar a mesma fila. Uma
+    reivindicação gera uma `posse` (token aleatório): renovar e concluir só têm
+    efeito se o lote ainda pertencer a ela, de modo que um trabalhador cujo prazo
+    venceu não sobrescreve o estado de quem reivindicou o lote depois.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.caminho = os.path.join(pasta, 'fila.sqlite')
+        self.pasta_parciais = os.path.join(pasta, 'parciais')
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+    def _conectar(self):
+        # isolation_level=None: as transações são abertas explicitamente em _transacao
+        return sqlite3.connect(self.caminho, timeout=60, isolation_level=None)
+
+    @contextlib.contextmanager
+    def _transacao(self):
+        conexao = self._conectar()
+        try:
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute('ROLLBACK')
+                raise
+            conexao.execute('COMMIT')
+        finally:
+            conexao.close()
+
+    def criar(self, entrada, arquivos, report_map, arquivos_por_lote=ARQUIVOS_POR_LOTE):
+        """Cria a fila com os arquivos (nomes relativos à pasta `entrada`) divididos em lotes consecutivos.
+
+        Apaga a fila e os parciais anteriores, se houver. Retorna o número de lotes.
+        """
+        os.makedirs(self.pasta_parciais, exist_ok=True)
+        for nome in os.listdir(self.pasta_parciais):
+            os.remove(os.path.join(self.pasta_parciais, nome))
+        for caminho in (self.caminho, self.caminho + '-journal'):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(caminho)
+
+        lotes = [arquivos[i:i + arquivos_por_lote] for i in range(0, len(arquivos), arquivos_por_lote)]
+        with self._transacao() as conexao:
+            conexao.execute('CREATE TABLE metadados (chave TEXT PRIMARY KEY, valor TEXT)')
+            conexao.execute(
+                'CREATE TABLE lotes (id INTEGER PRIMARY KEY, arquivos TEXT NOT NULL, estado TEXT NOT NULL, '
+                'trabalhador TEXT, posse TEXT, expira_em REAL, tentativas INTEGER NOT NULL DEFAULT 0, '
+                'linhas INTEGER, erros TEXT)')
+            conexao.executemany('INSERT INTO metadados VALUES (?, ?)', [
+                ('entrada', os.path.abspath(entrada)),
+                ('report_map', json.dumps(report_map, ensure_ascii=False)),
+                ('criada_em', str(time.time())),
+            ])
+            conexao.executemany('INSERT INTO lotes (id, arquivos, estado) VALUES (?, ?, ?)',
+                                [(i, json.dumps(lote, ensure_ascii=False), PENDENTE)
+                                 for i, lote in enumerate(lotes, start=1)])
+        return len(lotes)
+
+    def metadados(self):
+        conexao = self._conectar()
+        try:
+            metadados = dict(conexao.execute('SELECT chave, valor FROM metadados'))
+        finally:
+            conexao.close()
+        metadados['report_map'] = json.loads(metadados['report_map'])
+        return metadados
+
+    def reivindicar(self, trabalhador, prazo=PRAZO_PADRAO):
+        """Reivindica o próximo lote pendente ou com prazo vencido.
+
+        Retorna (id, arquivos, posse), ou None se não houver lote disponível agora.
+        Lotes vencidos que já esgotaram MAX_TENTATIVAS são marcados como falhos.
+        """
+        agora = time.time()
+        with self._transacao() as conexao:
+            conexao.execute(
+                'UPDATE lotes SET estado = ?, posse = NULL WHERE estado = ? AND expira_em < ? AND tentativas >= ?',
+                (FALHOU, EM_ANDAMENTO, agora, MAX_TENTATIVAS))
+            linha = conexao.execute(
+                'SELECT id, arquivos FROM lotes WHERE estado = ? OR (estado = ? AND expira_em < ?) ORDER BY id LIMIT 1',
+                (PENDENTE, EM_ANDAMENTO, agora)).fetchone()
+            if linha is None:
+                return None
+            posse = uuid.uuid4().hex
+            conexao.execute(
+                'UPDATE lotes SET estado = ?, trabalhador = ?, posse = ?, expira_em = ?, tentativas = tentativas + 1 '
+                'WHERE id = ?', (EM_ANDAMENTO, trabalhador, posse, agora + prazo, linha[0]))
+        return linha[0], json.loads(linha[1]), posse
+
+    def renovar(self, lote, posse, prazo=PRAZO_PADRAO):
+        """Estende o prazo do lote; retorna False se a posse foi perdida (prazo vencido e lote reivindicado por outro)."""
+        with self._transacao() as conexao:
+            cursor = conexao.execute('UPDATE lotes SET expira_em = ? WHERE id = ? AND posse = ? AND estado = ?',
+                                     (time.time() + prazo, lote, posse, EM_ANDAMENTO))
+            return cursor.rowcount == 1
+
+    def concluir(self, lote, posse, linhas, erros):
+        """Marca o lote como concluído, se a posse ainda for válida."""
+        with self._transacao() as conexao:
+            cursor = conexao.execute(
+                'UPDATE lotes SET estado = ?, posse = NULL, expira_em = NULL, linhas = ?, erros = ? '
+                'WHERE id = ? AND posse = ? AND estado = ?',
+                (CONCLUIDO, linhas, json.dumps(erros, ensure_ascii=False), lote, posse, EM_ANDAMENTO))
+            return cursor.rowcount == 1
+
+    def lotes(self):
+        """Todos os lotes, em ordem, como dicionários."""
+        conexao = self._conectar()
+        conexao.row_factory = sqlite3.Row
+        try:
+            lotes = [dict(linha) for linha in conexao.execute('SELECT * FROM lotes ORDER BY id')]
+        finally:
+            conexao.close()
+        for lote in lotes:
+            lote['arquivos'] = json.loads(lote['arquivos'])
+            lote['erros'] = json.loads(lote['erros']) if lote['erros'] else []
+        return lotes
+
+    def situacao(self):
+        """Número de lotes em cada estado e o próximo vencimento de prazo (ou None)."""
+        conexao = self._conectar()
+        try:
+            contagens = dict(conexao.execute('SELECT estado, COUNT(*) FROM lotes GROUP BY estado'))
+            proximo, = conexao.execute('SELECT MIN(expira_em) FROM lotes WHERE estado = ?', (EM_ANDAMENTO,)).fetchone()
+        finally:
+            conexao.close()
+        situacao = {estado: contagens.get(estado, 0) for estado in (PENDENTE, EM_ANDAMENTO, CONCLUIDO, FALHOU)}
+        situacao['proximo_vencimento'] = proximo
+        return situacao
+
+    def caminho_parcial(self, lote):
+        return os.path.join(self.pasta_parciais, f'lote_{lote:05d}.parquet')
+
+def gravar_parcial(partes, caminho):
+    """Grava os DataFrames de um lote em um Parquet com o esquema do relatório (um row group por planilha).
+
+    A gravação é feita em um temporário exclusivo do processo e renomeada no final,
+    então dois trabalhadores com o mesmo lote (após um prazo vencido) não se atrapalham.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from dados import SCHEMA
+
+    tmp_path = f'{caminho}.{os.getpid()}.tmp'
+    with pq.ParquetWriter(tmp_path, SCHEMA) as writer:
+        for df in partes:
+            writer.write_table(pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False))
+    os.replace(tmp_path, caminho)
+
+def distribuir(pasta_fila, input_folder='inputs_ods', arquivos_por_lote=ARQUIVOS_POR_LOTE):
+    """Coordenador: divide as planilhas de input_folder em lotes e cria a fila em pasta_fila.
+
+    O REPORT_MAP é compilado aqui e gravado na fila, então os trabalhadores não
+    precisam do projeto.md. Retorna o número de lotes, ou None se não houver planilhas.
+    """
+    from relatorio import get_report_map
+
+    # Mesma ordem da consolidação local, para que o relatório juntado seja igual
+    od_files = [f for f in os.listdir(input_folder) if f.endswith('.ods')]
+    if not od_files:
+        print(f"Nenhuma planilha .ods encontrada em {input_folder}.")
+        return None
+    report_map = get_report_map()
+    if not report_map:
+        print("Não foi possível carregar o mapa de relatório. Usando nomes de arquivo padrão.")
+        report_map = {"turma": {}, "disciplina": {}}
+
+    os.makedirs(pasta_fila, exist_ok=True)
+    n_lotes = FilaLotes(pasta_fila).criar(input_folder, od_files, report_map, arquivos_por_lote)
+    print(f"Fila criada em {pasta_fila}: {len(od_files)} planilha(s) em {n_lotes} lote(s).")
+    return n_lotes
+
+def processar_lote(fila, lote, arquivos, posse, input_folder, report_map, workers=1, prazo=PRAZO_PADRAO):
+    """Processa as planilhas de um lote e grava o parcial; retorna (linhas, erros) ou None se a posse foi perdida."""
+    from relatorio import COLUNAS_FINAIS, processar_arquivos
+
+    file_paths = [os.path.join(input_folder, nome) for nome in arquivos]
+    partes, erros, linhas = [], [], 0
+    for file_path, processed_df in processar_arquivos(file_paths, report_map, workers):
+        if processed_df is None:
+            erros.append(os.path.basename(file_path))
+        else:
+            processed_df = processed_df[COLUNAS_FINAIS]
+            partes.append(processed_df)
+            linhas += len(processed_df)
+        if not fila.renovar(lote, posse, prazo):
+            return None
+    gravar_parcial(partes, fila.caminho_parcial(lote))
+    return linhas, erros
+
+def trabalhar(pasta_fila, input_folder=None, workers=1, prazo=PRAZO_PADRAO):
+    """Trabalhador: processa lotes da fila até que não reste nenhum pendente ou em andamento.
+
+    input_folder substitui a pasta de entrada registrada pelo coordenador (útil quando
+    a pasta compartilhada é montada em outro caminho nesta máquina). workers é o
+    número de processos locais para as planilhas de cada lote. Retorna o número de
+    lotes concluídos por este trabalhador.
+    """
+    fila = FilaLotes(pasta_fila)
+    if not fila.existe():
+        print(f"Fila não encontrada em {pasta_fila}. Execute o subcomando 'shard' primeiro.")
+        return 0
+    metadados = fila.metadados()
+    input_folder = input_folder or metadados['entrada']
+    report_map = metadados['report_map']
+    trabalhador = identificador_trabalhador()
+
+    concluidos = 0
+    while True:
+        reivindicado = fila.reivindicar(trabalhador, prazo)
+        if reivindicado is None:
+            situacao = fila.situacao()
+            if not situacao[PENDENTE] and not situacao[EM_ANDAMENTO]:
+                break
+            # Os lotes restantes estão com outros trabalhadores: espera terminarem ou o prazo vencer
+            espera = situacao['proximo_vencimento'] - time.time() if situacao['proximo_vencimento'] else 0
+            time.sleep(min(max(espera, 0.1), INTERVALO_ESPERA))
+            continue
+
+        lote, arquivos, posse = reivindicado
+        print(f"[{trabalhador}] Lote {lote}: {len(arquivos)} planilha(s).")
+        resultado = processar_lote(fila, lote, arquivos, posse, input_folder, report_map, workers, prazo)
+        if resultado is None or not fila.concluir(lote, posse, *resultado):
+            print(f"[{trabalhador}] Prazo do lote {lote} venceu e ele foi reivindicado por outro trabalhador.")
+            continue
+        concluidos += 1
+
+    print(f"[{trabalhador}] {concluidos} lote(s) concluído(s).")
+    return concluidos
+
+def juntar(pasta_fila, output_folder=OUTPUT_FOLDER):
+    """Junta os parciais de todos os lotes, na ordem, no relatório consolidado (Parquet e CSV) de output_folder.
+
+    Só publica se todos os lotes estiverem concluídos; senão, informa quais faltam e
+    mantém o relatório anterior. Retorna um dicionário como o de relatorio.consolidar,
+    ou None se a junção não foi feita.
+    """
+    import pyarrow.parquet as pq
+    from dados import PARQUET_PATH, CSV_PATH, GravadorConsolidado, trava_relatorio
+
+    fila = FilaLotes(pasta_fila)
+    if not fila.existe():
+        print(f"Fila não encontrada em {pasta_fila}.")
+        return None
+    lotes = fila.lotes()
+    incompletos = [lote for lote in lotes if lote['estado'] != CONCLUIDO]
+    if incompletos:
+        for lote in incompletos:
+            print(f"Lote {lote['id']} {lote['estado']} (tentativas: {lote['tentativas']}, "
+                  f"trabalhador: {lote['trabalhador'] or '-'}).")
+        print(f"\n{len(incompletos)} de {len(lotes)} lote(s) não concluído(s). O relatório não foi alterado.")
+        return None
+
+    output_file = os.path.join(output_folder, os.path.basename(PARQUET_PATH))
+    csv_file = os.path.join(output_folder, os.path.basename(CSV_PATH))
+    os.makedirs(output_folder, exist_ok=True)
+    erros = [erro for lote in lotes for erro in lote['erros']]
+    with trava_relatorio(output_folder), GravadorConsolidado(output_file, csv_file) as gravador:
+        for lote in lotes:
+            with pq.ParquetFile(fila.caminho_parcial(lote['id'])) as parcial:
+                for i in range(parcial.num_row_groups):
+                    gravador.escrever(parcial.read_row_group(i).to_pandas())
+        resultado = {
+            'arquivos': sum(len(lote['arquivos']) for lote in lotes),
+            'lotes': len(lotes),
+            'erros': erros,
+            'registros': gravador.linhas,
+        }
+        # Como em relatorio.consolidar: sem linhas e sem erros (planilhas vazias), o relatório
+        # é publicado vazio; se alguma planilha falhou, o relatório anterior é mantido.
+        if gravador.linhas or not erros:
+            gravador.concluir()
+            print(f"Relatório consolidado foi salvo com sucesso em: {output_file}")
+            print(f"Exportação em CSV salva em: {csv_file}")
+            print(f"Total de {gravador.linhas} registros de {len(lotes)} lote(s).")
+        else:
+            print("Nenhum dado foi processado. Verifique os erros dos trabalhadores. O relatório anterior foi mantido.")
+    if erros:
+        print("Arquivos com erro: " + ", ".join(erros))
+    return resultado
+
+def executar(args):
+    """Executa o subcomando shard, work ou merge com os argumentos já lidos."""
+    if args.comando == 'shard':
+        distribuir(args.fila, args.entrada, args.arquivos_por_lote)
+    elif args.comando == 'work':
+        trabalhar(args.fila, args.entrada, args.workers, args.prazo)
+    else:
+        juntar(args.fila, args.saida)
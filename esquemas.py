@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+
+# Incrementar sempre que a limpeza dos nomes ou a descoberta das colunas mudar,
+# para que os esquemas gravados em disco sejam descartados.
+VERSAO_ESQUEMAS = 2
+ESQUEMAS_JSON = 'esquemas.json'
+REPORT_MAP_JSON = 'report_map.json'
+
+# Esquemas já resolvidos neste processo: impressão digital do cabeçalho -> {coluna: índice}
+_esquemas = {}
+# Esquemas resolvidos desde o último carregar()/coletar(), ainda não gravados em disco
+_novos = {}
+
+def impressao_digital(cabecalho):
+    """Identifica um cabeçalho bruto pelo hash dos nomes das colunas, na ordem em que aparecem."""
+    conteudo = '\x1f'.join(str(col) for col in cabecalho)
+    return hashlib.sha1(conteudo.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def resolver(cabecalho, funcao):
+    """Retorna as colunas de `cabecalho`, chamando funcao(cabecalho) só para layouts ainda não vistos.
+
+    Exportações do Moodle de um mesmo curso costumam ter a mesma linha de títulos,
+    então apenas o primeiro arquivo de cada layout paga a limpeza dos nomes e a
+    busca das colunas. Erros de resolução não são guardados.
+    """
+    chave = impressao_digital(cabecalho)
+    colunas = _esquemas.get(chave)
+    if colunas is None:
+        colunas = funcao(cabecalho)
+        _esquemas[chave] = colunas
+        _novos[chave] = colunas
+    return dict(colunas)
+
+def definir(esquemas):
+    """Substitui os esquemas conhecidos (usado como initializer dos processos do pool)."""
+    _esquemas.clear()
+    _esquemas.update(esquemas)
+    _novos.clear()
+
+def conhecidos():
+    """Retorna uma cópia dos esquemas conhecidos neste processo."""
+    return dict(_esquemas)
+
+def coletar():
+    """Retorna e descarta os esquemas resolvidos desde a última coleta (enviados de um worker ao processo principal)."""
+    novos = dict(_novos)
+    _novos.clear()
+    return novos
+
+def incorporar(esquemas):
+    """Acrescenta esquemas resolvidos em outro processo."""
+    _esquemas.update(esquemas)
+    _novos.update(esquemas)
+
+def carregar(pasta):
+    """Lê os esquemas gravados em `pasta`, descartando arquivos de outra versão."""
+    try:
+        with open(os.path.join(pasta, ESQUEMAS_JSON), 'r', encoding='utf-8') as f:
+            conteudo = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return
+    if conteudo.get('versao') != VERSAO_ESQUEMAS:
+        return
+    _esquemas.update(conteudo.get('esquemas', {}))
+
+def salvar(pasta):
+    """Grava de forma atômica os esquemas conhecidos, se algum novo layout foi resolvido."""
+    if not _novos:
+        return
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, ESQUEMAS_JSON)
+    tmp_path = caminho + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'versao': VERSAO_ESQUEMAS, 'esquemas': _esquemas}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, caminho)
+    _novos.clear()
+
+# --- REPORT_MAP compilado ---
+# caminho do projeto.md -> (mtime, tamanho, REPORT_MAP)
+_report_maps = {}
+
+def report_map_em_cache(path, compilar, pasta=None):
+    """Retorna o REPORT_MAP de `path`, recompilando-o apenas quando o projeto.md muda.
+
+    O resultado fica em memória e, se `pasta` for informada, também em disco, ambos
+    invalidados pelo mtime e pelo tamanho do arquivo. `compilar(path)` é chamado
+    quando não há versão válida; se retornar None, nada é guardado.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return compilar(path)
+    assinatura = [stat.st_mtime_ns, stat.st_size]
+
+    em_memoria = _report_maps.get(path)
+    if em_memoria is not None and em_memoria[0] == assinatura:
+        return em_memoria[1]
+
+    caminho_disco = os.path.join(pasta, REPORT_MAP_JSON) if pasta else None
+    if caminho_disco:
+        try:
+            with open(caminho_disco, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('origem') == os.path.abspath(path) and conteudo.get('assinatura') == assinatura:
+                _report_maps[path] = (assinatura, conteudo['report_map'])
+                return conteudo['report_map']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    report_map = compilar(path)
+    if report_map is None:
+        return None
+    _report_maps[path] = (assinatura, report_map)
+    if caminho_disco:
+        os.makedirs(pasta, exist_ok=True)
+        tmp_path = caminho_disco + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'origem': os.path.abspath(path), 'assinatura': assinatura, 'report_map': report_map},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, caminho_disco)
+    return report_map
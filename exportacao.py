@@ -0,0 +1,130 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Linhas serializadas por vez; limita a memória usada pela exportação, qualquer que seja o filtro.
+LINHAS_POR_BLOCO = 100_000
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho); acima disso, continua em outra aba.
+LINHAS_POR_ABA_XLSX = 1_048_576
+
+# Formatos de exportação: extensão e tipo MIME.
+FORMATOS = {
+    'CSV': ('.csv', 'text/csv'),
+    'XLSX': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+def ordem_linhas(df, coluna, decrescente=False):
+    """Posições das linhas de df ordenadas por `coluna` (ordenação estável, valores ausentes por último).
+
+    Colunas categóricas são ordenadas pelo texto, e não pela ordem das categorias
+    (que no Parquet é a ordem de aparição).
+    """
+    serie = df[coluna].reset_index(drop=True)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.cat.reorder_categories(serie.cat.categories.sort_values())
+    return serie.sort_values(ascending=not decrescente, kind='stable', na_position='last').index.to_numpy()
+
+def total_paginas(total_linhas, linhas_por_pagina):
+    """Número de páginas para exibir `total_linhas` (ao menos uma, mesmo sem linhas)."""
+    return max(1, -(-total_linhas // linhas_por_pagina))
+
+def pagina(df, numero, linhas_por_pagina, colunas=None, ordem=None):
+    """Linhas da página `numero` (começando em 1), na ordem dada por `ordem` (posições) ou na original.
+
+    Só as linhas da página são copiadas, então o custo não depende do tamanho de df.
+    """
+    inicio = (numero - 1) * linhas_por_pagina
+    posicoes = np.arange(inicio, min(inicio + linhas_por_pagina, len(df))) if ordem is None \
+        else ordem[inicio:inicio + linhas_por_pagina]
+    linhas = df.iloc[posicoes]
+    return linhas if colunas is None else linhas[colunas]
+
+def blocos(df, colunas=None, ordem=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Percorre df em blocos de até `linhas_por_bloco` linhas, nas colunas e na ordem pedidas."""
+    total = len(df) if ordem is None else len(ordem)
+    for inicio in range(0, total, linhas_por_bloco):
+        bloco = df.iloc[inicio:inicio + linhas_por_bloco] if ordem is None \
+            else df.iloc[ordem[inicio:inicio + linhas_por_bloco]]
+        yield bloco if colunas is None else bloco[colunas]
+
+def exportar_csv(df, arquivo, colunas=None, ordem=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Grava df em CSV (UTF-8 com BOM, como o relatório consolidado), bloco a bloco."""
+    with open(arquivo, 'w', encoding='utf-8-sig', newline='') as f:
+        cabecalho = True
+        for bloco in blocos(df, colunas, ordem, linhas_por_bloco):
+            bloco.to_csv(f, index=False, header=cabecalho)
+            cabecalho = False
+        if cabecalho:  # sem linhas: grava só o cabeçalho
+            df.iloc[0:0].to_csv(f, index=False, columns=colunas)
+
+def exportar_xlsx(df, arquivo, colunas=None, ordem=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Grava df em XLSX com o modo write_only do openpyxl, que não mantém as células na memória.
+
+    Filtros com mais linhas do que cabem em uma planilha continuam em novas abas.
+    """
+    from openpyxl import Workbook
+
+    colunas = list(df.columns) if colunas is None else list(colunas)
+    workbook = Workbook(write_only=True)
+    aba, linhas_aba, numero_aba = None, 0, 0
+    for bloco in blocos(df, colunas, ordem, linhas_por_bloco):
+        # Notas em float32 passam pelo texto para não gravar o ruído da conversão (7.3 e não 7.300000190734863);
+        # valores ausentes viram células vazias
+        bloco = bloco.assign(**{col: bloco[col].to_numpy().astype(str).astype(np.float64)
+                                for col in bloco.columns if bloco[col].dtype == np.float32})
+        valores = bloco.astype(object).where(bloco.notna(), None)
+        for linha in valores.itertuples(index=False, name=None):
+            if aba is None or linhas_aba == LINHAS_POR_ABA_XLSX:
+                numero_aba += 1
+                aba = workbook.create_sheet('Dados' if numero_aba == 1 else f'Dados {numero_aba}')
+                aba.append(colunas)
+                linhas_aba = 1
+            aba.append(linha)
+            linhas_aba += 1
+    if aba is None:
+        workbook.create_sheet('Dados').append(colunas)
+    workbook.save(arquivo)
+
+def exportar_parquet(df, arquivo, colunas=None, ordem=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Grava df em Parquet, com um row group por bloco."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for bloco in blocos(df, colunas, ordem, linhas_por_bloco):
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(arquivo, tabela.schema)
+            writer.write_table(tabela.cast(writer.schema))
+        if writer is None:  # sem linhas: grava só o esquema
+            vazio = df.iloc[0:0] if colunas is None else df.iloc[0:0][colunas]
+            writer = pq.ParquetWriter(arquivo, pa.Schema.from_pandas(vazio, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+EXPORTADORES = {'CSV': exportar_csv, 'XLSX': exportar_xlsx, 'Parquet': exportar_parquet}
+
+def exportar(df, arquivo, formato, colunas=None, ordem=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Grava df em `arquivo` no formato pedido (uma das chaves de FORMATOS), em blocos de até `linhas_por_bloco` linhas."""
+    EXPORTADORES[formato](df, arquivo, colunas, ordem, linhas_por_bloco)
+
+def conteudo_exportacao(df, formato, colunas=None, ordem=None):
+    """Serializa df no formato pedido e retorna os bytes do arquivo, para o botão de download do painel.
+
+    A exportação é gravada em um arquivo temporário, em blocos; só o resultado final
+    fica na memória, sem as cópias intermediárias do DataFrame e do texto.
+    """
+    extensao, _ = FORMATOS[formato]
+    fd, caminho = tempfile.mkstemp(suffix=extensao)
+    os.close(fd)
+    try:
+        exportar(df, caminho, formato, colunas, ordem)
+        with open(caminho, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(caminho)
@@ -0,0 +1,144 @@
+import zipfile
+import xml.etree.ElementTree as ET
+import pandas as pd
+
+# Namespaces usados no content.xml de uma planilha OpenDocument.
+TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+
+TAG_TABLE = f'{{{TABLE_NS}}}table'
+TAG_ROW = f'{{{TABLE_NS}}}table-row'
+TAGS_CELL = (f'{{{TABLE_NS}}}table-cell', f'{{{TABLE_NS}}}covered-table-cell')
+TAG_SPACE = f'{{{TEXT_NS}}}s'
+TAG_ANNOTATION = f'{{{OFFICE_NS}}}annotation'
+
+ATTR_COLS_REPEATED = f'{{{TABLE_NS}}}number-columns-repeated'
+ATTR_ROWS_REPEATED = f'{{{TABLE_NS}}}number-rows-repeated'
+ATTR_VALUE_TYPE = f'{{{OFFICE_NS}}}value-type'
+ATTR_VALUE = f'{{{OFFICE_NS}}}value'
+ATTR_BOOLEAN_VALUE = f'{{{OFFICE_NS}}}boolean-value'
+ATTR_DATE_VALUE = f'{{{OFFICE_NS}}}date-value'
+ATTR_TIME_VALUE = f'{{{OFFICE_NS}}}time-value'
+ATTR_SPACES = f'{{{TEXT_NS}}}c'
+
+def _texto_celula(elemento):
+    """Extrai o texto de uma célula (ou fragmento), tratando <text:s> como espaços."""
+    partes = []
+    if elemento.text:
+        partes.append(elemento.text.strip('\n'))
+    for filho in elemento:
+        if filho.tag == TAG_SPACE:
+            partes.append(' ' * int(filho.get(ATTR_SPACES, 1)))
+        elif filho.tag != TAG_ANNOTATION:
+            partes.append(_texto_celula(filho))
+        if filho.tail:
+            partes.append(filho.tail.strip('\n'))
+    return ''.join(partes)
+
+def _valor_celula(celula):
+    """Decodifica o valor de uma célula seguindo as mesmas regras do leitor odf do pandas."""
+    tipo = celula.get(ATTR_VALUE_TYPE)
+    if tipo is None:
+        return None
+    if tipo == 'boolean':
+        return str(celula.get(ATTR_BOOLEAN_VALUE)).upper() == 'TRUE'
+    if tipo == 'float':
+        valor = float(celula.get(ATTR_VALUE))
+        return int(valor) if valor.is_integer() else valor
+    if tipo in ('percentage', 'currency'):
+        return float(celula.get(ATTR_VALUE))
+    if tipo == 'date':
+        return pd.Timestamp(celula.get(ATTR_DATE_VALUE))
+    if tipo == 'time':
+        return celula.get(ATTR_TIME_VALUE)
+    texto = _texto_celula(celula)
+    return texto if texto != '' else None
+
+def _ler_cabecalho(linha):
+    """Monta a lista de nomes da primeira linha, sem expandir as células vazias repetidas do final."""
+    cabecalho = []
+    vazias_pendentes = 0
+    for celula in linha:
+        if celula.tag not in TAGS_CELL:
+            continue
+        repeticoes = int(celula.get(ATTR_COLS_REPEATED, 1))
+        valor = _valor_celula(celula)
+        if valor is None:
+            vazias_pendentes += repeticoes
+            continue
+        for _ in range(vazias_pendentes):
+            cabecalho.append(f'Unnamed: {len(cabecalho)}')
+        vazias_pendentes = 0
+        cabecalho.extend([valor] * repeticoes)
+    return cabecalho
+
+def ler_ods(file_path, selecionar_colunas):
+    """Lê a primeira planilha de um arquivo .ods decodificando apenas as colunas necessárias.
+
+    O content.xml é percorrido de forma incremental. A primeira linha é usada como
+    cabeçalho e passada para `selecionar_colunas`, que devolve um dicionário
+    {nome da coluna no resultado: índice da coluna na planilha}. Das linhas seguintes,
+    só as células desses índices são decodificadas; atributos de repetição de linhas
+    e colunas são tratados sem expandir as células ignoradas. Linhas em que todas as
+    colunas selecionadas estão vazias são descartadas.
+    """
+    with zipfile.ZipFile(file_path) as ods, ods.open('content.xml') as content:
+        colunas = None
+        indices = None
+        dados = None
+        pilha = []
+        celulas_linha = {}
+        coluna_atual = 0
+
+        for evento, elemento in ET.iterparse(content, events=('start', 'end')):
+            if evento == 'start':
+                pilha.append(elemento)
+                if elemento.tag == TAG_ROW:
+                    celulas_linha = {}
+                    coluna_atual = 0
+                continue
+
+            pilha.pop()
+            tag = elemento.tag
+
+            if tag in TAGS_CELL and indices is not None and len(pilha) >= 1 and pilha[-1].tag == TAG_ROW:
+                repeticoes = int(elemento.get(ATTR_COLS_REPEATED, 1))
+                fim = coluna_atual + repeticoes
+                valor = None
+                decodificado = False
+                for posicao, indice in enumerate(indices):
+                    if coluna_atual <= indice < fim:
+                        if not decodificado:
+                            valor = _valor_celula(elemento)
+                            decodificado = True
+                        celulas_linha[posicao] = valor
+                coluna_atual = fim
+                elemento.clear()
+
+            elif tag == TAG_ROW:
+                if colunas is None:
+                    selecao = selecionar_colunas(_ler_cabecalho(elemento))
+                    colunas = list(selecao.keys())
+                    indices = list(selecao.values())
+                    dados = [[] for _ in colunas]
+                else:
+                    valores = [celulas_linha.get(posicao) for posicao in range(len(indices))]
+                    if any(valor is not None for valor in valores):
+                        repeticoes = int(elemento.get(ATTR_ROWS_REPEATED, 1))
+                        for posicao, valor in enumerate(valores):
+                            dados[posicao].extend([valor] * repeticoes)
+                elemento.clear()
+                if pilha:
+                    pilha[-1].remove(elemento)
+
+            elif tag == TAG_TABLE:
+                # Apenas a primeira planilha é lida, como no pd.read_excel padrão.
+                break
+
+    if colunas is None:
+        raise ValueError("A planilha não possui linha de cabeçalho.")
+    if not any(dados):
+        # Sem linhas, as colunas ficam como object, como no pd.read_excel (listas vazias virariam float64)
+        return pd.DataFrame(columns=colunas, dtype=object)
+    return pd.DataFrame(dict(zip(colunas, dados)), columns=colunas)
@@ -0,0 +1,450 @@
+import os
+import math
+import time
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+from dados import carregar_dados, COLUNAS_RELATORIO, OUTPUT_FOLDER
+from analise import NOTA_MINIMA
+from cache_renderizacao import CacheRenderizacao, hash_grupo
+from relatorio_pdf import (preparar_dados, textos_e_cores, escrever_linhas_tabela,
+                           COL_WIDTHS, HEADERS, ALTURA_LINHA)
+
+LIVRO_PATH = f'{OUTPUT_FOLDER}/livro_notas.pdf'
+
+# Incrementar sempre que o layout do livro mudar (ver cache de renderização).
+VERSAO_LIVRO = 1
+
+# Alturas (mm) dos elementos do livro. O sumário é escrito antes das seções, então
+# o número da página de cada seção é calculado a partir destas alturas.
+ALTURA_TITULO_SECAO = 10
+ALTURA_INFO_SECAO = 7
+LINHAS_INFO_SECAO = 3  # curso + duas linhas de estatísticas
+ESPACO_APOS_SECAO = 4
+ALTURA_CABECALHO_SECAO = ALTURA_TITULO_SECAO + LINHAS_INFO_SECAO * ALTURA_INFO_SECAO + ESPACO_APOS_SECAO
+ALTURA_TITULO_SUMARIO = 12
+ESPACO_APOS_SUMARIO = 4
+ALTURA_SUMARIO_CURSO = 8
+ALTURA_SUMARIO_DISCIPLINA = 6
+LARGURA_PAGINA_SUMARIO = 20
+
+# Máximo de linhas formatadas de uma vez (ver linhas_das_secoes).
+LINHAS_POR_BLOCO = 20_000
+
+def texto_pdf(texto):
+    """Recodifica um texto para latin-1, a codificação das fontes padrão do FPDF."""
+    return str(texto).encode('latin-1', 'replace').decode('latin-1')
+
+def formatar_media(valor):
+    """Formata uma média com duas casas decimais ('-' quando não há notas)."""
+    return '-' if pd.isna(valor) else f'{valor:.2f}'
+
+class PaginasEmDisco:
+    """Substitui o dicionário `pages` do FPDF mantendo em memória apenas a página atual.
+
+    O FPDF só escreve na última página aberta; quando uma nova página começa, o
+    conteúdo da anterior é gravado em um arquivo temporário e dela fica apenas a
+    posição no arquivo. As páginas são lidas de volta, uma de cada vez, ao montar o PDF.
+    """
+
+    def __init__(self):
+        self._arquivo = tempfile.TemporaryFile()
+        self._posicoes = {}
+        self._numero_atual = None
+        self._atual = ''
+
+    def _descarregar(self):
+        if self._numero_atual is None:
+            return
+        conteudo = self._atual.encode('latin-1')
+        self._arquivo.seek(0, os.SEEK_END)
+        self._posicoes[self._numero_atual] = (self._arquivo.tell(), len(conteudo))
+        self._arquivo.write(conteudo)
+        self._numero_atual = None
+        self._atual = ''
+
+    def __setitem__(self, numero, conteudo):
+        if numero != self._numero_atual:
+            self._descarregar()
+            self._numero_atual = numero
+        self._atual = conteudo
+
+    def __getitem__(self, numero):
+        if numero == self._numero_atual:
+            return self._atual
+        inicio, tamanho = self._posicoes[numero]
+        self._arquivo.seek(inicio)
+        return self._arquivo.read(tamanho).decode('latin-1')
+
+    def __contains__(self, numero):
+        return numero == self._numero_atual or numero in self._posicoes
+
+    def __len__(self):
+        return len(self._posicoes) + (self._numero_atual is not None)
+
+    def fechar(self):
+        self._arquivo.close()
+
+class SaidaEmArquivo:
+    """Substitui o `buffer` (str) do FPDF, gravando o PDF diretamente em um arquivo.
+
+    O FPDF usa apenas `buffer += texto` e `len(buffer)` (para as posições da tabela
+    xref), então basta acumular o número de bytes gravados.
+    """
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._tamanho = 0
+
+    def __iadd__(self, texto):
+        conteudo = texto.encode('latin-1')
+        self._arquivo.write(conteudo)
+        self._tamanho += len(conteudo)
+        return self
+
+    def __len__(self):
+        return self._tamanho
+
+class LivroPDF(FPDF):
+    """FPDF que grava as páginas em disco conforme são concluídas e escreve marcadores (outlines).
+
+    A versão 1.7 do FPDF não gera marcadores; eles são acrescentados aqui no mesmo
+    formato do script de outlines do FPDF original, com dois níveis (curso e disciplina).
+    Em vez de output(), use concluir(), que fecha o documento e move o arquivo
+    temporário para `caminho`.
+    """
+
+    def __init__(self, caminho):
+        super().__init__()
+        self.caminho = caminho
+        self.tmp_path = caminho + '.tmp'
+        self.set_auto_page_break(True, 20)
+        self.pages = PaginasEmDisco()
+        self._arquivo_saida = open(self.tmp_path, 'wb')
+        self.buffer = SaidaEmArquivo(self._arquivo_saida)
+        self.marcadores = []
+        self._raiz_marcadores = None
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    def marcar(self, titulo, nivel=0):
+        """Cria um marcador apontando para a posição atual da página atual."""
+        self.marcadores.append({'t': texto_pdf(titulo), 'l': nivel, 'y': self.y, 'p': self.page_no()})
+
+    def _putmarcadores(self):
+        if not self.marcadores:
+            return
+        total = len(self.marcadores)
+        ultimo_por_nivel = {}
+        nivel = 0
+        for i, marcador in enumerate(self.marcadores):
+            if marcador['l'] > 0:
+                pai = ultimo_por_nivel[marcador['l'] - 1]
+                marcador['pai'] = pai
+                self.marcadores[pai]['ultimo'] = i
+                if marcador['l'] > nivel:
+                    self.marcadores[pai]['primeiro'] = i
+            else:
+                marcador['pai'] = total
+            if marcador['l'] <= nivel and i > 0:
+                anterior = ultimo_por_nivel[marcador['l']]
+                self.marcadores[anterior]['proximo'] = i
+                marcador['anterior'] = anterior
+            ultimo_por_nivel[marcador['l']] = i
+            nivel = marcador['l']
+
+        n = self.n + 1
+        for marcador in self.marcadores:
+            self._newobj()
+            self._out('<</Title ' + self._textstring(marcador['t']))
+            self._out(f"/Parent {n + marcador['pai']} 0 R")
+            for chave, nome in (('anterior', 'Prev'), ('proximo', 'Next'), ('primeiro', 'First'), ('ultimo', 'Last')):
+                if chave in marcador:
+                    self._out(f'/{nome} {n + marcador[chave]} 0 R')
+            self._out('/Dest [%d 0 R /XYZ 0 %.2f null]' % (1 + 2 * marcador['p'], (self.h - marcador['y']) * self.k))
+            self._out('/Count 0>>')
+            self._out('endobj')
+        self._newobj()
+        self._raiz_marcadores = self.n
+        self._out(f'<</Type /Outlines /First {n} 0 R')
+        self._out(f'/Last {n + ultimo_por_nivel[0]} 0 R>>')
+        self._out('endobj')
+
+    def _putresources(self):
+        super()._putresources()
+        self._putmarcadores()
+
+    def _putcatalog(self):
+        super()._putcatalog()
+        if self._raiz_marcadores is not None:
+            self._out(f'/Outlines {self._raiz_marcadores} 0 R')
+            self._out('/PageMode /UseOutlines')
+
+    def concluir(self):
+        """Fecha o documento e publica o arquivo de forma atômica."""
+        try:
+            self.close()
+        finally:
+            self._arquivo_saida.close()
+            self.pages.fechar()
+        os.replace(self.tmp_path, self.caminho)
+
+    def descartar(self):
+        """Abandona o documento, apagando o arquivo temporário."""
+        self._arquivo_saida.close()
+        self.pages.fechar()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+def paginas_secao(n_linhas, topo, limite):
+    """Número de páginas de uma seção, reproduzindo as quebras de escrever_linhas_tabela.
+
+    A seção começa em uma nova página com o cabeçalho da seção e a linha de títulos
+    da tabela; cada página seguinte repete apenas a linha de títulos.
+    """
+    cabem_primeira = int((limite - (topo + ALTURA_CABECALHO_SECAO + ALTURA_LINHA)) // ALTURA_LINHA)
+    cabem_demais = int((limite - (topo + ALTURA_LINHA)) // ALTURA_LINHA)
+    restantes = max(0, n_linhas - cabem_primeira)
+    return 1 + math.ceil(restantes / cabem_demais)
+
+def paginas_linhas(alturas, y_inicial, topo, limite):
+    """Página relativa (0, 1, ...) de cada linha de altura variável, com quebras iguais às do FPDF.
+
+    Retorna a lista de páginas e o número total de páginas.
+    """
+    paginas = []
+    pagina = 0
+    y = y_inicial
+    for altura in alturas:
+        if y + altura > limite:
+            pagina += 1
+            y = topo
+        paginas.append(pagina)
+        y += altura
+    return paginas, pagina + 1
+
+def resumo_secoes(df):
+    """Estatísticas de cada seção (curso, disciplina), em um único groupby."""
+    grupos = df.assign(aprovado=df['status'] == 'Aprovado').groupby(['curso', 'disciplina'], observed=True, sort=True)
+    resumo = grupos.agg(
+        alunos=('aluno', 'size'),
+        aprovados=('aprovado', 'sum'),
+        media=('media_final', 'mean'),
+        media_av1=('av1', 'mean'),
+        media_av2=('av2', 'mean'),
+    )
+    resumo['reprovados'] = resumo['alunos'] - resumo['aprovados']
+    return resumo
+
+def linhas_das_secoes(df, alunos_por_secao, nota_minima=NOTA_MINIMA):
+    """Gera, na ordem das seções, os textos e as cores das linhas da tabela de cada uma.
+
+    Formatar uma seção por vez custa várias operações do pandas por seção, o que
+    domina o tempo quando as turmas são pequenas. As linhas são ordenadas uma única
+    vez (por seção e pela média final, decrescente) e formatadas em blocos de seções
+    consecutivas com até LINHAS_POR_BLOCO linhas, o que também limita a memória.
+    """
+    secao = df.groupby(['curso', 'disciplina'], observed=True, sort=True).ngroup().to_numpy()
+    ordem = np.lexsort((-df['media_final'].to_numpy(dtype=np.float64), secao))
+    colunas = df[['aluno', 'av1', 'av2', 'media_final', 'status']]
+    limites = np.concatenate([[0], np.cumsum(alunos_por_secao)])
+    inicio = 0
+    while inicio < len(alunos_por_secao):
+        fim = inicio + 1
+        while fim < len(alunos_por_secao) and limites[fim + 1] - limites[inicio] <= LINHAS_POR_BLOCO:
+            fim += 1
+        linhas, vermelhos = textos_e_cores(colunas.take(ordem[limites[inicio]:limites[fim]]), nota_minima)
+        for i in range(inicio, fim):
+            a, b = limites[i] - limites[inicio], limites[i + 1] - limites[inicio]
+            yield linhas[a:b], vermelhos[a:b]
+        inicio = fim
+
+def _ajustar(pdf, texto, largura):
+    """Encurta um texto com reticências para que caiba na largura informada."""
+    if pdf.get_string_width(texto) <= largura:
+        return texto
+    while texto and pdf.get_string_width(texto + '...') > largura:
+        texto = texto[:-1]
+    return texto + '...'
+
+def escrever_capa(pdf, resumo):
+    """Escreve a capa com os totais do livro."""
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 20)
+    pdf.ln(60)
+    pdf.cell(0, 15, 'Livro de Notas', 0, 1, 'C')
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, texto_pdf(f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}"), 0, 1, 'C')
+    pdf.ln(10)
+    cursos = resumo.index.get_level_values('curso').nunique()
+    alunos = int(resumo['alunos'].sum())
+    aprovados = int(resumo['aprovados'].sum())
+    percentual = 100 * aprovados / alunos if alunos else 0.0
+    for linha in (f'Cursos: {cursos}', f'Disciplinas: {len(resumo)}', f'Registros de notas: {alunos}',
+                  f'Aprovação geral: {percentual:.1f}%'):
+        pdf.cell(0, 8, texto_pdf(linha), 0, 1, 'C')
+
+def escrever_sumario(pdf, entradas, pagina_inicial):
+    """Escreve o sumário. `entradas` são tuplas (nível, título, página, link) já planejadas."""
+    pdf.add_page()
+    if pdf.page_no() != pagina_inicial:
+        raise RuntimeError(f"Sumário planejado para a página {pagina_inicial}, mas começou na {pdf.page_no()}.")
+    pdf.marcar('Sumário')
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, ALTURA_TITULO_SUMARIO, texto_pdf('Sumário'), 0, 1, 'C')
+    pdf.ln(ESPACO_APOS_SUMARIO)
+    largura_titulo = pdf.w - pdf.l_margin - pdf.r_margin - LARGURA_PAGINA_SUMARIO
+    for nivel, titulo, pagina, link in entradas:
+        altura = ALTURA_SUMARIO_CURSO if nivel == 0 else ALTURA_SUMARIO_DISCIPLINA
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            pdf.add_page()
+        if nivel == 0:
+            pdf.set_font('Arial', 'B', 11)
+            recuo = 0
+        else:
+            pdf.set_font('Arial', '', 10)
+            recuo = 6
+        pdf.set_x(pdf.l_margin + recuo)
+        pdf.cell(largura_titulo - recuo, altura, _ajustar(pdf, texto_pdf(titulo), largura_titulo - recuo - 2),
+                 0, 0, 'L', link=link)
+        pdf.cell(LARGURA_PAGINA_SUMARIO, altura, str(pagina), 0, 1, 'R', link=link)
+
+def escrever_secao(pdf, linhas, vermelhos, curso, disciplina, estatisticas, pagina_planejada, link, novo_curso):
+    """Escreve uma seção do livro (uma disciplina de um curso) a partir de uma nova página."""
+    pdf.add_page()
+    if pdf.page_no() != pagina_planejada:
+        raise RuntimeError(f"Seção '{curso} / {disciplina}' planejada para a página {pagina_planejada}, "
+                           f"mas começou na {pdf.page_no()}.")
+    pdf.set_link(link)
+    if novo_curso:
+        pdf.marcar(curso, 0)
+    pdf.marcar(disciplina, 1)
+
+    alunos = int(estatisticas['alunos'])
+    aprovados = int(estatisticas['aprovados'])
+    percentual = 100 * aprovados / alunos if alunos else 0.0
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, ALTURA_TITULO_SECAO, texto_pdf(disciplina), 0, 1, 'L')
+    pdf.set_font('Arial', '', 11)
+    for linha in (
+        f'Curso: {curso}',
+        f"Alunos: {alunos}   Aprovados: {aprovados} ({percentual:.1f}%)   Reprovados: {int(estatisticas['reprovados'])}",
+        f"Média final da turma: {formatar_media(estatisticas['media'])}   "
+        f"Média AV1: {formatar_media(estatisticas['media_av1'])}   Média AV2: {formatar_media(estatisticas['media_av2'])}",
+    ):
+        pdf.cell(0, ALTURA_INFO_SECAO, texto_pdf(linha), 0, 1, 'L')
+    pdf.ln(ESPACO_APOS_SECAO)
+
+    escrever_linhas_tabela(pdf, linhas, vermelhos)
+
+def escrever_livro(df, caminho, nota_minima=NOTA_MINIMA):
+    """Escreve o livro de notas de `df` (colunas de preparar_dados) em `caminho` e retorna o número de páginas.
+
+    O número de páginas de cada seção é calculado antes de desenhá-la, o que permite
+    escrever o sumário no início do livro em uma única passada. Cada página concluída
+    vai para um arquivo temporário e o PDF final é gravado direto em disco, então a
+    memória usada não cresce com o número de seções.
+    """
+    resumo = resumo_secoes(df)
+    pdf = LivroPDF(caminho)
+    try:
+        topo = pdf.t_margin
+        limite = pdf.page_break_trigger
+
+        # Planejamento: página de cada seção e de cada entrada do sumário
+        entradas = []
+        cursos_vistos = set()
+        for curso, disciplina in resumo.index:
+            if curso not in cursos_vistos:
+                cursos_vistos.add(curso)
+                entradas.append((0, curso))
+            entradas.append((1, disciplina))
+        alturas = [ALTURA_SUMARIO_CURSO if nivel == 0 else ALTURA_SUMARIO_DISCIPLINA for nivel, _ in entradas]
+        _, paginas_sumario = paginas_linhas(alturas, topo + ALTURA_TITULO_SUMARIO + ESPACO_APOS_SUMARIO, topo, limite)
+
+        pagina_sumario = 2  # a capa ocupa a página 1
+        pagina = pagina_sumario + paginas_sumario
+        paginas = []
+        for alunos in resumo['alunos']:
+            paginas.append(pagina)
+            pagina += paginas_secao(int(alunos), topo, limite)
+
+        links = [pdf.add_link() for _ in paginas]
+        entradas_sumario = []
+        secao = 0
+        for nivel, titulo in entradas:
+            # Um curso aponta para a sua primeira disciplina
+            entradas_sumario.append((nivel, titulo, paginas[secao], links[secao]))
+            if nivel == 1:
+                secao += 1
+
+        escrever_capa(pdf, resumo)
+        escrever_sumario(pdf, entradas_sumario, pagina_sumario)
+
+        secoes = linhas_das_secoes(df, resumo['alunos'].to_numpy(), nota_minima)
+        curso_anterior = None
+        for i, ((curso, disciplina), estatisticas) in enumerate(resumo.iterrows()):
+            linhas, vermelhos = next(secoes)
+            escrever_secao(pdf, linhas, vermelhos, curso, disciplina, estatisticas, paginas[i], links[i],
+                           novo_curso=curso != curso_anterior)
+            curso_anterior = curso
+        total_paginas = pdf.page_no()
+        pdf.concluir()
+    except BaseException:
+        pdf.descartar()
+        raise
+    return total_paginas
+
+def chave_renderizacao(df, nota_minima=NOTA_MINIMA):
+    """Hash dos dados e do layout do livro, usado pelo cache de renderização."""
+    parametros = {
+        'versao_livro': VERSAO_LIVRO,
+        'larguras': COL_WIDTHS,
+        'titulos': HEADERS,
+        'altura_linha': ALTURA_LINHA,
+        'nota_minima': nota_minima,
+    }
+    return hash_grupo(df, parametros)
+
+def gerar_livro(caminho=LIVRO_PATH, curso=None, disciplina=None, forcar=False, nota_minima=NOTA_MINIMA):
+    """Gera um único PDF com todos os cursos e disciplinas (ou apenas os filtrados).
+
+    O livro só é desenhado de novo quando os dados mudam, a menos que forcar=True.
+    """
+    df = carregar_dados(COLUNAS_RELATORIO, curso=curso, disciplina=disciplina)
+    if df is None:
+        print("Erro: o relatório consolidado não foi encontrado na pasta 'output'.")
+        print("Por favor, execute o script de consolidação de relatórios primeiro.")
+        return None
+    df = preparar_dados(df, nota_minima)
+    if df.empty:
+        print("Nenhum dado para gerar o livro.")
+        return None
+
+    pasta = os.path.dirname(caminho) or '.'
+    os.makedirs(pasta, exist_ok=True)
+    # Manifesto próprio: o livro não deve ser tratado como PDF obsoleto pelo modo em lote
+    cache = CacheRenderizacao(pasta, 'livro')
+    chave = chave_renderizacao(df, nota_minima)
+    if not forcar and cache.valido(caminho, chave):
+        cache.salvar_manifesto()
+        print(f"Livro sem alteração: {caminho}")
+        return caminho
+
+    inicio = time.perf_counter()
+    paginas = escrever_livro(df, caminho, nota_minima)
+    total = time.perf_counter() - inicio
+    cache.registrar(caminho, chave)
+    cache.salvar_manifesto()
+    print(f"Livro de notas salvo em: {caminho}")
+    print(f"{paginas} página(s) em {total:.2f}s ({paginas / total:,.0f} páginas/s)")
+    return caminho
@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog não instalado: usa apenas a verificação periódica
+    Observer = None
+    FileSystemEventHandler = object
+
+# Tempo sem novas alterações antes de consolidar: uma cópia de vários arquivos
+# (ou um arquivo grande sendo gravado) gera uma rajada de eventos.
+ESPERA_PADRAO = 2.0
+# Intervalo entre as varreduras da pasta quando não há watchdog/inotify.
+INTERVALO_POLLING = 2.0
+
+def _planilha(caminho):
+    """Indica se o caminho é uma planilha .ods (ignorando os arquivos de trava do LibreOffice)."""
+    nome = os.path.basename(caminho)
+    return nome.endswith('.ods') and not nome.startswith('.~lock.')
+
+def retrato_pasta(pasta):
+    """Mapeia cada planilha .ods da pasta para (mtime, tamanho)."""
+    retrato = {}
+    try:
+        entradas = list(os.scandir(pasta))
+    except FileNotFoundError:
+        return retrato
+    for entrada in entradas:
+        if not _planilha(entrada.name):
+            continue
+        try:
+            stat = entrada.stat()
+        except FileNotFoundError:  # removido durante a varredura
+            continue
+        retrato[entrada.name] = (stat.st_mtime_ns, stat.st_size)
+    return retrato
+
+def diferencas(anterior, atual):
+    """Lista os nomes de planilhas criadas, alteradas ou removidas entre dois retratos."""
+    nomes = set(anterior) | set(atual)
+    return sorted(nome for nome in nomes if anterior.get(nome) != atual.get(nome))
+
+class _Sinalizador(FileSystemEventHandler):
+    """Registra os eventos de planilhas .ods recebidos do watchdog."""
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.alterados = set()
+        self.ultimo_evento = 0.0
+        self.evento = threading.Event()
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'deleted', 'moved', 'closed'):
+            return
+        caminhos = [event.src_path, getattr(event, 'dest_path', '')]
+        nomes = [os.path.basename(c) for c in caminhos if c and _planilha(c)]
+        if not nomes:
+            return
+        with self.trava:
+            self.alterados.update(nomes)
+            self.ultimo_evento = time.monotonic()
+        self.evento.set()
+
+    def aguardar(self, espera):
+        """Bloqueia até haver alterações e mais `espera` segundos sem eventos; retorna os nomes alterados."""
+        # wait com timeout para que o Ctrl+C seja atendido também no Windows
+        while not self.evento.wait(1):
+            pass
+        while True:
+            with self.trava:
+                restante = self.ultimo_evento + espera - time.monotonic()
+                if restante <= 0:
+                    alterados = self.alterados
+                    self.alterados = set()
+                    self.evento.clear()
+                    return sorted(alterados)
+            time.sleep(min(restante, espera))
+
+def _aguardar_polling(pasta, retrato, espera, intervalo):
+    """Varre a pasta até encontrar alterações estáveis por `espera` segundos.
+
+    Retorna os nomes alterados e o novo retrato da pasta.
+    """
+    while True:
+        time.sleep(intervalo)
+        atual = retrato_pasta(pasta)
+        if atual == retrato:
+            continue
+        # Espera a pasta parar de mudar antes de consolidar
+        while True:
+            time.sleep(espera)
+            estavel = retrato_pasta(pasta)
+            if estavel == atual:
+                break
+            atual = estavel
+        return diferencas(retrato, atual), atual
+
+def _consolidar_com_seguranca(consolidar_pasta):
+    """Executa a consolidação sem deixar que um erro (ex.: arquivo removido durante a leitura) encerre a observação."""
+    try:
+        consolidar_pasta()
+    except Exception as e:
+        print(f"Erro ao consolidar: {e}. Nova tentativa na próxima alteração.")
+
+def observar(input_folder='inputs_ods', consolidar_pasta=None, espera=ESPERA_PADRAO,
+             intervalo=INTERVALO_POLLING, polling=False):
+    """Observa input_folder e chama consolidar_pasta() sempre que planilhas .ods mudam.
+
+    Usa o watchdog (inotify no Linux) quando disponível; caso contrário, ou com
+    polling=True, compara a pasta a cada `intervalo` segundos. Alterações em rajada
+    são agrupadas: a consolidação só começa após `espera` segundos sem novos eventos.
+    Executa uma consolidação inicial e segue até ser interrompido (Ctrl+C).
+    """
+    os.makedirs(input_folder, exist_ok=True)
+    _consolidar_com_seguranca(consolidar_pasta)
+
+    observador = None
+    if Observer is not None and not polling:
+        sinalizador = _Sinalizador()
+        observador = Observer()
+        observador.schedule(sinalizador, input_folder, recursive=False)
+        observador.start()
+        print(f"\nObservando '{input_folder}' (watchdog). Pressione Ctrl+C para encerrar.")
+    else:
+        retrato = retrato_pasta(input_folder)
+        print(f"\nObservando '{input_folder}' (verificação a cada {intervalo:g}s). Pressione Ctrl+C para encerrar.")
+
+    try:
+        while True:
+            if observador is not None:
+                alterados = sinalizador.aguardar(espera)
+            else:
+                alterados, retrato = _aguardar_polling(input_folder, retrato, espera, intervalo)
+            print(f"\n{len(alterados)} planilha(s) alterada(s): {', '.join(alterados)}")
+            _consolidar_com_seguranca(consolidar_pasta)
+    except KeyboardInterrupt:
+        print("\nObservação encerrada.")
+    finally:
+        if observador is not None:
+            observador.stop()
+            observador.join()
@@ -0,0 +1,93 @@
+import os
+
+# Opções de linha de comando de relatorio.py (e dos scripts relatorio_pdf.py e
+# relatorio_png.py), com os valores padrão que a ajuda mostra. Este módulo usa
+# apenas a biblioteca padrão: a CLI registra as opções de todos os subcomandos sem
+# importar pandas, pyarrow ou matplotlib, que ficam para o subcomando executado.
+# Por isso os padrões abaixo são definidos aqui e importados pelos módulos que os usam.
+
+# Pasta dos relatórios gerados (ver dados.py).
+OUTPUT_FOLDER = 'output'
+# Regra de aprovação usada em todo o projeto (painel, PDFs, gráficos e histórico do aluno).
+NOTA_MINIMA = 6.0
+# Resolução dos gráficos em PNG.
+DPI = 300
+# Planilhas por lote da consolidação distribuída (ver distribuido.py).
+ARQUIVOS_POR_LOTE = 50
+# Prazo, em segundos, de uma reivindicação sem renovação; deve cobrir a planilha mais lenta.
+PRAZO_PADRAO = 300
+
+def configurar_consolidacao(parser):
+    """Adiciona ao parser as opções de consolidação."""
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Número de processos para ler as planilhas em paralelo (padrão: número de CPUs; 1 = serial).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora o cache de consolidação e reprocessa todas as planilhas.")
+    parser.add_argument('--perfil', action='store_true',
+                        help="Mede o tempo e a memória de cada etapa e grava o perfil em output/perfil "
+                             "(também ativado com RELATORIO_PERFIL=1).")
+    parser.add_argument('--watch', action='store_true',
+                        help="Continua em execução e consolida novamente sempre que planilhas de inputs_ods "
+                             "forem criadas, alteradas ou removidas.")
+    parser.add_argument('--polling', action='store_true',
+                        help="Com --watch, verifica a pasta periodicamente em vez de usar o watchdog/inotify.")
+
+def configurar_cache_renderizacao(parser):
+    """Adiciona ao parser as opções do cache de renderização (comuns ao PDF e ao PNG)."""
+    parser.add_argument('--force', action='store_true',
+                        help="No modo em lote, desenha todos os grupos novamente, mesmo os que não mudaram.")
+    parser.add_argument('--remover-obsoletos', action='store_true',
+                        help="Apaga os arquivos gerados para cursos/disciplinas que não existem mais nos dados "
+                             "(apenas com --all, sem filtros).")
+    parser.add_argument('--expirar-dias', type=float, metavar='DIAS',
+                        help="Apaga do cache e da pasta output os arquivos não usados há mais de DIAS dias.")
+
+def configurar_pdf(parser):
+    """Adiciona ao parser as opções de geração de PDF."""
+    parser.add_argument('--all', action='store_true',
+                        help="Gera os PDFs de todos os cursos e disciplinas, sem menu interativo.")
+    parser.add_argument('--curso', help="Gera apenas os PDFs deste curso (nome completo).")
+    parser.add_argument('--disciplina', help="Gera apenas os PDFs desta disciplina (nome completo).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Número de processos usados no modo em lote (padrão: número de CPUs).")
+    parser.add_argument('--livro', nargs='?', const='', metavar='CAMINHO',
+                        help="Gera um único PDF com todos os cursos e disciplinas (respeitando --curso/--disciplina), "
+                             "com sumário e marcadores (padrão: output/livro_notas.pdf).")
+    parser.add_argument('--nota-minima', type=float, default=NOTA_MINIMA,
+                        help=f"Média final mínima para aprovação; notas abaixo dela saem em vermelho (padrão: {NOTA_MINIMA:g}).")
+    configurar_cache_renderizacao(parser)
+
+def configurar_png(parser):
+    """Adiciona ao parser as opções de geração de gráficos."""
+    parser.add_argument('--all', action='store_true',
+                        help="Gera os gráficos de todos os cursos e disciplinas, sem menu interativo.")
+    parser.add_argument('--curso', help="Gera apenas os gráficos deste curso (nome completo).")
+    parser.add_argument('--disciplina', help="Gera apenas os gráficos desta disciplina (nome completo).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de processos usados no modo em lote (padrão: 1, uma única figura reaproveitada).")
+    parser.add_argument('--dpi', type=int, default=DPI,
+                        help=f"Resolução dos gráficos (padrão: {DPI}). Valores menores geram mais gráficos por minuto, "
+                             "com menos qualidade; o cache só reaproveita gráficos feitos com a mesma resolução.")
+    configurar_cache_renderizacao(parser)
+
+def configurar_shard(parser):
+    """Adiciona ao parser as opções do coordenador da consolidação distribuída."""
+    parser.add_argument('--fila', required=True, help="Pasta compartilhada da fila (fila.sqlite e parciais/).")
+    parser.add_argument('--entrada', default='inputs_ods', help="Pasta com as planilhas .ods (padrão: inputs_ods).")
+    parser.add_argument('--arquivos-por-lote', type=int, default=ARQUIVOS_POR_LOTE,
+                        help=f"Planilhas por lote (padrão: {ARQUIVOS_POR_LOTE}).")
+
+def configurar_work(parser):
+    """Adiciona ao parser as opções dos trabalhadores da consolidação distribuída."""
+    parser.add_argument('--fila', required=True, help="Pasta compartilhada da fila.")
+    parser.add_argument('--entrada', default=None,
+                        help="Pasta das planilhas nesta máquina, se diferente da registrada pelo coordenador.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processos locais para as planilhas de cada lote (padrão: número de CPUs).")
+    parser.add_argument('--prazo', type=float, default=PRAZO_PADRAO,
+                        help=f"Segundos sem renovação até o lote voltar para a fila (padrão: {PRAZO_PADRAO}).")
+
+def configurar_merge(parser):
+    """Adiciona ao parser as opções da junção da consolidação distribuída."""
+    parser.add_argument('--fila', required=True, help="Pasta compartilhada da fila.")
+    parser.add_argument('--saida', default=OUTPUT_FOLDER, help=f"Pasta do relatório consolidado (padrão: {OUTPUT_FOLDER}).")
@@ -0,0 +1,168 @@
+import os
+import sys
+import csv
+import json
+import time
+import contextlib
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Ativa a instrumentação também em processos filhos e em execuções pelo painel.
+VARIAVEL_AMBIENTE = 'RELATORIO_PERFIL'
+PERFIL_JSON = 'ultimo_perfil.json'
+PERFIL_CSV = 'ultimo_perfil.csv'
+
+# Contexto vazio reutilizado quando a instrumentação está desligada: o custo de
+# `with perfil.etapa(...)` fica restrito a uma chamada de função.
+_NULO = contextlib.nullcontext()
+
+_ativo = os.environ.get(VARIAVEL_AMBIENTE) == '1'
+_registros = []
+_arquivo_atual = None
+
+def ativo():
+    return _ativo
+
+def ativar():
+    """Liga a instrumentação neste processo e nos processos filhos."""
+    global _ativo
+    _ativo = True
+    os.environ[VARIAVEL_AMBIENTE] = '1'
+
+def reiniciar():
+    """Descarta as medições acumuladas."""
+    global _registros
+    _registros = []
+
+def _pico_rss_kb():
+    """Pico de memória residente do processo desde o seu início, em KB (None onde não há suporte).
+
+    É o máximo acumulado (ru_maxrss), e não o uso de uma etapa: só cresce quando o
+    processo atinge um novo máximo.
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS ru_maxrss é medido em bytes; no Linux, em KB
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+@contextlib.contextmanager
+def _medir(nome, arquivo):
+    registro = {'arquivo': arquivo, 'etapa': nome, 'linhas': None}
+    pico_inicial = _pico_rss_kb()
+    inicio_wall = time.perf_counter()
+    inicio_cpu = time.process_time()
+    try:
+        yield registro
+    finally:
+        registro['wall_s'] = time.perf_counter() - inicio_wall
+        registro['cpu_s'] = time.process_time() - inicio_cpu
+        registro['pico_rss_kb'] = _pico_rss_kb()
+        # Quanto a etapa elevou o pico do processo: só a etapa que ultrapassa o máximo
+        # anterior tem acréscimo, as demais ficam com zero.
+        registro['acrescimo_pico_kb'] = None if pico_inicial is None else registro['pico_rss_kb'] - pico_inicial
+        _registros.append(registro)
+
+def etapa(nome):
+    """Mede uma etapa (tempo de parede, tempo de CPU e acréscimo no pico de memória) do arquivo atual."""
+    if not _ativo:
+        return _NULO
+    return _medir(nome, _arquivo_atual)
+
+@contextlib.contextmanager
+def _medir_arquivo(arquivo):
+    global _arquivo_atual
+    _arquivo_atual = arquivo
+    try:
+        with _medir('total', arquivo) as registro:
+            yield registro
+    finally:
+        _arquivo_atual = None
+
+def arquivo(nome):
+    """Agrupa as etapas seguintes sob um arquivo e mede o tempo total dele (etapa 'total')."""
+    if not _ativo:
+        return _NULO
+    return _medir_arquivo(nome)
+
+def registrar_linhas(registro, linhas):
+    """Anota o número de linhas produzidas no registro devolvido por arquivo()."""
+    if registro is not None:
+        registro['linhas'] = linhas
+
+def coletar():
+    """Retorna e descarta as medições acumuladas (usado para enviá-las de um worker ao processo principal)."""
+    registros = list(_registros)
+    reiniciar()
+    return registros
+
+def incorporar(registros):
+    """Acrescenta medições vindas de outro processo."""
+    _registros.extend(registros)
+
+def resumo(top=10):
+    """Totais por etapa, maior pico de memória de um processo e os `top` arquivos mais lentos."""
+    etapas = {}
+    for registro in _registros:
+        if registro['arquivo'] is not None and registro['etapa'] == 'total':
+            continue
+        total = etapas.setdefault(registro['etapa'], {'etapa': registro['etapa'], 'wall_s': 0.0, 'cpu_s': 0.0,
+                                                      'acrescimo_pico_kb': 0, 'chamadas': 0})
+        total['wall_s'] += registro['wall_s']
+        total['cpu_s'] += registro['cpu_s']
+        total['acrescimo_pico_kb'] += registro.get('acrescimo_pico_kb') or 0
+        total['chamadas'] += 1
+
+    arquivos = [r for r in _registros if r['arquivo'] is not None and r['etapa'] == 'total']
+    arquivos.sort(key=lambda r: r['wall_s'], reverse=True)
+    picos = [r['pico_rss_kb'] for r in _registros if r['pico_rss_kb'] is not None]
+    return {
+        'etapas': sorted(etapas.values(), key=lambda e: e['wall_s'], reverse=True),
+        'mais_lentos': [
+            {'arquivo': r['arquivo'], 'wall_s': r['wall_s'], 'cpu_s': r['cpu_s'], 'linhas': r['linhas']}
+            for r in arquivos[:top]
+        ],
+        'arquivos': len(arquivos),
+        'pico_rss_kb': max(picos) if picos else None,
+    }
+
+def salvar(pasta, top=10):
+    """Grava o perfil da execução em JSON e CSV dentro de `pasta` e imprime o resumo."""
+    os.makedirs(pasta, exist_ok=True)
+    dados_resumo = resumo(top)
+    with open(os.path.join(pasta, PERFIL_JSON), 'w', encoding='utf-8') as f:
+        json.dump({
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'resumo': dados_resumo,
+            'registros': _registros,
+        }, f, ensure_ascii=False, indent=2)
+
+    with open(os.path.join(pasta, PERFIL_CSV), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['arquivo', 'etapa', 'wall_s', 'cpu_s', 'pico_rss_kb', 'acrescimo_pico_kb',
+                                               'linhas'])
+        writer.writeheader()
+        writer.writerows(_registros)
+
+    print("\n--- Perfil da execução ---")
+    for total in dados_resumo['etapas']:
+        print(f"{total['etapa']:20s} {total['wall_s']:9.3f}s parede  {total['cpu_s']:9.3f}s CPU  "
+              f"+{total['acrescimo_pico_kb'] / 1024:7.1f} MB no pico  ({total['chamadas']} chamada(s))")
+    if dados_resumo['pico_rss_kb'] is not None:
+        print(f"Maior pico de memória de um processo: {dados_resumo['pico_rss_kb'] / 1024:.1f} MB")
+    if dados_resumo['mais_lentos']:
+        print(f"\nArquivos mais lentos (top {top}):")
+        for item in dados_resumo['mais_lentos']:
+            print(f"{item['wall_s']:9.3f}s  {item['linhas'] or 0:6d} linhas  {item['arquivo']}")
+    print(f"Perfil salvo em: {os.path.join(pasta, PERFIL_JSON)}")
+
+def carregar_ultimo(pasta):
+    """Lê o último perfil gravado em `pasta`, ou None se não houver."""
+    try:
+        with open(os.path.join(pasta, PERFIL_JSON), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
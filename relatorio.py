@@ -1,12 +1,45 @@
 import os
-import pandas as pd
+import io
+import sys
+import argparse
+import contextlib
+import threading
+import multiprocessing
 import re
 import ast
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+import perfil
+import esquemas
+import opcoes
+from opcoes import OUTPUT_FOLDER
 
-def get_report_map():
+# O pandas e os módulos que dependem dele são importados nas funções que os usam, para
+# que a CLI inicie sem eles; cada subcomando importa só o que precisa (ver main).
+
+# Colunas do relatório consolidado, na ordem em que são gravadas.
+COLUNAS_FINAIS = ['Curso', 'Disciplina', 'Aluno', 'AV1', 'AV2', 'MediaFinal', 'Identificador']
+
+# Colunas opcionais do Moodle que identificam o aluno entre cursos, em ordem de
+# preferência (o e-mail é o mesmo em todas as disciplinas; o número de
+# identificação costuma vir vazio).
+COLUNAS_IDENTIFICADOR = {
+    'Email': ('Endereço de email', 'Email address'),
+    'NumeroId': ('Número de identificação', 'ID number'),
+}
+
+def get_report_map(path='projeto.md', cache_dir=None):
+    """Retorna o REPORT_MAP do projeto.md, recompilado apenas quando o arquivo muda.
+
+    Com cache_dir, o dicionário compilado também é guardado em disco entre execuções.
+    """
+    return esquemas.report_map_em_cache(path, compilar_report_map, cache_dir)
+
+def compilar_report_map(path='projeto.md'):
     """Lê o arquivo projeto.md e extrai o dicionário REPORT_MAP."""
     try:
-        with open('projeto.md', 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             content = f.read()
         # Extrai o conteúdo do bloco de código python
         python_code_block = re.search(r'```python(.*?)```', content, re.DOTALL)
@@ -23,97 +56,351 @@ def get_report_map():
         print(f"Erro ao ler e processar o arquivo projeto.md: {e}")
     return None
 
-def clean_col_names(df):
-    """Limpa e padroniza os nomes das colunas de um DataFrame."""
-    new_columns = {}
-    for col in df.columns:
-        try:
-            new_col = col.encode('latin1').decode('utf-8')
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            new_col = col
-        new_col = re.sub(r'Questionrio:|Frum:', '', new_col)
-        new_col = re.sub(r'\(Real\)', '', new_col)
-        new_col = new_col.strip()
-        new_columns[col] = new_col
-    df = df.rename(columns=new_columns)
-    return df
+def limpar_nome_coluna(col):
+    """Corrige a codificação e remove prefixos/sufixos do Moodle de um nome de coluna."""
+    try:
+        new_col = col.encode('latin1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        new_col = col
+    new_col = re.sub(r'Questionrio:|Frum:', '', new_col)
+    new_col = re.sub(r'\(Real\)', '', new_col)
+    return new_col.strip()
+
+def resolver_colunas(cabecalho):
+    """Localiza no cabeçalho bruto da planilha as colunas usadas no relatório.
+
+    Retorna um dicionário {nome padronizado: índice da coluna}, no formato esperado por ler_ods.
+    """
+    with perfil.etapa('limpeza_colunas'):
+        nomes = [limpar_nome_coluna(str(col)) for col in cabecalho]
+
+    with perfil.etapa('descoberta_colunas'):
+        n1_idx = [i for i, col in enumerate(nomes) if 'AVALIAÇÃO 01' in col and 'total' not in col][0]
+        n2_idx = [i for i, col in enumerate(nomes) if 'AVALIAÇÃO 02' in col and 'total' not in col][0]
+        media_idx = [i for i, col in enumerate(nomes) if 'Média da Disciplina' in col][0]
+
+    colunas = {
+        'Nome': nomes.index('Nome'),
+        'Sobrenome': nomes.index('Sobrenome'),
+        'AV1': n1_idx,
+        'AV2': n2_idx,
+        'MediaFinal': media_idx,
+    }
+    for chave, alternativas in COLUNAS_IDENTIFICADOR.items():
+        encontrada = next((nomes.index(nome) for nome in alternativas if nome in nomes), None)
+        if encontrada is not None:
+            colunas[chave] = encontrada
+    return colunas
+
+def montar_identificador(df):
+    """Identificador do aluno no Moodle: o e-mail (em minúsculas) ou, na falta dele, o número de identificação.
+
+    Retorna uma série de texto com valores ausentes onde a planilha não traz nenhum dos dois.
+    """
+    import pandas as pd
+
+    identificador = pd.Series(pd.NA, index=df.index, dtype='string')
+    for coluna in ('NumeroId', 'Email'):
+        if coluna in df:
+            valores = df[coluna].astype('string').str.strip()
+            if coluna == 'Email':
+                valores = valores.str.lower()
+            valores = valores.mask(valores == '')
+            identificador = valores.fillna(identificador)
+    return identificador
+
+def resolver_colunas_em_cache(cabecalho):
+    """resolver_colunas memorizado pela impressão digital do cabeçalho (ver esquemas.py)."""
+    return esquemas.resolver(cabecalho, resolver_colunas)
 
 def process_file(file_path, report_map):
     """Lê um arquivo ODS, limpa os dados e retorna um DataFrame padronizado."""
-    try:
-        df = pd.read_excel(file_path)
-        df = clean_col_names(df)
+    import pandas as pd
+    from leitor_ods import ler_ods
 
-        file_name = os.path.basename(file_path)
-        file_parts = file_name.replace(' Notas.ods', '').split('-')
-        
-        turma_code = file_parts[0]
-        disciplina_code = file_parts[1]
+    file_name = os.path.basename(file_path)
+    with perfil.arquivo(file_name) as registro_perfil:
+        try:
+            # Lê apenas as colunas necessárias, sem carregar a planilha inteira.
+            # (inclui as etapas limpeza_colunas e descoberta_colunas, medidas à parte e
+            # executadas apenas na primeira vez que cada layout de cabeçalho aparece)
+            with perfil.etapa('leitura_ods'):
+                df_processed = ler_ods(file_path, resolver_colunas_em_cache)
 
-        turma_name = report_map.get("turma", {}).get(turma_code, turma_code)
-        disciplina_name = report_map.get("disciplina", {}).get(disciplina_code, disciplina_code)
+            file_parts = file_name.replace(' Notas.ods', '').split('-')
 
-        n1_col = [col for col in df.columns if 'AVALIAÇÃO 01' in col and 'total' not in col][0]
-        n2_col = [col for col in df.columns if 'AVALIAÇÃO 02' in col and 'total' not in col][0]
-        media_col = [col for col in df.columns if 'Média da Disciplina' in col][0]
+            turma_code = file_parts[0]
+            disciplina_code = file_parts[1]
 
-        df_processed = df[['Nome', 'Sobrenome', n1_col, n2_col, media_col]].copy()
-        df_processed.rename(columns={
-            n1_col: 'AV1',
-            n2_col: 'AV2',
-            media_col: 'MediaFinal'
-        }, inplace=True)
+            turma_name = report_map.get("turma", {}).get(turma_code, turma_code)
+            disciplina_name = report_map.get("disciplina", {}).get(disciplina_code, disciplina_code)
 
-        df_processed['Curso'] = turma_name
-        df_processed['Disciplina'] = disciplina_name
-        
-        df_processed['Aluno'] = df_processed['Nome'].str.strip() + ' ' + df_processed['Sobrenome'].str.strip()
-        df_processed['Aluno'] = df_processed['Aluno'].str.title()
+            df_processed['Curso'] = turma_name
+            df_processed['Disciplina'] = disciplina_name
 
-        for col in ['AV1', 'AV2', 'MediaFinal']:
-            df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce').fillna(0)
+            with perfil.etapa('montagem_aluno'):
+                df_processed['Aluno'] = df_processed['Nome'].str.strip() + ' ' + df_processed['Sobrenome'].str.strip()
+                df_processed['Aluno'] = df_processed['Aluno'].str.title()
 
-        df_processed.dropna(subset=['Nome', 'Sobrenome'], inplace=True)
+                df_processed['Identificador'] = montar_identificador(df_processed)
 
-        return df_processed
+            with perfil.etapa('conversao_notas'):
+                for col in ['AV1', 'AV2', 'MediaFinal']:
+                    df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce').fillna(0)
 
-    except Exception as e:
-        print(f"Erro ao processar o arquivo {os.path.basename(file_path)}: {e}")
-        return None
-
-# --- Script Principal ---
-input_folder = 'inputs_ods'
-output_folder = 'output'
-output_file = os.path.join(output_folder, 'relatorio_consolidado.csv')
-
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-
-report_map = get_report_map()
-if not report_map:
-    print("Não foi possível carregar o mapa de relatório. Usando nomes de arquivo padrão.")
-    report_map = {"turma": {}, "disciplina": {}}
-
-all_data = []
-od_files = [f for f in os.listdir(input_folder) if f.endswith('.ods')]
-
-for file_name in od_files:
-    file_path = os.path.join(input_folder, file_name)
-    
-    print(f"Processando arquivo: {file_name}...")
-    processed_df = process_file(file_path, report_map)
-    
-    if processed_df is not None:
-        all_data.append(processed_df)
-
-if all_data:
-    final_df = pd.concat(all_data, ignore_index=True)
-
-    final_df = final_df[['Curso', 'Disciplina', 'Aluno', 'AV1', 'AV2', 'MediaFinal']]
-
-    final_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-    
-    print(f"\nRelatório consolidado foi salvo com sucesso em: {output_file}")
-    print(f"Total de {len(final_df)} registros processados.")
-else:
-    print("\nNenhum dado foi processado. Verifique os erros acima.")
+                df_processed.dropna(subset=['Nome', 'Sobrenome'], inplace=True)
+
+            perfil.registrar_linhas(registro_perfil, len(df_processed))
+            return df_processed
+
+        except Exception as e:
+            print(f"Erro ao processar o arquivo {file_name}: {e}")
+            return None
+
+def _processar_em_worker(file_path, report_map):
+    """Executa process_file em um processo do pool, capturando as mensagens impressas
+    para que o processo principal as exiba na mesma ordem da execução serial."""
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        processed_df = process_file(file_path, report_map)
+    return processed_df, saida.getvalue(), perfil.coletar(), esquemas.coletar()
+
+def _iniciar_worker(esquemas_conhecidos):
+    """Initializer dos processos do pool.
+
+    Com fork, o processo filho herda as medições do perfil já feitas pelo processo
+    principal; elas são descartadas para que coletar() devolva só as do worker.
+    """
+    perfil.reiniciar()
+    esquemas.definir(esquemas_conhecidos)
+
+def contexto_pool():
+    """Contexto de multiprocessing do pool de leitura.
+
+    Com outras threads em execução (a atualização em segundo plano do painel, o
+    observador do modo --watch), os processos são criados com 'spawn': um fork
+    copiaria travas presas por essas threads e poderia bloquear os workers.
+    """
+    if threading.active_count() > 1:
+        return multiprocessing.get_context('spawn')
+    return None
+
+def processar_arquivos(file_paths, report_map, workers=1):
+    """Processa os arquivos informados e gera (caminho, DataFrame ou None) na ordem de entrada.
+
+    Com workers > 1 os arquivos são distribuídos em um pool de processos; a ordem dos
+    resultados e as mensagens de erro são as mesmas da execução serial. No máximo
+    2 * workers arquivos ficam em andamento ou aguardando o consumidor, então a
+    memória não cresce com o número de planilhas.
+    """
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            print(f"Processando arquivo: {os.path.basename(file_path)}...")
+            yield file_path, process_file(file_path, report_map)
+        return
+
+    workers = min(workers, len(file_paths))
+    # Cada processo começa com os layouts de cabeçalho já conhecidos e devolve os novos
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_pool(),
+                             initializer=_iniciar_worker, initargs=(esquemas.conhecidos(),)) as executor:
+        restantes = iter(file_paths)
+        em_andamento = deque(
+            (file_path, executor.submit(_processar_em_worker, file_path, report_map))
+            for file_path in islice(restantes, 2 * workers)
+        )
+        while em_andamento:
+            file_path, futuro = em_andamento.popleft()
+            processed_df, mensagens, registros_perfil, novos_esquemas = futuro.result()
+            proximo = next(restantes, None)
+            if proximo is not None:
+                em_andamento.append((proximo, executor.submit(_processar_em_worker, proximo, report_map)))
+
+            perfil.incorporar(registros_perfil)
+            esquemas.incorporar(novos_esquemas)
+            print(f"Processando arquivo: {os.path.basename(file_path)}...")
+            if mensagens:
+                print(mensagens, end='')
+            yield file_path, processed_df
+
+def consolidar(input_folder='inputs_ods', output_folder=OUTPUT_FOLDER, workers=1, usar_cache=True, progresso=None):
+    """Consolida as planilhas de input_folder no relatório de output_folder.
+
+    É a mesma rotina executada pela linha de comando, exposta para uso em outros
+    módulos (como o painel). Se informado, progresso(concluidos, total, file_name)
+    é chamado após cada planilha processada.
+
+    O relatório é gravado em fluxo: o resultado de cada planilha (processada ou lida
+    do cache) é acrescentado ao Parquet e ao CSV assim que fica pronto, então o pico
+    de memória é limitado pela maior planilha, não pelo total. Os dois arquivos são
+    temporários até o final e só então renomeados, então quem lê o relatório nunca
+    vê um arquivo pela metade.
+
+    Consolidações simultâneas na mesma pasta de saída (de outro processo, como o
+    modo --watch, ou do painel) são executadas uma após a outra.
+
+    Retorna um dicionário com o total de arquivos, os reaproveitados do cache, os
+    arquivos com erro e o número de registros gravados (0 se nada foi gravado).
+    """
+    from dados import trava_relatorio
+
+    with trava_relatorio(output_folder):
+        return _consolidar(input_folder, output_folder, workers, usar_cache, progresso)
+
+def _consolidar(input_folder, output_folder, workers, usar_cache, progresso):
+    from cache_consolidacao import CacheConsolidacao
+    from dados import PARQUET_PATH, CSV_PATH, GravadorConsolidado
+
+    output_file = os.path.join(output_folder, os.path.basename(PARQUET_PATH))
+    csv_file = os.path.join(output_folder, os.path.basename(CSV_PATH))
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    cache_dir = os.path.join(output_folder, '.cache')
+    report_map = get_report_map(cache_dir=cache_dir)
+    if not report_map:
+        print("Não foi possível carregar o mapa de relatório. Usando nomes de arquivo padrão.")
+        report_map = {"turma": {}, "disciplina": {}}
+
+    perfil.reiniciar()
+
+    od_files = [f for f in os.listdir(input_folder) if f.endswith('.ods')]
+    file_paths = [os.path.join(input_folder, file_name) for file_name in od_files]
+
+    cache = CacheConsolidacao(cache_dir, report_map)
+    esquemas.carregar(cache_dir)
+    removidos = cache.remover_ausentes(file_paths)
+    if removidos:
+        print(f"{len(removidos)} arquivo(s) removido(s) da pasta de entrada foram descartados do cache.")
+
+    with perfil.etapa('verificacao_cache'):
+        if not usar_cache:
+            pendentes = file_paths
+        else:
+            pendentes = [file_path for file_path in file_paths if not cache.valido(file_path)]
+    if len(pendentes) < len(file_paths):
+        print(f"{len(file_paths) - len(pendentes)} arquivo(s) sem alteração reaproveitado(s) do cache.")
+
+    erros = []
+    # Os arquivos pendentes chegam na mesma ordem de file_paths, então os resultados
+    # são intercalados com os fragmentos do cache mantendo a ordem das planilhas.
+    processados = processar_arquivos(pendentes, report_map, workers)
+    conjunto_pendentes = set(pendentes)
+    concluidos = 0
+    with GravadorConsolidado(output_file, csv_file) as gravador:
+        for file_path in file_paths:
+            if file_path in conjunto_pendentes:
+                _, processed_df = next(processados)
+                concluidos += 1
+                if processed_df is not None:
+                    processed_df = processed_df[COLUNAS_FINAIS]
+                    cache.guardar(file_path, processed_df)
+                else:
+                    erros.append(os.path.basename(file_path))
+                if progresso is not None:
+                    progresso(concluidos, len(pendentes), os.path.basename(file_path))
+            else:
+                with perfil.etapa('leitura_cache'):
+                    processed_df = cache.carregar(file_path)
+
+            if processed_df is not None:
+                with perfil.etapa('gravacao'):
+                    gravador.escrever(processed_df)
+
+        cache.salvar_manifesto()
+        esquemas.salvar(cache_dir)
+
+        resultado = {
+            'arquivos': len(file_paths),
+            'reaproveitados': len(file_paths) - len(pendentes),
+            'erros': erros,
+            'registros': gravador.linhas,
+        }
+
+        # Sem linhas e sem erros (todas as planilhas foram removidas ou estão vazias), o
+        # relatório é publicado vazio para não manter as linhas de arquivos que não existem
+        # mais; se alguma planilha falhou, o relatório anterior é mantido.
+        if gravador.linhas or not erros:
+            with perfil.etapa('publicacao'):
+                gravador.concluir()
+            print(f"\nRelatório consolidado foi salvo com sucesso em: {output_file}")
+            print(f"Exportação em CSV salva em: {csv_file}")
+            print(f"Total de {gravador.linhas} registros processados.")
+        else:
+            print("\nNenhum dado foi processado. Verifique os erros acima. O relatório anterior foi mantido.")
+
+    if perfil.ativo():
+        perfil.salvar(os.path.join(output_folder, 'perfil'))
+
+    return resultado
+
+SUBCOMANDOS = ('consolidate', 'pdf', 'png', 'shard', 'work', 'merge')
+
+def _executar_consolidacao(args):
+    if args.perfil:
+        perfil.ativar()
+    if args.watch:
+        import observador
+        # Só a primeira consolidação respeita --no-cache; as seguintes reaproveitam o cache
+        execucoes = iter([not args.no_cache])
+        observador.observar(
+            consolidar_pasta=lambda: consolidar(workers=args.workers, usar_cache=next(execucoes, True)),
+            polling=args.polling)
+    else:
+        consolidar(workers=args.workers, usar_cache=not args.no_cache)
+
+def _executar_pdf(args):
+    import relatorio_pdf
+    relatorio_pdf.executar(args)
+
+def _executar_png(args):
+    import relatorio_png
+    relatorio_png.executar(args)
+
+def _executar_distribuido(args):
+    import distribuido
+    distribuido.executar(args)
+
+def main(argv=None):
+    """CLI única do projeto, com os subcomandos consolidate, pdf e png, e shard, work e merge
+    para a consolidação distribuída (ver distribuido.py).
+
+    Sem subcomando, executa a consolidação (compatível com `python relatorio.py`).
+    As opções de todos os subcomandos vêm de opcoes.py, que não depende do pandas;
+    o pandas, o pyarrow e o matplotlib só são importados pelo subcomando que os usa.
+    """
+    parser = argparse.ArgumentParser(prog='relatorio', description="Gerador de relatórios de notas.")
+    subcomandos = parser.add_subparsers(dest='comando', metavar='{' + ','.join(SUBCOMANDOS) + '}')
+
+    parser_consolidate = subcomandos.add_parser(
+        'consolidate', help="Consolida as planilhas .ods de inputs_ods no relatório (padrão).")
+    opcoes.configurar_consolidacao(parser_consolidate)
+    parser_consolidate.set_defaults(executar=_executar_consolidacao)
+
+    parser_pdf = subcomandos.add_parser('pdf', help="Gera relatórios em PDF.")
+    opcoes.configurar_pdf(parser_pdf)
+    parser_pdf.set_defaults(executar=_executar_pdf)
+
+    parser_png = subcomandos.add_parser('png', help="Gera gráficos em PNG.")
+    opcoes.configurar_png(parser_png)
+    parser_png.set_defaults(executar=_executar_png)
+
+    parser_shard = subcomandos.add_parser('shard', help="Divide as planilhas em lotes em uma fila compartilhada.")
+    opcoes.configurar_shard(parser_shard)
+    parser_work = subcomandos.add_parser('work', help="Processa lotes da fila compartilhada.")
+    opcoes.configurar_work(parser_work)
+    parser_merge = subcomandos.add_parser('merge', help="Junta os lotes processados no relatório consolidado.")
+    opcoes.configurar_merge(parser_merge)
+    for parser_distribuido in (parser_shard, parser_work, parser_merge):
+        parser_distribuido.set_defaults(executar=_executar_distribuido)
+
+    # Sem subcomando (`relatorio.py` ou `relatorio.py --watch`), as opções são as de consolidate
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in SUBCOMANDOS + ('-h', '--help'):
+        argv = ['consolidate'] + argv
+
+    args = parser.parse_args(argv)
+    args.executar(args)
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,18 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from fpdf import FPDF
-import json
 import re
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dados import carregar_dados, COLUNAS_RELATORIO, OUTPUT_FOLDER
+from analise import NOTA_MINIMA, aprovado, situacao
+import opcoes
+from cache_renderizacao import CacheRenderizacao, hash_grupo
 
-# Configuração do estilo dos gráficos
-sns.set_theme(style="whitegrid")
-
-
-file_path = 'output/relatorio_consolidado.csv'
-try:
-    df = pd.read_csv(file_path)
-    
-    # --- AJUSTE DAS COLUNAS --- 
-    # Renomeia as colunas para um padrão consistente (minúsculas)
-    df.columns = ['curso', 'disciplina', 'aluno', 'av1', 'av2', 'media_final']
-    
-    # Cria a coluna 'status' com base na média final
-    # Regra: Aprovado se media_final >= 6, senão Reprovado. Ajuste se necessário.
-    df['status'] = np.where(df['media_final'] >= 6, 'Aprovado', 'Reprovado')
-    # ---------------------------
-    
-    print("Dados carregados e preparados com sucesso!")
-    print(df.head())
-    
-except FileNotFoundError:
-    print(f"Erro: O arquivo não foi encontrado em '{file_path}'.")
-    print("Por favor, execute o script de consolidação de relatórios primeiro.")
-    df = pd.DataFrame() # Cria um DataFrame vazio para evitar erros
+def formatar_notas(notas):
+    """Formata uma série de notas como texto, sem o ruído da conversão de float32 (ex.: 7.3 em vez de 7.300000190734863)."""
+    return notas.astype(np.float32).astype(str)
 
 def sanitize_filename(name):
     """Remove caracteres inválidos e substitui espaços por underscores."""
@@ -51,39 +34,83 @@ def select_from_menu(options, title):
         except ValueError:
             print("Entrada inválida. Por favor, digite um número.")
 
-curso_disciplinas_dict = {}
-curso_selecionado = None
-disciplina_selecionada = None
+def preparar_dados(df, nota_minima=NOTA_MINIMA):
+    """Padroniza as colunas em minúsculas e cria a coluna 'status'."""
+    df.columns = ['curso', 'disciplina', 'aluno', 'av1', 'av2', 'media_final']
 
-if not df.empty:
-    # Agrupa por curso e coleta as disciplinas únicas para cada um
-    curso_disciplinas_dict = df.groupby('curso')['disciplina'].unique().apply(list).to_dict()
-    
-    # --- Menu Interativo de Seleção ---
-    if curso_disciplinas_dict:
-        # 1. Selecionar o curso
-        cursos_disponiveis = list(curso_disciplinas_dict.keys())
-        curso_selecionado = select_from_menu(cursos_disponiveis, "Selecione um Curso")
-
-        # 2. Selecionar a disciplina
-        disciplinas_disponiveis = curso_disciplinas_dict[curso_selecionado]
-        disciplina_selecionada = select_from_menu(disciplinas_disponiveis, f"Selecione uma Disciplina para '{curso_selecionado}'")
-    else:
-        print("Não foi possível encontrar cursos ou disciplinas nos dados carregados.")
-
-# Filtrando o DataFrame
-df_filtrado = pd.DataFrame()
-if curso_selecionado and disciplina_selecionada:
-    if curso_selecionado in curso_disciplinas_dict and disciplina_selecionada in curso_disciplinas_dict[curso_selecionado]:
-        df_filtrado = df[(df['curso'] == curso_selecionado) & (df['disciplina'] == disciplina_selecionada)].copy()
-        print(f"\nGerando PDF para o curso: {curso_selecionado}")
-        print(f"Disciplina: {disciplina_selecionada}")
-    else:
-        print(f"\nCombinação de curso e disciplina não encontrada. Verifique os valores selecionados.")
-        print(f"Curso selecionado: '{curso_selecionado}'")
-        print(f"Disciplina selecionada: '{disciplina_selecionada}'")
+    # Cria a coluna 'status' com base na média final
+    # Regra: Aprovado se media_final >= nota_minima (padrão: NOTA_MINIMA, de analise.py), senão Reprovado.
+    df['status'] = situacao(df['media_final'], nota_minima)
+    return df
+
+# Incrementar sempre que o layout dos PDFs mudar, para que o cache de renderização
+# não reaproveite arquivos desenhados com o modelo anterior.
+VERSAO_MODELO = 1
+
+# Layout da tabela de notas
+COL_WIDTHS = [70, 20, 20, 30, 30]
+HEADERS = ['Aluno', 'AV1', 'AV2', 'Média Final', 'Status']
+ALINHAMENTOS = ['', 'C', 'C', 'C', 'C']
+ALTURA_LINHA = 10
+
+def preparar_linhas_pdf(df_dados, nota_minima=NOTA_MINIMA):
+    """Pré-calcula, em operações vetorizadas, os textos e as cores de cada linha da tabela.
+
+    Retorna uma lista de linhas (tuplas com os 5 textos já formatados) e uma lista de
+    tuplas de booleanos indicando quais células devem ser escritas em vermelho:
+    notas abaixo da nota mínima e o status 'Reprovado'. As linhas seguem a ordem decrescente da média final.
+    """
+    return textos_e_cores(df_dados.sort_values('media_final', ascending=False), nota_minima)
+
+def textos_e_cores(df_dados_sorted, nota_minima=NOTA_MINIMA):
+    """Textos e cores das linhas da tabela, na ordem em que estão no DataFrame (ver preparar_linhas_pdf)."""
+    # Nomes recodificados para latin-1, a codificação das fontes padrão do FPDF
+    alunos = df_dados_sorted['aluno'].astype(str).str.encode('latin-1', 'replace').str.decode('latin-1')
+    notas = [df_dados_sorted[col] for col in ('av1', 'av2', 'media_final')]
+    status = df_dados_sorted['status'].astype(str)
+
+    textos = [alunos.tolist()] + [formatar_notas(nota).tolist() for nota in notas] + [status.tolist()]
+    vermelhos = (
+        [np.zeros(len(df_dados_sorted), dtype=bool).tolist()]
+        + [(~aprovado(nota, nota_minima)).tolist() for nota in notas]
+        + [(status == 'Reprovado').to_numpy().tolist()]
+    )
+    return list(zip(*textos)), list(zip(*vermelhos))
+
+def escrever_cabecalho_tabela(pdf):
+    """Escreve a linha de títulos da tabela de notas."""
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Arial", 'B', 10)
+    for largura, header in zip(COL_WIDTHS, HEADERS):
+        pdf.cell(largura, ALTURA_LINHA, header, 1, 0, 'C')
+    pdf.ln()
+    pdf.set_font("Arial", '', 10)
+
+def escrever_linhas_tabela(pdf, linhas, vermelhos):
+    """Escreve as linhas pré-calculadas, repetindo o cabeçalho a cada nova página."""
+    escrever_cabecalho_tabela(pdf)
+    em_vermelho = False
+    for textos, cores in zip(linhas, vermelhos):
+        if pdf.get_y() + ALTURA_LINHA > pdf.page_break_trigger:
+            pdf.add_page()
+            escrever_cabecalho_tabela(pdf)
+            em_vermelho = False
+        for largura, texto, vermelho, alinhamento in zip(COL_WIDTHS, textos, cores, ALINHAMENTOS):
+            # Só troca a cor quando ela muda, em vez de resetar após cada célula
+            if vermelho != em_vermelho:
+                if vermelho:
+                    pdf.set_text_color(255, 0, 0) # Vermelho
+                else:
+                    pdf.set_text_color(0, 0, 0) # Preto
+                em_vermelho = vermelho
+            pdf.cell(largura, ALTURA_LINHA, texto, 1, 0, alinhamento)
+        pdf.ln()
+    pdf.set_text_color(0, 0, 0)
+
+def gerar_pdf_simples(df_dados, curso, disciplina, nota_minima=NOTA_MINIMA):
+    # Importado aqui para que o módulo possa ser carregado sem o fpdf
+    from fpdf import FPDF
 
-def gerar_pdf_simples(df_dados, curso, disciplina):
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", 'B', 16)
@@ -93,62 +120,179 @@ def gerar_pdf_simples(df_dados, curso, disciplina):
     pdf.cell(0, 10, f'Curso: {curso}', 0, 1, 'L')
     pdf.cell(0, 10, f'Disciplina: {disciplina}', 0, 1, 'L')
     pdf.ln(10)
-    
-    pdf.set_font("Arial", 'B', 10)
-    col_widths = [70, 20, 20, 30, 30]
-    headers = ['Aluno', 'AV1', 'AV2', 'Média Final', 'Status']
-    for i, header in enumerate(headers):
-        pdf.cell(col_widths[i], 10, header, 1, 0, 'C')
-    pdf.ln()
 
-    pdf.set_font("Arial", '', 10)
-    df_dados_sorted = df_dados.sort_values('media_final', ascending=False)
-    for _, row in df_dados_sorted.iterrows():
-        # Célula do Aluno (sempre preta)
-        aluno = str(row.get('aluno', 'N/A')).encode('latin-1', 'replace').decode('latin-1')
-        pdf.cell(col_widths[0], 10, aluno, 1)
-        
-        # --- LÓGICA DE COR PARA NOTAS --- 
-        # Nota AV1
-        av1_val = row.get('av1', 0)
-        if av1_val < 6:
-            pdf.set_text_color(255, 0, 0) # Vermelho
-        pdf.cell(col_widths[1], 10, str(av1_val), 1, 0, 'C')
-        pdf.set_text_color(0, 0, 0) # Reseta para preto
-        
-        # Nota AV2
-        av2_val = row.get('av2', 0)
-        if av2_val < 6:
-            pdf.set_text_color(255, 0, 0) # Vermelho
-        pdf.cell(col_widths[2], 10, str(av2_val), 1, 0, 'C')
-        pdf.set_text_color(0, 0, 0) # Reseta para preto
-        
-        # Média Final
-        media_val = row.get('media_final', 0)
-        if media_val < 6:
-            pdf.set_text_color(255, 0, 0) # Vermelho
-        pdf.cell(col_widths[3], 10, str(media_val), 1, 0, 'C')
-        pdf.set_text_color(0, 0, 0) # Reseta para preto
-        
-        # Status
-        status = str(row.get('status', 'N/A'))
-        if status == 'Reprovado':
-            pdf.set_text_color(255, 0, 0) # Vermelho
-        pdf.cell(col_widths[4], 10, status, 1, 0, 'C')
-        pdf.set_text_color(0, 0, 0) # Reseta para preto
-        
-        pdf.ln()
-        
+    linhas, vermelhos = preparar_linhas_pdf(df_dados, nota_minima)
+    escrever_linhas_tabela(pdf, linhas, vermelhos)
+
+    output_pdf_path = caminho_pdf(curso, disciplina)
+    pdf.output(output_pdf_path, 'F')
+    return output_pdf_path
+
+def caminho_pdf(curso, disciplina):
+    """Caminho do PDF de uma combinação de curso e disciplina."""
     # Sanitiza os nomes para criar um nome de arquivo seguro
     safe_curso = sanitize_filename(curso)
     safe_disciplina = sanitize_filename(disciplina)
-    output_pdf_path = f'output/relatorio_{safe_curso}_{safe_disciplina}.pdf'
-    pdf.output(output_pdf_path, 'F')
-    return output_pdf_path
+    return f'{OUTPUT_FOLDER}/relatorio_{safe_curso}_{safe_disciplina}.pdf'
+
+def chave_renderizacao(df_dados, curso, disciplina, nota_minima=NOTA_MINIMA):
+    """Hash dos dados e do layout de um PDF, usado pelo cache de renderização."""
+    parametros = {
+        'versao_modelo': VERSAO_MODELO,
+        'curso': curso,
+        'disciplina': disciplina,
+        'larguras': COL_WIDTHS,
+        'titulos': HEADERS,
+        'altura_linha': ALTURA_LINHA,
+        'nota_minima': nota_minima,
+    }
+    return hash_grupo(df_dados, parametros)
+
+def _gerar_pdf_grupo(tarefa):
+    """Gera o PDF de um grupo (curso, disciplina) e retorna o caminho e o tempo gasto."""
+    df_grupo, curso, disciplina, nota_minima = tarefa
+    inicio = time.perf_counter()
+    caminho_gerado = gerar_pdf_simples(df_grupo, curso, disciplina, nota_minima)
+    return caminho_gerado, time.perf_counter() - inicio
+
+def gerar_lote(curso=None, disciplina=None, workers=1, forcar=False, remover_obsoletos=False, expirar_dias=None,
+               nota_minima=NOTA_MINIMA):
+    """Gera, sem interação, os PDFs de todas as combinações de curso e disciplina.
+
+    Os dados são carregados uma única vez (já filtrados por curso/disciplina, se
+    informados) e divididos com um único groupby. Grupos cujos dados não mudaram
+    desde a última execução são pulados (ver CacheRenderizacao), a menos que
+    forcar=True. Com workers > 1 os relatórios são distribuídos em um pool de processos.
+    """
+    df = carregar_dados(COLUNAS_RELATORIO, curso=curso, disciplina=disciplina)
+    if df is None:
+        print("Erro: o relatório consolidado não foi encontrado na pasta 'output'.")
+        print("Por favor, execute o script de consolidação de relatórios primeiro.")
+        return []
+    df = preparar_dados(df, nota_minima)
 
-if not df_filtrado.empty:
     colunas_pdf = ['aluno', 'av1', 'av2', 'media_final', 'status']
-    caminho_pdf = gerar_pdf_simples(df_filtrado[colunas_pdf], curso_selecionado, disciplina_selecionada)
-    print(f"Relatório em PDF com cores salvo em: {caminho_pdf}")
-else:
-    print("Nenhum dado para gerar o PDF.")
\ No newline at end of file
+    tarefas = [
+        (df_grupo[colunas_pdf], curso_grupo, disciplina_grupo, nota_minima)
+        for (curso_grupo, disciplina_grupo), df_grupo in df.groupby(['curso', 'disciplina'], observed=True)
+    ]
+    if not tarefas:
+        print("Nenhum dado para gerar os PDFs.")
+        return []
+
+    cache = CacheRenderizacao(OUTPUT_FOLDER, 'pdf')
+    chaves = {}
+    pendentes = []
+    for tarefa in tarefas:
+        df_grupo, curso_grupo, disciplina_grupo, _ = tarefa
+        caminho = caminho_pdf(curso_grupo, disciplina_grupo)
+        chaves[caminho] = chave_renderizacao(df_grupo, curso_grupo, disciplina_grupo, nota_minima)
+        if forcar or not cache.valido(caminho, chaves[caminho]):
+            pendentes.append(tarefa)
+
+    inicio = time.perf_counter()
+    if workers <= 1 or len(pendentes) <= 1:
+        resultados = [_gerar_pdf_grupo(tarefa) for tarefa in pendentes]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pendentes))) as executor:
+            resultados = list(executor.map(_gerar_pdf_grupo, pendentes))
+    total = time.perf_counter() - inicio
+
+    for caminho_gerado, _ in resultados:
+        cache.registrar(caminho_gerado, chaves[caminho_gerado])
+    if remover_obsoletos:
+        if curso is None and disciplina is None:
+            removidos = cache.remover_obsoletos(chaves)
+            print(f"{len(removidos)} PDF(s) obsoleto(s) removido(s).")
+        else:
+            print("Aviso: --remover-obsoletos só é aplicado sem os filtros --curso/--disciplina.")
+    if expirar_dias is not None:
+        print(f"{len(cache.expirar(expirar_dias))} PDF(s) expirado(s) removido(s).")
+    cache.salvar_manifesto()
+
+    print(f"\n--- Resumo: {len(resultados)} PDF(s) gerado(s), {len(tarefas) - len(pendentes)} sem alteração ---")
+    for caminho_gerado, segundos in resultados:
+        print(f"{segundos:7.3f}s  {caminho_gerado}")
+    print(f"Tempo total: {total:.2f}s")
+    return resultados
+
+def gerar_interativo(nota_minima=NOTA_MINIMA):
+    """Gera um PDF escolhendo curso e disciplina pelo menu interativo."""
+    # Para o menu bastam as colunas de curso e disciplina; as notas são lidas depois,
+    # apenas para a combinação escolhida.
+    df = carregar_dados(colunas=['Curso', 'Disciplina'])
+    if df is not None:
+        df.columns = ['curso', 'disciplina']
+        print("Dados carregados e preparados com sucesso!")
+    else:
+        print("Erro: o relatório consolidado não foi encontrado na pasta 'output'.")
+        print("Por favor, execute o script de consolidação de relatórios primeiro.")
+        df = pd.DataFrame() # Cria um DataFrame vazio para evitar erros
+
+    curso_disciplinas_dict = {}
+    curso_selecionado = None
+    disciplina_selecionada = None
+
+    if not df.empty:
+        # Agrupa por curso e coleta as disciplinas únicas para cada um
+        curso_disciplinas_dict = df.groupby('curso', observed=True)['disciplina'].unique().apply(list).to_dict()
+
+        # --- Menu Interativo de Seleção ---
+        if curso_disciplinas_dict:
+            # 1. Selecionar o curso
+            cursos_disponiveis = list(curso_disciplinas_dict.keys())
+            curso_selecionado = select_from_menu(cursos_disponiveis, "Selecione um Curso")
+
+            # 2. Selecionar a disciplina
+            disciplinas_disponiveis = curso_disciplinas_dict[curso_selecionado]
+            disciplina_selecionada = select_from_menu(disciplinas_disponiveis, f"Selecione uma Disciplina para '{curso_selecionado}'")
+        else:
+            print("Não foi possível encontrar cursos ou disciplinas nos dados carregados.")
+
+    # Filtrando o DataFrame
+    df_filtrado = pd.DataFrame()
+    if curso_selecionado and disciplina_selecionada:
+        if curso_selecionado in curso_disciplinas_dict and disciplina_selecionada in curso_disciplinas_dict[curso_selecionado]:
+            # Lê do Parquet apenas o row group do curso selecionado
+            df_filtrado = preparar_dados(carregar_dados(COLUNAS_RELATORIO, curso=curso_selecionado, disciplina=disciplina_selecionada),
+                                         nota_minima)
+            print(f"\nGerando PDF para o curso: {curso_selecionado}")
+            print(f"Disciplina: {disciplina_selecionada}")
+        else:
+            print(f"\nCombinação de curso e disciplina não encontrada. Verifique os valores selecionados.")
+            print(f"Curso selecionado: '{curso_selecionado}'")
+            print(f"Disciplina selecionada: '{disciplina_selecionada}'")
+
+    if not df_filtrado.empty:
+        colunas_pdf = ['aluno', 'av1', 'av2', 'media_final', 'status']
+        df_pdf = df_filtrado[colunas_pdf]
+        caminho_gerado = gerar_pdf_simples(df_pdf, curso_selecionado, disciplina_selecionada, nota_minima)
+        # Registra o PDF no cache para que o modo em lote não o desenhe de novo
+        cache = CacheRenderizacao(OUTPUT_FOLDER, 'pdf')
+        cache.registrar(caminho_gerado, chave_renderizacao(df_pdf, curso_selecionado, disciplina_selecionada, nota_minima))
+        cache.salvar_manifesto()
+        print(f"Relatório em PDF com cores salvo em: {caminho_gerado}")
+    else:
+        print("Nenhum dado para gerar o PDF.")
+
+def executar(args):
+    """Executa a geração de PDF conforme os argumentos de opcoes.configurar_pdf."""
+    if args.livro is not None:
+        # Importado aqui: o livro só é necessário com --livro
+        import livro_pdf
+        livro_pdf.gerar_livro(args.livro or livro_pdf.LIVRO_PATH, args.curso, args.disciplina, forcar=args.force,
+                              nota_minima=args.nota_minima)
+    elif args.all or args.curso or args.disciplina:
+        gerar_lote(args.curso, args.disciplina, args.workers,
+                   forcar=args.force, remover_obsoletos=args.remover_obsoletos, expirar_dias=args.expirar_dias,
+                   nota_minima=args.nota_minima)
+    else:
+        gerar_interativo(args.nota_minima)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera relatórios de notas em PDF.")
+    opcoes.configurar_pdf(parser)
+    executar(parser.parse_args())
+
+if __name__ == '__main__':
+    main()
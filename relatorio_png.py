@@ -1,35 +1,36 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import json
 from datetime import datetime
 import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dados import carregar_dados, COLUNAS_RELATORIO, OUTPUT_FOLDER
+from analise import situacao
+import opcoes
+from opcoes import DPI
+from cache_renderizacao import CacheRenderizacao, hash_grupo
 
-# Configuração do estilo dos gráficos
-sns.set_theme(style="whitegrid")
+# Incrementar sempre que o desenho dos gráficos mudar, para que o cache de
+# renderização não reaproveite imagens feitas com o modelo anterior.
+VERSAO_MODELO = 1
+TAMANHO_FIGURA = (12, 8)
 
-file_path = 'output/relatorio_consolidado.csv'
-try:
-    # Carrega os dados do CSV gerado pelo script principal
-    df = pd.read_csv(file_path)
-    
-    # --- AJUSTE DAS COLUNAS --- 
-    # Renomeia as colunas para um padrão consistente (minúsculas)
-    df.columns = ['curso', 'disciplina', 'aluno', 'av1', 'av2', 'media_final']
-    
-    # Cria a coluna 'status' com base na média final
-    # Regra: Aprovado se media_final >= 6, senão Reprovado. Ajuste se necessário.
-    df['status'] = np.where(df['media_final'] >= 6, 'Aprovado', 'Reprovado')
-    # ---------------------------
-    
-    print("Dados carregados e preparados com sucesso!")
-    print(df.head())
-    
-except FileNotFoundError:
-    print(f"Erro: O arquivo não foi encontrado em '{file_path}'.")
-    print("Por favor, execute o script de consolidação de relatórios primeiro.")
-    df = pd.DataFrame() # Cria um DataFrame vazio para evitar erros
+def carregar_pyplot(backend=None):
+    """Importa matplotlib/seaborn sob demanda e aplica o estilo dos gráficos.
+
+    As bibliotecas gráficas são as mais lentas de importar, então só são carregadas
+    quando um gráfico vai de fato ser desenhado. Com backend='Agg' nenhuma janela é aberta.
+    """
+    import matplotlib
+    if backend is not None:
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Configuração do estilo dos gráficos
+    sns.set_theme(style="whitegrid")
+    return plt
 
 def sanitize_filename(name):
     """Remove caracteres inválidos e substitui espaços por underscores."""
@@ -51,50 +52,34 @@ def select_from_menu(options, title):
         except ValueError:
             print("Entrada inválida. Por favor, digite um número.")
 
-curso_disciplinas_dict = {}
-curso_selecionado = None
-disciplina_selecionada = None
-
-if not df.empty:
-    # Agrupa por curso e coleta as disciplinas únicas para cada um
-    curso_disciplinas_dict = df.groupby('curso')['disciplina'].unique().apply(list).to_dict()
-    
-    # --- Menu Interativo de Seleção ---
-    if curso_disciplinas_dict:
-        # 1. Selecionar o curso
-        cursos_disponiveis = list(curso_disciplinas_dict.keys())
-        curso_selecionado = select_from_menu(cursos_disponiveis, "Selecione um Curso")
-
-        # 2. Selecionar a disciplina
-        disciplinas_disponiveis = curso_disciplinas_dict[curso_selecionado]
-        disciplina_selecionada = select_from_menu(disciplinas_disponiveis, f"Selecione uma Disciplina para '{curso_selecionado}'")
-    else:
-        print("Não foi possível encontrar cursos ou disciplinas nos dados carregados.")
-
-# Filtrando o DataFrame
-df_filtrado = pd.DataFrame()
-if curso_selecionado and disciplina_selecionada:
-    if curso_selecionado in curso_disciplinas_dict and disciplina_selecionada in curso_disciplinas_dict[curso_selecionado]:
-        df_filtrado = df[(df['curso'] == curso_selecionado) & (df['disciplina'] == disciplina_selecionada)].copy()
-        print(f"\nGerando gráfico para o curso: {curso_selecionado}")
-        print(f"Disciplina: {disciplina_selecionada}")
-    else:
-        print(f"\nCombinação de curso e disciplina não encontrada. Verifique os valores selecionados.")
-        print(f"Curso selecionado: '{curso_selecionado}'")
-        print(f"Disciplina selecionada: '{disciplina_selecionada}'")
+def preparar_dados(df):
+    """Padroniza as colunas em minúsculas e cria a coluna 'status'."""
+    df.columns = ['curso', 'disciplina', 'aluno', 'av1', 'av2', 'media_final']
 
+    # Cria a coluna 'status' com base na média final
+    # Regra: Aprovado se media_final >= NOTA_MINIMA (analise.py), senão Reprovado.
+    df['status'] = situacao(df['media_final'])
+    return df
 
-if not df_filtrado.empty:
-    df_plot = df_filtrado.sort_values('media_final', ascending=False)
+def desenhar_grafico(ax, df_dados, curso, disciplina):
+    """Desenha no eixo informado o gráfico de barras das médias finais de uma turma."""
+    df_plot = df_dados.sort_values('media_final', ascending=False)
     
     media_geral_turma = df_plot['media_final'].mean()
     
-    plt.figure(figsize=(12, 8))
-    ax = sns.barplot(data=df_plot, x='media_final', y='aluno', orient='h')
-    
-    for p in ax.patches:
-        width = p.get_width()
-        ax.text(width + 0.2, p.get_y() + p.get_height() / 2, f'{width:.1f}', va='center')
+    import seaborn as sns
+
+    # Barras desenhadas direto no matplotlib, com a aparência do sns.barplot (cor do
+    # tema, saturação de 75% e o primeiro aluno no topo). O barplot agrupa os alunos
+    # pelo nome e calcula um intervalo de confiança por bootstrap para cada barra, o
+    # que dominava o tempo do modo em lote sem mudar nada no gráfico: cada aluno tem
+    # uma única média final.
+    posicoes = np.arange(len(df_plot))
+    barras = ax.barh(posicoes, df_plot['media_final'], height=0.8, color=sns.desaturate('C0', 0.75))
+    ax.set_yticks(posicoes, df_plot['aluno'].astype(str))
+    ax.set_ylim(len(df_plot) - 0.5, -0.5)
+    ax.yaxis.grid(False)
+    ax.bar_label(barras, fmt='%.1f', padding=3)
     
     ax.axvline(x=media_geral_turma, color='red', linestyle='--', linewidth=2, label=f'Média da Turma ({media_geral_turma:.2f})')
     ax.legend()
@@ -102,19 +87,201 @@ if not df_filtrado.empty:
     ax.set_xlim(0, 11)
     # Título formatado para melhor legibilidade
     data_geracao = datetime.now().strftime('%d/%m/%Y %H:%M')
-    plt.title(f'Notas Finais - {disciplina_selecionada}\n({curso_selecionado})\nGerado em: {data_geracao}', fontsize=16)
-    plt.xlabel('Média Final', fontsize=12)
-    plt.ylabel('Aluno', fontsize=12)
-    plt.xticks(np.arange(0, 11, 1))
-    plt.tight_layout()
-    
+    ax.set_title(f'Notas Finais - {disciplina}\n({curso})\nGerado em: {data_geracao}', fontsize=16)
+    ax.set_xlabel('Média Final', fontsize=12)
+    ax.set_ylabel('Aluno', fontsize=12)
+    ax.set_xticks(np.arange(0, 11, 1))
+
+def salvar_grafico(fig, curso, disciplina, dpi=DPI):
+    """Grava a figura em output/ e retorna o caminho do arquivo."""
+    fig.tight_layout()
+
+    output_png_path = caminho_png(curso, disciplina)
+    fig.savefig(output_png_path, dpi=dpi, bbox_inches='tight')
+    return output_png_path
+
+def caminho_png(curso, disciplina):
+    """Caminho do gráfico de uma combinação de curso e disciplina."""
     # Sanitiza os nomes para criar um nome de arquivo seguro
-    safe_curso = sanitize_filename(curso_selecionado)
-    safe_disciplina = sanitize_filename(disciplina_selecionada)
-    output_png_path = f'output/relatorio_{safe_curso}_{safe_disciplina}.png'
-    plt.savefig(output_png_path, dpi=300, bbox_inches='tight')
-    
-    print(f"Gráfico atualizado salvo em: {output_png_path}")
-    plt.show()
-else:
-    print("Não há dados para gerar o gráfico.")
\ No newline at end of file
+    safe_curso = sanitize_filename(curso)
+    safe_disciplina = sanitize_filename(disciplina)
+    return f'{OUTPUT_FOLDER}/relatorio_{safe_curso}_{safe_disciplina}.png'
+
+def chave_renderizacao(df_dados, curso, disciplina, dpi=DPI):
+    """Hash dos dados e dos parâmetros de um gráfico, usado pelo cache de renderização."""
+    parametros = {
+        'versao_modelo': VERSAO_MODELO,
+        'curso': curso,
+        'disciplina': disciplina,
+        'dpi': dpi,
+        'tamanho': TAMANHO_FIGURA,
+    }
+    return hash_grupo(df_dados, parametros)
+
+def _gerar_graficos(tarefas, dpi=DPI):
+    """Gera uma sequência de gráficos reaproveitando uma única figura.
+
+    Retorna, para cada tarefa, o caminho do PNG e o tempo gasto.
+    """
+    # Backend sem interface gráfica: funciona em servidores sem display
+    plt = carregar_pyplot('Agg')
+    # A figura já nasce na resolução final: o tight_layout e o savefig medem os textos
+    # na mesma resolução e reaproveitam o cache de layout de texto do matplotlib.
+    fig, ax = plt.subplots(figsize=TAMANHO_FIGURA, dpi=dpi)
+    resultados = []
+    for df_grupo, curso, disciplina in tarefas:
+        inicio = time.perf_counter()
+        ax.clear()
+        desenhar_grafico(ax, df_grupo, curso, disciplina)
+        caminho_gerado = salvar_grafico(fig, curso, disciplina, dpi)
+        resultados.append((caminho_gerado, time.perf_counter() - inicio))
+    plt.close(fig)
+    return resultados
+
+def gerar_lote(curso=None, disciplina=None, workers=1, forcar=False, remover_obsoletos=False, expirar_dias=None,
+               dpi=DPI):
+    """Gera, sem interação, os gráficos de todas as combinações de curso e disciplina.
+
+    Os dados são carregados uma única vez e divididos com um único groupby. Grupos
+    cujos dados não mudaram desde a última execução são pulados (ver
+    CacheRenderizacao), a menos que forcar=True. Com workers > 1 os grupos são
+    repartidos entre processos, cada um com sua própria figura.
+    """
+    df = carregar_dados(COLUNAS_RELATORIO, curso=curso, disciplina=disciplina)
+    if df is None:
+        print("Erro: o relatório consolidado não foi encontrado na pasta 'output'.")
+        print("Por favor, execute o script de consolidação de relatórios primeiro.")
+        return []
+    df = preparar_dados(df)
+
+    tarefas = [
+        (df_grupo[['aluno', 'media_final']], curso_grupo, disciplina_grupo)
+        for (curso_grupo, disciplina_grupo), df_grupo in df.groupby(['curso', 'disciplina'], observed=True)
+    ]
+    if not tarefas:
+        print("Não há dados para gerar os gráficos.")
+        return []
+
+    cache = CacheRenderizacao(OUTPUT_FOLDER, 'png')
+    chaves = {}
+    pendentes = []
+    for tarefa in tarefas:
+        df_grupo, curso_grupo, disciplina_grupo = tarefa
+        caminho = caminho_png(curso_grupo, disciplina_grupo)
+        chaves[caminho] = chave_renderizacao(df_grupo, curso_grupo, disciplina_grupo, dpi)
+        if forcar or not cache.valido(caminho, chaves[caminho]):
+            pendentes.append(tarefa)
+
+    inicio = time.perf_counter()
+    workers = max(1, min(workers, len(pendentes)))
+    if not pendentes:
+        resultados = []
+    elif workers == 1:
+        resultados = _gerar_graficos(pendentes, dpi)
+    else:
+        # Reparte os grupos de forma intercalada para equilibrar a carga entre os processos
+        lotes = [pendentes[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = [resultado for parcial in executor.map(_gerar_graficos, lotes, [dpi] * workers)
+                          for resultado in parcial]
+    total = time.perf_counter() - inicio
+
+    for caminho_gerado, _ in resultados:
+        cache.registrar(caminho_gerado, chaves[caminho_gerado])
+    if remover_obsoletos:
+        if curso is None and disciplina is None:
+            removidos = cache.remover_obsoletos(chaves)
+            print(f"{len(removidos)} gráfico(s) obsoleto(s) removido(s).")
+        else:
+            print("Aviso: --remover-obsoletos só é aplicado sem os filtros --curso/--disciplina.")
+    if expirar_dias is not None:
+        print(f"{len(cache.expirar(expirar_dias))} gráfico(s) expirado(s) removido(s).")
+    cache.salvar_manifesto()
+
+    print(f"\n--- Resumo: {len(resultados)} gráfico(s) gerado(s), {len(tarefas) - len(pendentes)} sem alteração ---")
+    for caminho_gerado, segundos in resultados:
+        print(f"{segundos:7.3f}s  {caminho_gerado}")
+    if resultados:
+        print(f"Tempo total: {total:.2f}s ({len(resultados) / total * 60:.0f} gráficos por minuto)")
+    return resultados
+
+def gerar_interativo(dpi=DPI):
+    """Gera um gráfico escolhendo curso e disciplina pelo menu interativo."""
+    # Para o menu bastam as colunas de curso e disciplina; as notas são lidas depois,
+    # apenas para a combinação escolhida.
+    df = carregar_dados(colunas=['Curso', 'Disciplina'])
+    if df is not None:
+        df.columns = ['curso', 'disciplina']
+        print("Dados carregados e preparados com sucesso!")
+    else:
+        print("Erro: o relatório consolidado não foi encontrado na pasta 'output'.")
+        print("Por favor, execute o script de consolidação de relatórios primeiro.")
+        df = pd.DataFrame() # Cria um DataFrame vazio para evitar erros
+
+    curso_disciplinas_dict = {}
+    curso_selecionado = None
+    disciplina_selecionada = None
+
+    if not df.empty:
+        # Agrupa por curso e coleta as disciplinas únicas para cada um
+        curso_disciplinas_dict = df.groupby('curso', observed=True)['disciplina'].unique().apply(list).to_dict()
+
+        # --- Menu Interativo de Seleção ---
+        if curso_disciplinas_dict:
+            # 1. Selecionar o curso
+            cursos_disponiveis = list(curso_disciplinas_dict.keys())
+            curso_selecionado = select_from_menu(cursos_disponiveis, "Selecione um Curso")
+
+            # 2. Selecionar a disciplina
+            disciplinas_disponiveis = curso_disciplinas_dict[curso_selecionado]
+            disciplina_selecionada = select_from_menu(disciplinas_disponiveis, f"Selecione uma Disciplina para '{curso_selecionado}'")
+        else:
+            print("Não foi possível encontrar cursos ou disciplinas nos dados carregados.")
+
+    # Filtrando o DataFrame
+    df_filtrado = pd.DataFrame()
+    if curso_selecionado and disciplina_selecionada:
+        if curso_selecionado in curso_disciplinas_dict and disciplina_selecionada in curso_disciplinas_dict[curso_selecionado]:
+            # Lê do Parquet apenas o row group do curso selecionado
+            df_filtrado = preparar_dados(carregar_dados(COLUNAS_RELATORIO, curso=curso_selecionado, disciplina=disciplina_selecionada))
+            print(f"\nGerando gráfico para o curso: {curso_selecionado}")
+            print(f"Disciplina: {disciplina_selecionada}")
+        else:
+            print(f"\nCombinação de curso e disciplina não encontrada. Verifique os valores selecionados.")
+            print(f"Curso selecionado: '{curso_selecionado}'")
+            print(f"Disciplina selecionada: '{disciplina_selecionada}'")
+
+    if not df_filtrado.empty:
+        plt = carregar_pyplot()
+        fig, ax = plt.subplots(figsize=TAMANHO_FIGURA, dpi=dpi)
+        desenhar_grafico(ax, df_filtrado, curso_selecionado, disciplina_selecionada)
+        output_png_path = salvar_grafico(fig, curso_selecionado, disciplina_selecionada, dpi)
+        # Registra o gráfico no cache para que o modo em lote não o desenhe de novo
+        cache = CacheRenderizacao(OUTPUT_FOLDER, 'png')
+        cache.registrar(output_png_path, chave_renderizacao(df_filtrado[['aluno', 'media_final']],
+                                                            curso_selecionado, disciplina_selecionada, dpi))
+        cache.salvar_manifesto()
+
+        print(f"Gráfico atualizado salvo em: {output_png_path}")
+        # Em ambientes sem display (backend Agg) não há janela para abrir
+        if plt.get_backend().lower() != 'agg':
+            plt.show()
+    else:
+        print("Não há dados para gerar o gráfico.")
+
+def executar(args):
+    """Executa a geração de gráficos conforme os argumentos de opcoes.configurar_png."""
+    if args.all or args.curso or args.disciplina:
+        gerar_lote(args.curso, args.disciplina, args.workers,
+                   forcar=args.force, remover_obsoletos=args.remover_obsoletos, expirar_dias=args.expirar_dias,
+                   dpi=args.dpi)
+    else:
+        gerar_interativo(args.dpi)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera gráficos de notas em PNG.")
+    opcoes.configurar_png(parser)
+    executar(parser.parse_args())
+
+if __name__ == '__main__':
+    main()
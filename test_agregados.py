@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agregados import TODOS, FAIXAS_HISTOGRAMA, CuboAgregado, histograma_df
+
+CURSOS = ['TDS', 'ADM', 'ENF']
+DISCIPLINAS = ['LP', 'BD', 'RED']
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(3)
+    n = 300
+    df = pd.DataFrame({
+        'Curso': pd.Categorical(rng.choice(CURSOS, n), categories=sorted(CURSOS + ['VAZIO'])),
+        'Disciplina': pd.Categorical(rng.choice(DISCIPLINAS, n)),
+        'Aluno': [f'Aluno {i}' for i in range(n)],
+        'AV1': rng.uniform(0, 10, n).round(2).astype(np.float32),
+        'AV2': rng.uniform(0, 10, n).round(2).astype(np.float32),
+        'MediaFinal': rng.uniform(0, 10, n).round(2).astype(np.float32),
+    })
+    # Notas nos limites das faixas do histograma
+    df.loc[:3, 'MediaFinal'] = [0.0, 9.99, 10.0, 5.0]
+    # ENF não cursa RED
+    return df[~((df['Curso'] == 'ENF') & (df['Disciplina'] == 'RED'))].reset_index(drop=True)
+
+
+def filtro_direto(df, curso, disciplina):
+    mascara = pd.Series(True, index=df.index)
+    if curso != TODOS:
+        mascara &= df['Curso'] == curso
+    if disciplina != TODOS:
+        mascara &= df['Disciplina'] == disciplina
+    return df[mascara]
+
+
+COMBINACOES = [(curso, disciplina) for curso in CURSOS + [TODOS, 'VAZIO'] for disciplina in DISCIPLINAS + [TODOS]]
+
+
+@pytest.mark.parametrize('curso, disciplina', COMBINACOES)
+def test_filtrar_igual_ao_filtro_direto(df, curso, disciplina):
+    obtido = CuboAgregado(df).filtrar(df, curso, disciplina)
+    pd.testing.assert_frame_equal(obtido, filtro_direto(df, curso, disciplina))
+
+
+@pytest.mark.parametrize('curso, disciplina', COMBINACOES)
+def test_consultar_igual_ao_filtro_direto(df, curso, disciplina):
+    metricas = CuboAgregado(df).consultar(curso, disciplina)
+    linhas = filtro_direto(df, curso, disciplina)
+    assert metricas['alunos'] == len(linhas)
+    for col in ('AV1', 'AV2', 'MediaFinal'):
+        assert metricas['somas'][col] == pytest.approx(linhas[col].astype(np.float64).sum())
+        assert metricas['medias'][col] == pytest.approx(linhas[col].astype(np.float64).mean() if len(linhas) else 0.0)
+    contagem, _ = np.histogram(linhas['MediaFinal'], bins=np.arange(len(FAIXAS_HISTOGRAMA) + 1))
+    assert metricas['histograma'].tolist() == contagem.tolist()
+
+
+def test_listas_de_cursos_e_disciplinas(df):
+    cubo = CuboAgregado(df)
+    assert cubo.cursos == ['ADM', 'ENF', 'TDS']
+    assert cubo.disciplinas(TODOS) == ['BD', 'LP', 'RED']
+    assert cubo.disciplinas('ENF') == ['BD', 'LP']
+    assert cubo.disciplinas('VAZIO') == []
+
+
+def test_cubo_vazio(df):
+    vazio = df.iloc[0:0]
+    cubo = CuboAgregado(vazio)
+    assert cubo.cursos == [] and cubo.disciplinas(TODOS) == []
+    assert cubo.consultar()['alunos'] == 0
+    assert cubo.filtrar(vazio, 'TDS').empty
+    assert histograma_df(cubo.consultar())['Alunos'].sum() == 0
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from alunos import IndiceAlunos, chaves_alunos, normalizar_nome, resumo_historico
+
+# (Curso, Disciplina, Aluno, MediaFinal, Identificador)
+LINHAS = [
+    ('TDS', 'LP', 'Ana Souza', 8.0, 'ana@escola.edu.br'),
+    ('TDS', 'BD', 'ANA  SOUZA', 5.0, None),               # mesmo nome, sem identificador: é a Ana
+    ('ADM', 'LP', 'João da Conceição', 7.0, None),        # só pelo nome
+    ('ADM', 'BD', 'joao da conceicao', 4.0, None),
+    ('TDS', 'LP', 'Maria Lima', 9.0, 'maria1@escola.edu.br'),
+    ('ADM', 'LP', 'Maria Lima', 3.0, 'maria2@escola.edu.br'),  # homônima, outro identificador
+    ('ADM', 'BD', 'Maria Lima', 6.0, None),               # dois candidatos: fica só com o nome
+]
+
+
+@pytest.fixture
+def df():
+    df = pd.DataFrame(LINHAS, columns=['Curso', 'Disciplina', 'Aluno', 'MediaFinal', 'Identificador'])
+    return df.assign(AV1=df['MediaFinal'], AV2=df['MediaFinal'])
+
+
+def test_normalizar_nome():
+    assert normalizar_nome('  JOÃO   da Conceição ') == 'joao da conceicao'
+    assert normalizar_nome('Ana  SOUZA') == 'ana souza'
+
+
+def test_chaves_alunos(df):
+    codigos, chaves, _ = chaves_alunos(df)
+    por_linha = chaves[codigos].tolist()
+    assert por_linha == [
+        'id:ana@escola.edu.br', 'id:ana@escola.edu.br',
+        'nome:joao da conceicao', 'nome:joao da conceicao',
+        'id:maria1@escola.edu.br', 'id:maria2@escola.edu.br', 'nome:maria lima',
+    ]
+    # Códigos na ordem em que as chaves aparecem
+    assert codigos.tolist() == [0, 0, 1, 1, 2, 3, 4]
+
+
+def test_chaves_sem_coluna_identificador(df):
+    codigos, chaves, _ = chaves_alunos(df.drop(columns='Identificador'))
+    assert chaves.tolist() == ['nome:ana souza', 'nome:joao da conceicao', 'nome:maria lima']
+    assert codigos.tolist() == [0, 0, 1, 1, 2, 2, 2]
+
+
+def test_historico_junta_as_linhas_do_aluno(df):
+    indice = IndiceAlunos(df)
+    assert len(indice) == 5
+    chave = indice.chave(identificador=' ANA@escola.edu.br ')
+    assert chave == 'id:ana@escola.edu.br'
+    assert indice.rotulo(chave) == 'Ana Souza (ana@escola.edu.br)'
+
+    historico = indice.historico(chave)
+    assert historico[['Curso', 'Disciplina']].values.tolist() == [['TDS', 'BD'], ['TDS', 'LP']]
+    assert historico['Situacao'].tolist() == ['Reprovado', 'Aprovado']
+    assert resumo_historico(historico) == {'disciplinas': 2, 'aprovadas': 1, 'reprovadas': 1, 'media_geral': 6.5}
+    assert indice.historico('id:outro').empty
+
+
+def test_chave_pelo_nome(df):
+    indice = IndiceAlunos(df)
+    assert indice.chave(nome='Joao da Conceicao') == 'nome:joao da conceicao'
+    # O nome leva ao aluno identificado quando há um único candidato
+    assert indice.chave(nome='ana souza') == 'id:ana@escola.edu.br'
+    assert indice.chave(nome='Maria Lima') == 'nome:maria lima'
+    assert indice.chave(nome='Pedro') is None
+
+
+def test_buscar(df):
+    indice = IndiceAlunos(df)
+    assert indice.buscar('souza') == ['id:ana@escola.edu.br']
+    assert set(indice.buscar('MARIA')) == {'id:maria1@escola.edu.br', 'id:maria2@escola.edu.br', 'nome:maria lima'}
+    assert indice.buscar('conceição') == ['nome:joao da conceicao']
+    # Sem prefixo, a busca aproximada encontra nomes com erros de digitação
+    assert indice.buscar('jaoo da conceicao') == ['nome:joao da conceicao']
+    assert indice.buscar('') == []
+    assert indice.buscar('zzz') == []
+
+
+def test_indice_vazio(df):
+    indice = IndiceAlunos(df.iloc[0:0])
+    assert len(indice) == 0
+    assert indice.buscar('ana') == []
+    assert list(indice.historico('id:ana@escola.edu.br').columns)[-1] == 'Situacao'
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise import AnaliseNotas, NOTA_MINIMA, PERCENTIS
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(5)
+    n = 400
+    notas = {col: rng.uniform(0, 10, n).round(2).astype(np.float32) for col in ('AV1', 'AV2', 'MediaFinal')}
+    return pd.DataFrame({
+        # Uma categoria sem linhas em cada coluna, como após um filtro
+        'Curso': pd.Categorical(rng.choice(['TDS', 'ADM', 'ENF'], n), categories=['ADM', 'ENF', 'TDS', 'VAZIO']),
+        'Disciplina': pd.Categorical(rng.choice(['LP', 'BD', 'RED', 'ARC'], n),
+                                     categories=['ARC', 'BD', 'LP', 'RED', 'VAZIA']),
+        'Aluno': [f'Aluno {i % 90}' for i in range(n)],
+        'Identificador': [f'aluno{i % 90}@escola.edu.br' for i in range(n)],
+        **notas,
+    })
+
+
+def esperado(df, chaves):
+    """Os indicadores calculados diretamente com groupby do pandas."""
+    notas = df[['AV1', 'AV2', 'MediaFinal']].astype(np.float64)
+    notas['Delta'] = notas['AV2'] - notas['AV1']
+    g = notas.groupby([df[chave] for chave in chaves], observed=True)
+    medias, desvios = g.mean(), g.std()
+    resultado = pd.DataFrame({
+        'Alunos': g.size(),
+        'Aprovados': g['MediaFinal'].apply(lambda x: (x >= NOTA_MINIMA).sum()),
+        'MediaAV1': medias['AV1'], 'MediaAV2': medias['AV2'],
+        'MediaFinal': medias['MediaFinal'], 'DeltaAV1AV2': medias['Delta'],
+        'DesvioAV1': desvios['AV1'], 'DesvioAV2': desvios['AV2'],
+        'DesvioMediaFinal': desvios['MediaFinal'], 'DesvioDelta': desvios['Delta'],
+        'Melhoraram': g['Delta'].apply(lambda x: (x > 0).mean()),
+    })
+    for p in PERCENTIS:
+        resultado[f'P{p}'] = g['MediaFinal'].quantile(p / 100)
+    return resultado
+
+
+def comparar(obtido, referencia):
+    obtido = obtido[referencia.columns]
+    assert list(obtido.index) == list(referencia.index)
+    np.testing.assert_allclose(obtido.to_numpy(dtype=np.float64), referencia.to_numpy(dtype=np.float64),
+                               rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('nivel, chaves', [
+    ('por_turma', ['Curso', 'Disciplina']),
+    ('por_curso', ['Curso']),
+    ('por_disciplina', ['Disciplina']),
+])
+def test_indicadores_iguais_ao_groupby(df, nivel, chaves):
+    comparar(getattr(AnaliseNotas(df), nivel), esperado(df, chaves))
+
+
+def test_geral_igual_ao_groupby(df):
+    referencia = esperado(df.assign(Todos=0), ['Todos'])
+    comparar(AnaliseNotas(df).geral.to_frame().T.set_axis([0]), referencia)
+
+
+def test_nota_minima(df):
+    analise = AnaliseNotas(df, nota_minima=8)
+    aprovados = (df['MediaFinal'] >= 8).groupby(df['Curso'], observed=True).sum()
+    assert analise.por_curso['Aprovados'].tolist() == aprovados.tolist()
+    assert (analise.por_curso['Reprovados'] + analise.por_curso['Aprovados'] == analise.por_curso['Alunos']).all()
+
+
+def test_consultar(df):
+    analise = AnaliseNotas(df)
+    assert analise.consultar('TDS', 'LP')['Alunos'] == ((df['Curso'] == 'TDS') & (df['Disciplina'] == 'LP')).sum()
+    assert analise.consultar(disciplina='BD')['Alunos'] == (df['Disciplina'] == 'BD').sum()
+    assert analise.consultar()['Alunos'] == len(df)
+    assert analise.consultar('VAZIO') is None
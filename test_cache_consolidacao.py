@@ -0,0 +1,47 @@
+import os
+import random
+import pandas as pd
+
+import gerar_planilhas
+import relatorio
+from dados import PARQUET_PATH
+
+
+def consolidar(pasta, usar_cache):
+    relatorio.consolidar(workers=1, usar_cache=usar_cache)
+    return pd.read_parquet(pasta / PARQUET_PATH)
+
+
+def test_consolidacao_com_cache_igual_a_sem_cache(pasta_trabalho):
+    referencia = consolidar(pasta_trabalho, usar_cache=False)
+    resultado = relatorio.consolidar(workers=1)
+    assert resultado['reaproveitados'] == resultado['arquivos']
+    pd.testing.assert_frame_equal(pd.read_parquet(pasta_trabalho / PARQUET_PATH), referencia)
+
+
+def test_arquivo_alterado_e_reprocessado(pasta_trabalho):
+    consolidar(pasta_trabalho, usar_cache=True)
+    alterado = sorted(os.listdir('inputs_ods'))[0]
+    gerar_planilhas.gerar_planilha(os.path.join('inputs_ods', alterado), random.Random(7), 20, 5)
+
+    resultado = relatorio.consolidar(workers=1)
+    assert resultado['reaproveitados'] == resultado['arquivos'] - 1
+    incremental = pd.read_parquet(pasta_trabalho / PARQUET_PATH)
+    pd.testing.assert_frame_equal(incremental, consolidar(pasta_trabalho, usar_cache=False))
+
+
+def test_arquivo_removido_sai_do_relatorio(pasta_trabalho):
+    completo = consolidar(pasta_trabalho, usar_cache=True)
+    os.remove(os.path.join('inputs_ods', sorted(os.listdir('inputs_ods'))[0]))
+    incremental = consolidar(pasta_trabalho, usar_cache=True)
+    assert len(incremental) < len(completo)
+    pd.testing.assert_frame_equal(incremental, consolidar(pasta_trabalho, usar_cache=False))
+
+
+def test_pasta_vazia_publica_relatorio_vazio(pasta_trabalho):
+    consolidar(pasta_trabalho, usar_cache=True)
+    for nome in os.listdir('inputs_ods'):
+        os.remove(os.path.join('inputs_ods', nome))
+    resultado = relatorio.consolidar(workers=1)
+    assert resultado['registros'] == 0
+    assert pd.read_parquet(pasta_trabalho / PARQUET_PATH).empty
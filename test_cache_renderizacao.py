@@ -0,0 +1,102 @@
+import os
+import random
+import pandas as pd
+
+import gerar_planilhas
+import relatorio
+import relatorio_pdf
+from cache_renderizacao import CacheRenderizacao, hash_grupo
+
+
+def df_grupo(media=7.0):
+    return pd.DataFrame({'aluno': ['Ana', 'Bruno'], 'media_final': [media, 5.0]})
+
+
+def test_hash_grupo():
+    chave = hash_grupo(df_grupo(), {'dpi': 300})
+    assert chave == hash_grupo(df_grupo(), {'dpi': 300})
+    assert chave != hash_grupo(df_grupo(media=7.5), {'dpi': 300})
+    assert chave != hash_grupo(df_grupo(), {'dpi': 150})
+    assert chave != hash_grupo(df_grupo().rename(columns={'aluno': 'nome'}), {'dpi': 300})
+
+
+def test_acerto_e_falha(tmp_path):
+    caminho = str(tmp_path / 'a.pdf')
+    chave = hash_grupo(df_grupo(), {})
+    cache = CacheRenderizacao(str(tmp_path), 'pdf')
+    assert not cache.valido(caminho, chave)
+
+    open(caminho, 'wb').close()
+    cache.registrar(caminho, chave)
+    cache.salvar_manifesto()
+
+    # O manifesto gravado vale para a próxima execução
+    cache = CacheRenderizacao(str(tmp_path), 'pdf')
+    assert cache.valido(caminho, chave)
+    assert not cache.valido(caminho, hash_grupo(df_grupo(media=8.0), {}))
+    # O cache de PNG é independente do de PDF
+    assert not CacheRenderizacao(str(tmp_path), 'png').valido(caminho, chave)
+
+    os.remove(caminho)
+    assert not cache.valido(caminho, chave)
+
+
+def test_manifesto_de_outra_versao_e_ignorado(tmp_path):
+    caminho = str(tmp_path / 'a.pdf')
+    open(caminho, 'wb').close()
+    (tmp_path / '.renderizacao_pdf.json').write_text('{"versao": 0, "arquivos": {"a.pdf": {"hash": "x"}}}')
+    assert CacheRenderizacao(str(tmp_path), 'pdf').arquivos == {}
+    (tmp_path / '.renderizacao_pdf.json').write_text('{corrompido')
+    assert not CacheRenderizacao(str(tmp_path), 'pdf').valido(caminho, 'x')
+
+
+def test_remover_obsoletos_e_expirar(tmp_path):
+    cache = CacheRenderizacao(str(tmp_path), 'pdf')
+    for nome in ('a.pdf', 'b.pdf', 'c.pdf'):
+        open(tmp_path / nome, 'wb').close()
+        cache.registrar(str(tmp_path / nome), nome)
+
+    assert cache.remover_obsoletos([str(tmp_path / 'a.pdf'), str(tmp_path / 'b.pdf')]) == ['c.pdf']
+    cache.salvar_manifesto()
+    assert sorted(os.listdir(tmp_path)) == ['.renderizacao_pdf.json', 'a.pdf', 'b.pdf']
+
+    # Na execução seguinte, só o arquivo não usado há mais de 30 dias expira
+    cache = CacheRenderizacao(str(tmp_path), 'pdf')
+    cache.arquivos['a.pdf']['ultimo_uso'] -= 40 * 86400
+    cache.arquivos['b.pdf']['ultimo_uso'] -= 40 * 86400
+    assert cache.valido(str(tmp_path / 'b.pdf'), 'b.pdf')
+    assert cache.expirar(30) == ['a.pdf']
+    assert list(cache.arquivos) == ['b.pdf']
+    assert not (tmp_path / 'a.pdf').exists()
+
+
+def test_gerar_lote_reaproveita_pdfs(pasta_trabalho):
+    relatorio.consolidar(workers=1)
+    gerados = sorted(caminho for caminho, _ in relatorio_pdf.gerar_lote())
+    assert gerados and all(os.path.exists(caminho) for caminho in gerados)
+    datas = {caminho: os.stat(caminho).st_mtime_ns for caminho in gerados}
+
+    # Sem mudanças nos dados, nada é desenhado de novo
+    assert relatorio_pdf.gerar_lote() == []
+    assert {caminho: os.stat(caminho).st_mtime_ns for caminho in gerados} == datas
+
+    # forcar=True desenha tudo de novo
+    assert sorted(caminho for caminho, _ in relatorio_pdf.gerar_lote(forcar=True)) == gerados
+
+    # Outra nota mínima muda o status dos alunos e, portanto, todos os PDFs
+    assert len(relatorio_pdf.gerar_lote(nota_minima=9)) == len(gerados)
+
+    # Um arquivo apagado é desenhado de novo, e só ele
+    os.remove(gerados[0])
+    assert [caminho for caminho, _ in relatorio_pdf.gerar_lote(nota_minima=9)] == [gerados[0]]
+
+
+def test_gerar_lote_redesenha_grupo_alterado(pasta_trabalho):
+    relatorio.consolidar(workers=1)
+    gerados = relatorio_pdf.gerar_lote()
+
+    alterado = sorted(os.listdir('inputs_ods'))[0]
+    gerar_planilhas.gerar_planilha(os.path.join('inputs_ods', alterado), random.Random(7), 20, 5)
+    relatorio.consolidar(workers=1)
+    redesenhados = relatorio_pdf.gerar_lote()
+    assert 1 <= len(redesenhados) < len(gerados)
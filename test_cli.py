@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import relatorio
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def chamadas(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(relatorio, 'consolidar', lambda **kwargs: chamadas.append(kwargs))
+    return chamadas
+
+
+def test_sem_subcomando_consolida(chamadas):
+    relatorio.main(['--workers', '2', '--no-cache'])
+    relatorio.main([])
+    assert chamadas[0] == {'workers': 2, 'usar_cache': False}
+    assert chamadas[1]['usar_cache'] is True
+
+
+def test_opcoes_de_consolidate_so_depois_do_subcomando(chamadas):
+    relatorio.main(['consolidate', '--workers', '3'])
+    assert chamadas == [{'workers': 3, 'usar_cache': True}]
+    # Antes do subcomando, a opção não pode ser descartada em silêncio
+    with pytest.raises(SystemExit):
+        relatorio.main(['--workers', '2', 'consolidate'])
+    assert len(chamadas) == 1
+
+
+@pytest.mark.parametrize('argumentos', [['--help'], ['pdf', '--help'], ['png', '--help'], ['work', '--help']])
+def test_ajuda_nao_importa_bibliotecas_pesadas(argumentos):
+    codigo = ("import sys, relatorio\n"
+              "try:\n"
+              f"    relatorio.main({argumentos!r})\n"
+              "except SystemExit:\n"
+              "    pass\n"
+              "print(sorted(m for m in ('pandas', 'pyarrow', 'matplotlib') if m in sys.modules))")
+    processo = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert processo.stdout.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,87 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import dados
+from dados import CSV_PATH, PARQUET_PATH, SCHEMA, GravadorConsolidado, carregar_dados
+
+
+def parte(curso, disciplina, alunos, nota=7.0):
+    return pd.DataFrame({
+        'Curso': curso, 'Disciplina': disciplina,
+        'Aluno': [f'{curso} {disciplina} {i}' for i in range(alunos)],
+        'AV1': nota, 'AV2': nota, 'MediaFinal': nota,
+        'Identificador': [f'{curso.lower()}{i}@escola.edu.br' for i in range(alunos)],
+    })
+
+
+PARTES = [parte('TDS', 'LP', 2), parte('ADM', 'LP', 3), parte('TDS', 'BD', 1), parte('ENF', 'RED', 2)]
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(dados.OUTPUT_FOLDER)
+    return tmp_path
+
+
+def publicar(partes, linhas_por_bloco=3):
+    with GravadorConsolidado(linhas_por_bloco=linhas_por_bloco) as gravador:
+        for df in partes:
+            gravador.escrever(df)
+        gravador.concluir()
+
+
+def test_publicacao_atomica(pasta):
+    with GravadorConsolidado(linhas_por_bloco=3) as gravador:
+        for df in PARTES:
+            gravador.escrever(df)
+        # Até concluir(), só existem os temporários
+        assert not os.path.exists(PARQUET_PATH) and not os.path.exists(CSV_PATH)
+        gravador.concluir()
+    assert sorted(os.listdir(dados.OUTPUT_FOLDER)) == sorted(map(os.path.basename, (PARQUET_PATH, CSV_PATH)))
+
+    esperado = pd.concat(PARTES, ignore_index=True).values.tolist()
+    # O CSV mantém a ordem de chegada; o Parquet agrupa cada bloco por curso
+    assert pd.read_csv(CSV_PATH, encoding='utf-8-sig').values.tolist() == esperado
+    assert sorted(carregar_dados().astype({'Curso': str, 'Disciplina': str}).values.tolist()) == sorted(esperado)
+    arquivo = pq.ParquetFile(PARQUET_PATH)
+    cursos = [arquivo.read_row_group(i).column('Curso').unique().to_pylist() for i in range(arquivo.num_row_groups)]
+    # Blocos de 3 linhas: [TDS LP, ADM LP] e [TDS BD, ENF RED]
+    assert cursos == [['ADM'], ['TDS'], ['ENF'], ['TDS']]
+
+
+def test_interrupcao_mantem_relatorio_anterior(pasta):
+    publicar(PARTES[:1])
+    anterior = carregar_dados()
+    csv_anterior = open(CSV_PATH, 'rb').read()
+
+    with pytest.raises(RuntimeError):
+        with GravadorConsolidado(linhas_por_bloco=3) as gravador:
+            for df in PARTES:
+                gravador.escrever(df)
+            raise RuntimeError('planilha corrompida')
+
+    pd.testing.assert_frame_equal(carregar_dados(), anterior)
+    assert open(CSV_PATH, 'rb').read() == csv_anterior
+    assert not any(nome.endswith('.tmp') for nome in os.listdir(dados.OUTPUT_FOLDER))
+
+
+def test_relatorio_vazio(pasta):
+    publicar([])
+    assert pq.read_schema(PARQUET_PATH).names == SCHEMA.names
+    assert carregar_dados().empty
+    assert open(CSV_PATH, encoding='utf-8-sig').read().strip() == ','.join(SCHEMA.names)
+
+
+def test_alternativa_csv(pasta):
+    assert carregar_dados() is None
+    publicar(PARTES)
+    do_parquet = carregar_dados(['Aluno', 'MediaFinal'], curso='TDS', disciplina='LP')
+    os.remove(PARQUET_PATH)
+
+    do_csv = carregar_dados(['Aluno', 'MediaFinal'], curso='TDS', disciplina='LP')
+    assert do_csv.values.tolist() == do_parquet.values.tolist() == [['TDS LP 0', 7.0], ['TDS LP 1', 7.0]]
+    assert len(carregar_dados(curso='ADM')) == 3
+    assert dados.versao_dados().startswith(CSV_PATH)
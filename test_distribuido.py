@@ -0,0 +1,121 @@
+import os
+import sys
+import random
+import subprocess
+import pandas as pd
+import pytest
+
+import distribuido
+import gerar_planilhas
+import relatorio
+from distribuido import FilaLotes, CONCLUIDO, EM_ANDAMENTO, FALHOU, MAX_TENTATIVAS
+from dados import PARQUET_PATH
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def sem_categorias(df):
+    return df.astype({'Curso': str, 'Disciplina': str})
+
+
+@pytest.fixture
+def fila(tmp_path):
+    fila = FilaLotes(str(tmp_path / 'fila'))
+    fila.criar(str(tmp_path), ['a.ods', 'b.ods', 'c.ods'], {'turma': {}, 'disciplina': {}}, arquivos_por_lote=2)
+    return fila
+
+
+def test_criar_divide_em_lotes(fila):
+    assert [lote['arquivos'] for lote in fila.lotes()] == [['a.ods', 'b.ods'], ['c.ods']]
+    assert fila.metadados()['report_map'] == {'turma': {}, 'disciplina': {}}
+
+
+def test_lote_reivindicado_nao_e_entregue_de_novo(fila):
+    primeiro = fila.reivindicar('t1')
+    segundo = fila.reivindicar('t2')
+    assert (primeiro[0], segundo[0]) == (1, 2)
+    assert fila.reivindicar('t3') is None
+
+
+def test_prazo_vencido_volta_para_a_fila(fila):
+    lote, _, posse_antiga = fila.reivindicar('morto', prazo=-1)
+    reivindicado = fila.reivindicar('t2')
+    assert reivindicado[0] == lote
+
+    # O trabalhador que perdeu o prazo não pode mais renovar nem concluir o lote
+    assert not fila.renovar(lote, posse_antiga)
+    assert not fila.concluir(lote, posse_antiga, 10, [])
+    assert fila.concluir(lote, reivindicado[2], 10, [])
+
+    estado = fila.lotes()[0]
+    assert estado['estado'] == CONCLUIDO
+    assert estado['trabalhador'] == 't2'
+    assert estado['tentativas'] == 2
+
+
+def test_lote_falha_apos_max_tentativas(fila):
+    for _ in range(MAX_TENTATIVAS):
+        assert fila.reivindicar('morto', prazo=-1)[0] == 1
+    # A próxima reivindicação marca o lote 1 como falho e entrega o lote 2
+    assert fila.reivindicar('t2')[0] == 2
+    assert [lote['estado'] for lote in fila.lotes()] == [FALHOU, EM_ANDAMENTO]
+
+
+def test_distribuido_igual_a_consolidacao(pasta_trabalho):
+    relatorio.consolidar(workers=1, usar_cache=False)
+    referencia = pd.read_parquet(PARQUET_PATH)
+
+    pasta_fila = str(pasta_trabalho / 'fila')
+    assert distribuido.distribuir(pasta_fila, arquivos_por_lote=4) == 2
+    assert distribuido.trabalhar(pasta_fila) == 2
+    saida = str(pasta_trabalho / 'saida')
+    assert distribuido.juntar(pasta_fila, saida)['registros'] == len(referencia)
+
+    juntado = pd.read_parquet(os.path.join(saida, os.path.basename(PARQUET_PATH)))
+    pd.testing.assert_frame_equal(sem_categorias(juntado), sem_categorias(referencia))
+
+
+def test_varios_trabalhadores_com_prazo_vencido(pasta_trabalho):
+    relatorio.consolidar(workers=1, usar_cache=False)
+    referencia = pd.read_parquet(PARQUET_PATH)
+
+    pasta_fila = str(pasta_trabalho / 'fila')
+    assert distribuido.distribuir(pasta_fila, arquivos_por_lote=2) == 3
+    # Trabalhador que morreu logo depois de reivindicar o primeiro lote
+    FilaLotes(pasta_fila).reivindicar('morto', prazo=1)
+    trabalhadores = [subprocess.Popen([sys.executable, os.path.join(RAIZ, 'relatorio.py'), 'work', '--fila', pasta_fila,
+                                       '--workers', '1', '--prazo', '30'], stdout=subprocess.DEVNULL)
+                     for _ in range(2)]
+    assert [trabalhador.wait(timeout=120) for trabalhador in trabalhadores] == [0, 0]
+
+    lotes = FilaLotes(pasta_fila).lotes()
+    assert [lote['estado'] for lote in lotes] == [CONCLUIDO] * 3
+    assert lotes[0]['tentativas'] == 2
+    assert lotes[0]['trabalhador'] != 'morto'
+
+    saida = str(pasta_trabalho / 'saida')
+    assert distribuido.juntar(pasta_fila, saida)['registros'] == len(referencia)
+    juntado = pd.read_parquet(os.path.join(saida, os.path.basename(PARQUET_PATH)))
+    pd.testing.assert_frame_equal(sem_categorias(juntado), sem_categorias(referencia))
+
+
+def test_juntar_publica_relatorio_vazio(pasta_trabalho):
+    saida = pasta_trabalho / 'saida'
+    relatorio.consolidar(output_folder=str(saida), workers=1)
+    assert len(pd.read_parquet(saida / os.path.basename(PARQUET_PATH))) > 0
+
+    # Planilhas sem alunos: nenhuma linha e nenhum erro, então o relatório anterior é substituído
+    for nome in os.listdir('inputs_ods'):
+        gerar_planilhas.gerar_planilha(os.path.join('inputs_ods', nome), random.Random(1), 0, 5)
+    pasta_fila = str(pasta_trabalho / 'fila')
+    distribuido.distribuir(pasta_fila)
+    distribuido.trabalhar(pasta_fila)
+    resultado = distribuido.juntar(pasta_fila, str(saida))
+    assert resultado['registros'] == 0 and not resultado['erros']
+    assert pd.read_parquet(saida / os.path.basename(PARQUET_PATH)).empty
+
+
+def test_juntar_exige_todos_os_lotes(fila, tmp_path):
+    fila.reivindicar('t1')
+    assert distribuido.juntar(fila.pasta, str(tmp_path / 'saida')) is None
+    assert not os.path.exists(tmp_path / 'saida')
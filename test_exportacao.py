@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import exportacao
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'Curso': pd.Categorical(['B', 'A', 'C', 'A', 'B'], categories=['C', 'B', 'A']),
+        'Aluno': ['Eva', 'Ana', 'Caio', 'Bia', 'Davi'],
+        'MediaFinal': np.array([7.5, np.nan, 3.0, 7.5, 9.1], dtype=np.float32),
+    }, index=[10, 20, 30, 40, 50])
+
+
+def test_ordem_linhas_estavel_com_ausentes_por_ultimo(df):
+    assert exportacao.ordem_linhas(df, 'MediaFinal').tolist() == [2, 0, 3, 4, 1]
+    assert exportacao.ordem_linhas(df, 'MediaFinal', decrescente=True).tolist() == [4, 0, 3, 2, 1]
+
+
+def test_ordem_linhas_categoria_pelo_texto(df):
+    assert df['Curso'].iloc[exportacao.ordem_linhas(df, 'Curso')].tolist() == ['A', 'A', 'B', 'B', 'C']
+
+
+def test_total_paginas():
+    assert exportacao.total_paginas(0, 100) == 1
+    assert exportacao.total_paginas(100, 100) == 1
+    assert exportacao.total_paginas(101, 100) == 2
+
+
+def test_pagina(df):
+    assert exportacao.pagina(df, 2, 2)['Aluno'].tolist() == ['Caio', 'Bia']
+    assert exportacao.pagina(df, 3, 2)['Aluno'].tolist() == ['Davi']
+    ordem = exportacao.ordem_linhas(df, 'Aluno')
+    pagina = exportacao.pagina(df, 1, 2, ['Aluno'], ordem)
+    assert list(pagina.columns) == ['Aluno']
+    assert pagina['Aluno'].tolist() == ['Ana', 'Bia']
+
+
+@pytest.mark.parametrize('formato', ['CSV', 'XLSX', 'Parquet'])
+def test_exportar_em_blocos(df, formato, tmp_path):
+    # Blocos de 2 linhas, para que a exportação junte vários
+    ordem = exportacao.ordem_linhas(df, 'Aluno', decrescente=True)
+    caminho = tmp_path / ('dados' + exportacao.FORMATOS[formato][0])
+    exportacao.exportar(df, caminho, formato, ['Aluno', 'MediaFinal'], ordem, linhas_por_bloco=2)
+
+    lido = {'CSV': pd.read_csv, 'XLSX': pd.read_excel, 'Parquet': pd.read_parquet}[formato](caminho)
+    esperado = df.iloc[ordem][['Aluno', 'MediaFinal']].reset_index(drop=True)
+    assert lido['Aluno'].tolist() == esperado['Aluno'].tolist()
+    np.testing.assert_allclose(lido['MediaFinal'].to_numpy(dtype=np.float64),
+                               esperado['MediaFinal'].to_numpy(dtype=np.float64), rtol=1e-6)
+    if formato == 'Parquet':
+        # Um row group por bloco
+        assert pq.ParquetFile(caminho).num_row_groups == 3
+
+
+@pytest.mark.parametrize('formato', ['CSV', 'XLSX', 'Parquet'])
+def test_exportar_sem_linhas(df, formato, tmp_path):
+    caminho = tmp_path / ('dados' + exportacao.FORMATOS[formato][0])
+    caminho.write_bytes(exportacao.conteudo_exportacao(df.iloc[0:0], formato, ['Aluno', 'MediaFinal']))
+    lido = {'CSV': pd.read_csv, 'XLSX': pd.read_excel, 'Parquet': pd.read_parquet}[formato](caminho)
+    assert list(lido.columns) == ['Aluno', 'MediaFinal']
+    assert lido.empty
@@ -0,0 +1,68 @@
+import random
+import zipfile
+import pandas as pd
+import pytest
+
+import gerar_planilhas
+from leitor_ods import ler_ods
+from relatorio import resolver_colunas
+
+COLUNAS_NOTAS = ['AV1', 'AV2', 'MediaFinal']
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    caminho = tmp_path / 'TDS-LP Notas.ods'
+    gerar_planilhas.gerar_planilha(str(caminho), random.Random(3), 25, 8)
+    return caminho
+
+
+def test_igual_ao_read_excel(planilha):
+    """As colunas lidas em fluxo devem ser as mesmas do pd.read_excel(engine='odf')."""
+    referencia = pd.read_excel(planilha, engine='odf')
+    # Texto sem a inferência de tipos, que transformaria identificações como '01537797' em números
+    textos = pd.read_excel(planilha, engine='odf', dtype=str)
+    selecao = resolver_colunas(list(referencia.columns))
+    df = ler_ods(planilha, resolver_colunas)
+
+    assert list(df.columns) == list(selecao)
+    assert len(df) == len(referencia)
+    for coluna, indice in selecao.items():
+        esperado = referencia.iloc[:, indice]
+        if coluna in COLUNAS_NOTAS:
+            pd.testing.assert_series_equal(pd.to_numeric(df[coluna], errors='coerce'),
+                                           pd.to_numeric(esperado, errors='coerce'),
+                                           check_names=False, check_dtype=False)
+        else:
+            assert df[coluna].tolist() == textos.iloc[:, indice].tolist()
+
+
+def test_planilha_sem_alunos(tmp_path):
+    caminho = tmp_path / 'TDS-LP Notas.ods'
+    gerar_planilhas.gerar_planilha(str(caminho), random.Random(3), 0, 8)
+    referencia = pd.read_excel(caminho, engine='odf')
+    df = ler_ods(caminho, resolver_colunas)
+    assert df.empty
+    assert list(df.columns) == list(resolver_colunas(list(referencia.columns)))
+    assert (df.dtypes == referencia.dtypes.iloc[0]).all()
+
+
+def test_cabecalho_passado_ao_seletor(planilha):
+    cabecalhos = []
+
+    def selecionar(cabecalho):
+        cabecalhos.append(cabecalho)
+        return {'Nome': 0}
+
+    ler_ods(planilha, selecionar)
+    referencia = pd.read_excel(planilha, engine='odf', nrows=0)
+    assert len(cabecalhos) == 1
+    assert [str(col) for col in cabecalhos[0]] == list(referencia.columns)
+
+
+def test_sem_cabecalho(tmp_path):
+    caminho = tmp_path / 'vazia.ods'
+    with zipfile.ZipFile(caminho, 'w') as ods:
+        ods.writestr('content.xml', gerar_planilhas.CONTENT_INICIO + gerar_planilhas.CONTENT_FIM)
+    with pytest.raises(ValueError):
+        ler_ods(caminho, resolver_colunas)
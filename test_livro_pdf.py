@@ -0,0 +1,91 @@
+import re
+import pandas as pd
+import pytest
+
+import livro_pdf
+from relatorio_pdf import preparar_dados
+
+# (curso, disciplina, alunos): a primeira seção ocupa mais de uma página
+SECOES = [('Curso A', 'Banco de Dados', 60), ('Curso A', 'Redes', 5), ('Curso B', 'Algoritmos', 8)]
+
+
+def ler_objetos(conteudo):
+    """Lê a tabela xref do PDF e retorna {número: corpo do objeto} e o dicionário do trailer.
+
+    Falha se o startxref não apontar para a tabela ou se alguma entrada não apontar
+    para o início do objeto correspondente.
+    """
+    inicio_xref = int(re.search(rb'startxref\s+(\d+)\s+%%EOF\s*$', conteudo).group(1))
+    assert conteudo[inicio_xref:].startswith(b'xref')
+    linhas = conteudo[inicio_xref:].split(b'\n')
+    primeiro, quantidade = map(int, linhas[1].split())
+    objetos = {}
+    for numero, entrada in enumerate(linhas[2:2 + quantidade], start=primeiro):
+        deslocamento, _, tipo = entrada.split()
+        if tipo == b'n':
+            assert conteudo[int(deslocamento):].startswith(b'%d 0 obj' % numero), numero
+            fim = conteudo.index(b'endobj', int(deslocamento))
+            objetos[numero] = conteudo[int(deslocamento):fim]
+    trailer = b'\n'.join(linhas[2 + quantidade:])
+    assert int(re.search(rb'/Size (\d+)', trailer).group(1)) == primeiro + quantidade
+    return objetos, trailer
+
+
+def referencia(corpo, chave):
+    encontrado = re.search(rb'/%s (\d+) 0 R' % chave, corpo)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def irmaos(objetos, primeiro):
+    """Percorre uma lista de marcadores pelo /Next, a partir de `primeiro`."""
+    while primeiro is not None:
+        yield primeiro
+        primeiro = referencia(objetos[primeiro], b'Next')
+
+
+@pytest.fixture
+def livro(tmp_path):
+    linhas = [(curso, disciplina, f'Aluno {i:02d}', 7.0, 5.0, 6.0 if i % 3 else 4.0)
+              for curso, disciplina, alunos in SECOES for i in range(alunos)]
+    df = preparar_dados(pd.DataFrame(linhas, columns=['Curso', 'Disciplina', 'Aluno', 'AV1', 'AV2', 'MediaFinal']))
+    caminho = tmp_path / 'livro.pdf'
+    paginas = livro_pdf.escrever_livro(df, str(caminho))
+    return caminho.read_bytes(), paginas
+
+
+def test_xref_e_paginas(livro):
+    conteudo, paginas = livro
+    objetos, trailer = ler_objetos(conteudo)
+
+    catalogo = objetos[referencia(trailer, b'Root')]
+    raiz_paginas = objetos[referencia(catalogo, b'Pages')]
+    filhas = [int(n) for n in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[(.*?)\]', raiz_paginas, re.S).group(1))]
+    assert int(re.search(rb'/Count (\d+)', raiz_paginas).group(1)) == paginas == len(filhas)
+    assert all(b'/Type /Page\n' in objetos[n] for n in filhas)
+    # Capa, sumário e as seções, com a primeira ocupando mais de uma página
+    assert paginas >= 2 + len(SECOES) + 1
+
+
+def test_marcadores(livro):
+    conteudo, _ = livro
+    objetos, trailer = ler_objetos(conteudo)
+    catalogo = objetos[referencia(trailer, b'Root')]
+    raiz = objetos[referencia(catalogo, b'Outlines')]
+    assert b'/Type /Outlines' in raiz
+
+    def titulo(numero):
+        return re.search(rb'/Title \((.*?)\)\n', objetos[numero]).group(1).decode('latin-1')
+
+    raiz_paginas = objetos[referencia(catalogo, b'Pages')]
+    filhas = [int(n) for n in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[(.*?)\]', raiz_paginas, re.S).group(1))]
+    arvore = {}
+    destinos = []
+    for curso in irmaos(objetos, referencia(raiz, b'First')):
+        arvore[titulo(curso)] = []
+        for disciplina in irmaos(objetos, referencia(objetos[curso], b'First')):
+            arvore[titulo(curso)].append(titulo(disciplina))
+            destino = int(re.search(rb'/Dest \[(\d+) 0 R', objetos[disciplina]).group(1))
+            destinos.append(filhas.index(destino))
+    assert arvore == {'Sumário': [], 'Curso A': ['Banco de Dados', 'Redes'], 'Curso B': ['Algoritmos']}
+    # Cada disciplina aponta para a página em que a seção começa; a primeira seção ocupa mais de uma
+    assert destinos[0] >= 2 and destinos[1] > destinos[0] + 1 and destinos[2] > destinos[1]
@@ -0,0 +1,38 @@
+import collections
+import pytest
+
+import perfil
+import relatorio
+
+
+@pytest.fixture
+def perfil_ativo(monkeypatch):
+    monkeypatch.setenv(perfil.VARIAVEL_AMBIENTE, '1')
+    monkeypatch.setattr(perfil, '_ativo', True)
+    perfil.reiniciar()
+    yield
+    perfil.reiniciar()
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_etapas_contadas_uma_vez(pasta_trabalho, perfil_ativo, workers):
+    resultado = relatorio.consolidar(workers=workers, usar_cache=False)
+    contagem = collections.Counter(registro['etapa'] for registro in perfil._registros)
+    assert contagem['verificacao_cache'] == 1
+    assert contagem['publicacao'] == 1
+    assert contagem['leitura_ods'] == resultado['arquivos']
+
+
+def test_acrescimo_do_pico(perfil_ativo):
+    with perfil.etapa('alocacao'):
+        dados = b'\x01' * (300 * 1024 * 1024)
+    del dados
+    with perfil.etapa('depois'):
+        pass
+    alocacao, depois = perfil._registros
+    if alocacao['pico_rss_kb'] is None:
+        pytest.skip("ru_maxrss indisponível nesta plataforma")
+    # Só a etapa que elevou o pico recebe o acréscimo; a seguinte herda o pico, mas não o acréscimo
+    assert alocacao['acrescimo_pico_kb'] > 100 * 1024
+    assert depois['pico_rss_kb'] == alocacao['pico_rss_kb']
+    assert depois['acrescimo_pico_kb'] == 0